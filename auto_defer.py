@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import logging
+from typing import Dict, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class AutoDefer:
+    """Defers interaction handlers that have not responded within a time budget.
+
+    Discord fails any interaction that isn't acknowledged within 3 seconds.
+    A handler wrapped with this decorator gets a timer, and if it has not
+    responded by the time the budget runs out the interaction is deferred on
+    its behalf. Handlers reply through respond(), which uses the initial
+    response while it is still available and a followup after a deferral.
+    """
+
+    def __init__(self, budget: float = 1.5, ephemeral: bool = True):
+        self.budget = budget
+        self.ephemeral = ephemeral
+        self.handled_count = 0
+        self.deferred_count = 0
+        self._timers: Dict[int, asyncio.Task] = {}
+        self._deferring: Set[int] = set()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = next(arg for arg in args if isinstance(arg, discord.Interaction))
+            self.handled_count += 1
+            timer = asyncio.create_task(self._defer_after(interaction, func.__qualname__))
+            self._timers[interaction.id] = timer
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                timer.cancel()
+                self._timers.pop(interaction.id, None)
+        return wrapper
+
+    def stats(self) -> dict:
+        return {
+            "handled": self.handled_count,
+            "deferred": self.deferred_count,
+        }
+
+    async def _defer_after(self, interaction: discord.Interaction, name: str):
+        await asyncio.sleep(self.budget)
+        if interaction.response.is_done():
+            return
+
+        self._deferring.add(interaction.id)
+        try:
+            await interaction.response.defer(ephemeral=self.ephemeral, thinking=True)
+            self.deferred_count += 1
+            logger.warning(f"Auto-deferred {name} after {self.budget}s ({self.deferred_count} of {self.handled_count} handled interactions so far)")
+        except discord.HTTPException as e:
+            logger.error(f"Error auto-deferring {name}: {e}")
+        finally:
+            self._deferring.discard(interaction.id)
+
+    async def respond(self, interaction: discord.Interaction, content=None, **kwargs):
+        """Reply to an interaction as its initial response if still possible, otherwise as a followup"""
+        timer = self._timers.get(interaction.id)
+        if timer is not None and not timer.done():
+            if interaction.id in self._deferring:
+                # A defer is already on the wire; wait for it so the reply becomes a followup
+                await timer
+            else:
+                timer.cancel()
+
+        if interaction.response.is_done():
+            return await interaction.followup.send(content, **kwargs)
+        await interaction.response.send_message(content, **kwargs)
@@ -0,0 +1,392 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from catalog import CATEGORIES, Catalog, iter_bits
+
+logger = logging.getLogger(__name__)
+
+class Cart:
+    """A user's shop selections stored as one bitmask per catalog category.
+
+    Bit ``n`` of a category mask is set when the ``n``-th item of that
+    category (in catalog order) is in the cart.
+    """
+
+    __slots__ = ("catalog", "weapons", "money", "watches", "packages")
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.weapons = 0
+        self.money = 0
+        self.watches = 0
+        self.packages = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.weapons or self.money or self.watches or self.packages)
+
+    def mask(self, category: str) -> int:
+        return getattr(self, category)
+
+    def add(self, category: str, item_ids: Iterable[str]) -> int:
+        """Add items to a category, returning how many were new. Unknown ids are ignored."""
+        before = getattr(self, category)
+        mask = before | self.catalog.mask(category, item_ids)
+        setattr(self, category, mask)
+        return mask.bit_count() - before.bit_count()
+
+    def has(self, category: str, item_id: str) -> bool:
+        bit = self.catalog.index[category].get(item_id)
+        return bit is not None and bool(getattr(self, category) >> bit & 1)
+
+    def count(self, category: str) -> int:
+        return getattr(self, category).bit_count()
+
+    def items(self, category: str) -> List[str]:
+        """Item ids selected in a category, in catalog order"""
+        ids = self.catalog.ids[category]
+        return [ids[bit] for bit in iter_bits(getattr(self, category))]
+
+    def total(self) -> float:
+        """Sum of the prices of every selected item"""
+        return self.catalog.total(self)
+
+    def snapshot(self) -> Dict[str, List[str]]:
+        """Selected item ids per non-empty category; unlike the bitmasks, stays valid across catalog changes"""
+        return {category: self.items(category) for category in CATEGORIES if getattr(self, category)}
+
+    def clear(self):
+        self.weapons = self.money = self.watches = self.packages = 0
+
+    def rebind(self, catalog: Catalog) -> "Cart":
+        """Copy of this cart re-indexed against another catalog; items no longer sold are dropped"""
+        cart = Cart(catalog)
+        for category in CATEGORIES:
+            setattr(cart, category, catalog.mask(category, self.items(category)))
+        return cart
+
+    def to_int(self) -> int:
+        """Pack every category mask into a single integer"""
+        offsets = self.catalog.offsets
+        packed = 0
+        for category in CATEGORIES:
+            packed |= getattr(self, category) << offsets[category]
+        return packed
+
+    @classmethod
+    def from_int(cls, catalog: Catalog, packed: int) -> "Cart":
+        """Rebuild a cart packed by to_int against the same catalog layout"""
+        cart = cls(catalog)
+        for category in CATEGORIES:
+            size = len(catalog.ids[category])
+            setattr(cart, category, packed >> catalog.offsets[category] & ((1 << size) - 1))
+        return cart
+
+    def to_bytes(self) -> bytes:
+        packed = self.to_int()
+        return packed.to_bytes((packed.bit_length() + 7) // 8, "little")
+
+    @classmethod
+    def from_bytes(cls, catalog: Catalog, data: bytes) -> "Cart":
+        return cls.from_int(catalog, int.from_bytes(data, "little"))
+
+    @classmethod
+    def from_layout(cls, catalog: Catalog, layout: str, data: bytes) -> "Cart":
+        """Rebuild a cart packed against another catalog's layout (Catalog.layout); items no longer sold are dropped"""
+        packed = int.from_bytes(data, "little")
+        cart = cls(catalog)
+        for category, item_ids in json.loads(layout):
+            bits = packed & ((1 << len(item_ids)) - 1)
+            packed >>= len(item_ids)
+            if category in catalog.index:
+                setattr(cart, category, catalog.mask(category, [item_ids[bit] for bit in iter_bits(bits)]))
+        return cart
+
+class CartStore:
+    """Per-user shop carts with write-behind persistence.
+
+    The in-memory copy is authoritative; every change marks the cart dirty
+    and a background task flushes dirty carts to SQLite in one batch.
+
+    Carts untouched for ``ttl`` seconds expire, checked lazily on access and
+    by a periodic sweep, and at most ``max_entries`` carts are kept in
+    memory, evicting the least recently used. Evicted carts are written out
+    with their last-touched time and read back when their owner next uses
+    the shop; expired and cleared carts are deleted from the database.
+    """
+
+    def __init__(self, db, catalog: Optional[Catalog] = None, flush_interval: float = 5.0, ttl: float = 3600, max_entries: int = 10000,
+                 sweep_interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.db = db
+        self.catalog = catalog
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        # Ordered least to most recently touched
+        self._carts: "OrderedDict[int, Cart]" = OrderedDict()
+        self._touched: Dict[int, float] = {}
+        self._dirty: Set[int] = set()
+        # Carts evicted from memory but not yet written out, with when they were last touched
+        self._evicted: Dict[int, Tuple[Cart, float]] = {}
+        # Users whose cart is only on disk -> when it was last touched
+        self._saved: Dict[int, float] = {}
+        # Layout id of the catalog whose layout the database already has
+        self._saved_layout: Optional[str] = None
+        self._flush_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self.expired_count = 0
+        self.evicted_count = 0
+
+    def __len__(self) -> int:
+        return len(self._carts)
+
+    def stats(self) -> dict:
+        return {
+            "carts": len(self._carts),
+            "dirty": len(self._dirty),
+            "on_disk": len(self._saved),
+            "expired": self.expired_count,
+            "evicted": self.evicted_count,
+        }
+
+    def rebind(self, catalog: Catalog):
+        """Switch to a newly loaded catalog, re-indexing every cart held in memory"""
+        previous, self.catalog = self.catalog, catalog
+        if previous is None or previous.layout_id == catalog.layout_id:
+            for cart in itertools.chain(self._carts.values(), (cart for cart, _ in self._evicted.values())):
+                cart.catalog = catalog
+            return
+
+        for user_id, cart in list(self._carts.items()):
+            self._carts[user_id] = cart.rebind(catalog)
+            self._dirty.add(user_id)
+        for user_id, (cart, touched) in list(self._evicted.items()):
+            self._evicted[user_id] = (cart.rebind(catalog), touched)
+
+    def _decode(self, items: bytes, layout_id: str, layouts: Dict[str, str]) -> Optional[Cart]:
+        """A saved cart re-indexed against the current catalog; None if its layout is unknown"""
+        if layout_id == self.catalog.layout_id:
+            return Cart.from_bytes(self.catalog, items)
+        layout = layouts.get(layout_id)
+        return Cart.from_layout(self.catalog, layout, items) if layout else None
+
+    async def load(self):
+        """Restore persisted carts that have not yet expired"""
+        rows = await self.db.load_saved_carts()
+        layouts = await self.db.load_cart_layouts()
+        now = self._clock()
+        fresh = []
+        expired = 0
+        for row in rows:
+            age = row[3]
+            if age is not None and age >= self.ttl:
+                self._dirty.add(row[0])
+                expired += 1
+            else:
+                fresh.append(row)
+
+        # Rows come oldest first; only the most recent fit in memory, the rest wait on disk for their owner
+        spill = max(0, len(fresh) - self.max_entries)
+        for user_id, _, _, age in fresh[:spill]:
+            self._saved[user_id] = now - (age or 0)
+
+        discarded = 0
+        for user_id, items, layout_id, age in fresh[spill:]:
+            cart = self._decode(items, layout_id, layouts)
+            if cart is None:
+                self._dirty.add(user_id)
+                discarded += 1
+                continue
+            self._put(user_id, cart, now - (age or 0))
+            if layout_id != self.catalog.layout_id:
+                # Re-save under the current layout
+                self._dirty.add(user_id)
+
+        if discarded:
+            logger.warning(f"Discarded {discarded} saved cart(s) packed against an unknown catalog layout")
+        logger.info(f"Restored {len(self._carts)} saved cart(s); {len(self._saved)} left on disk, {expired} expired")
+
+    def _put(self, user_id: int, cart: Cart, touched: float):
+        self._evicted.pop(user_id, None)
+        self._saved.pop(user_id, None)
+        self._carts[user_id] = cart
+        self._carts.move_to_end(user_id)
+        self._touched[user_id] = touched
+        while len(self._carts) > self.max_entries:
+            victim, victim_cart = self._carts.popitem(last=False)
+            # Out of memory only: the next flush saves it rather than deleting its row
+            self._evicted[victim] = (victim_cart, self._touched.pop(victim))
+            self._dirty.add(victim)
+            self.evicted_count += 1
+
+    def _drop(self, user_id: int):
+        self._carts.pop(user_id, None)
+        self._touched.pop(user_id, None)
+        self._evicted.pop(user_id, None)
+        self._saved.pop(user_id, None)
+        self._dirty.add(user_id)
+
+    def _live(self, user_id: int) -> Optional[Cart]:
+        """Look up a cart, expiring it if stale and refreshing it otherwise"""
+        cart = self._carts.get(user_id)
+        if cart is None:
+            entry = self._evicted.get(user_id)
+            if entry is None:
+                return None
+            # Evicted but not written out yet; it is still dirty, so the next flush saves it
+            cart, touched = entry
+            self._put(user_id, cart, touched)
+
+        now = self._clock()
+        if now - self._touched[user_id] >= self.ttl:
+            self._drop(user_id)
+            self.expired_count += 1
+            return None
+
+        self._touched[user_id] = now
+        self._carts.move_to_end(user_id)
+        return cart
+
+    async def _restore(self, user_id: int):
+        """Read a cart evicted to disk back into memory"""
+        touched = self._saved[user_id]
+        if self._clock() - touched >= self.ttl:
+            self._drop(user_id)
+            self.expired_count += 1
+            return
+
+        row = await self.db.load_saved_cart(user_id)
+        # A concurrent call may have restored or cleared it meanwhile
+        if self._saved.get(user_id) != touched:
+            return
+        cart = self._decode(row[0], row[1], {row[1]: row[2]} if row[2] else {}) if row else None
+        if cart is None:
+            self._drop(user_id)
+            return
+        self._put(user_id, cart, touched)
+        if row[1] != self.catalog.layout_id:
+            self._dirty.add(user_id)
+
+    async def get(self, user_id: int) -> Cart:
+        """Return the user's cart for reading; an empty cart if they have none"""
+        if user_id in self._saved:
+            await self._restore(user_id)
+        return self._live(user_id) or Cart(self.catalog)
+
+    async def add(self, user_id: int, category: str, item_ids: Iterable[str]) -> int:
+        """Add items to a cart category, returning how many were new"""
+        if user_id in self._saved:
+            await self._restore(user_id)
+        cart = self._live(user_id)
+        if cart is None:
+            cart = Cart(self.catalog)
+            self._put(user_id, cart, self._clock())
+
+        added = cart.add(category, item_ids)
+        if added:
+            self._dirty.add(user_id)
+        return added
+
+    def clear(self, user_id: int):
+        """Empty the user's cart"""
+        if user_id in self._carts or user_id in self._evicted or user_id in self._saved:
+            self._drop(user_id)
+
+    def sweep(self) -> int:
+        """Expire every cart past its TTL, returning how many were dropped"""
+        cutoff = self._clock() - self.ttl
+        expired = 0
+        # Oldest first, so stop at the first cart that is still fresh
+        while self._carts:
+            user_id = next(iter(self._carts))
+            if self._touched[user_id] > cutoff:
+                break
+            self._drop(user_id)
+            expired += 1
+
+        # Carts out of memory expire too; their rows are deleted on the next flush
+        stale = [user_id for user_id, (_, touched) in self._evicted.items() if touched <= cutoff]
+        stale += [user_id for user_id, touched in self._saved.items() if touched <= cutoff]
+        for user_id in stale:
+            self._drop(user_id)
+        expired += len(stale)
+
+        self.expired_count += expired
+        return expired
+
+    async def flush(self):
+        """Write every dirty cart to the database in a single batch"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            now = self._clock()
+            upserts = []
+            deletes = []
+            evicted = {}
+            for user_id in dirty:
+                cart = self._carts.get(user_id)
+                touched = self._touched.get(user_id)
+                if cart is None and user_id in self._evicted:
+                    entry = evicted[user_id] = self._evicted[user_id]
+                    cart, touched = entry
+                if not cart or now - touched >= self.ttl:
+                    deletes.append(user_id)
+                else:
+                    # Serialize here so later edits can't race the executor write;
+                    # the age keeps the row's updated_at at the cart's last touch
+                    upserts.append((user_id, cart.to_bytes(), self.catalog.layout_id, now - touched))
+
+            layout = None
+            if upserts and self._saved_layout != self.catalog.layout_id:
+                layout = (self.catalog.layout_id, self.catalog.layout)
+            if not await self.db.save_carts(upserts, deletes, layout):
+                # Keep them dirty so the next flush retries
+                self._dirty |= dirty
+                return
+            if layout:
+                self._saved_layout = layout[0]
+
+            deleted = set(deletes)
+            for user_id, entry in evicted.items():
+                if self._evicted.get(user_id) is entry:
+                    del self._evicted[user_id]
+                    if user_id not in deleted:
+                        self._saved[user_id] = entry[1]
+
+    def start(self):
+        """Start the background flush and sweep loops"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._flush_loop()),
+                asyncio.create_task(self._sweep_loop()),
+            ]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing carts: {e}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            expired = self.sweep()
+            if expired:
+                logger.info(f"Expired {expired} idle cart(s); {len(self._carts)} active")
+
+    async def close(self):
+        """Stop the background loops and write out anything still pending"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self.flush()
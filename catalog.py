@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Product categories that make up the shop catalog, in display order
+CATEGORIES = ("weapons", "money", "watches", "packages")
+
+# Discord caps a select menu at 25 options
+PAGE_SIZE = 25
+
+# Bits per precomputed price table; each table has 2**CHUNK_BITS entries
+CHUNK_BITS = 8
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class Catalog:
+    """Immutable index over the shop's item catalogs.
+
+    Every category keeps its items in a fixed order so an item can be
+    addressed by its bit position, which is what Cart stores. Prices and
+    display strings are precomputed per position, and totals come from
+    per-byte subset-sum tables, so pricing a cart costs one lookup per
+    8 catalog items regardless of how many are selected.
+    """
+
+    def __init__(self, categories: Mapping[str, Mapping[str, dict]], version: int = 0):
+        self.version = version
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.items: Dict[str, Dict[str, dict]] = {name: dict(items) for name, items in categories.items()}
+        self.ids: Dict[str, Tuple[str, ...]] = {name: tuple(items) for name, items in self.items.items()}
+        self.index: Dict[str, Dict[str, int]] = {
+            name: {item_id: bit for bit, item_id in enumerate(ids)} for name, ids in self.ids.items()
+        }
+        self.prices: Dict[str, Tuple[float, ...]] = {
+            name: tuple(self.items[name][item_id]["price"] for item_id in ids) for name, ids in self.ids.items()
+        }
+        self.names: Dict[str, Tuple[str, ...]] = {
+            name: tuple(self.items[name][item_id]["name"] for item_id in ids) for name, ids in self.ids.items()
+        }
+        self.labels: Dict[str, Tuple[str, ...]] = {
+            name: tuple(f"{item_name} - ${price}" for item_name, price in zip(self.names[name], self.prices[name]))
+            for name in self.categories
+        }
+        self._price_tables: Dict[str, List[List[float]]] = {
+            name: self._build_price_tables(self.prices[name]) for name in self.categories
+        }
+
+        # Item groups per category (from the "group" attribute) and every filter's
+        # item positions pre-sliced into select-menu sized pages
+        self.groups: Dict[str, Tuple[str, ...]] = {}
+        self._pages: Dict[Tuple[str, Optional[str]], Tuple[Tuple[int, ...], ...]] = {}
+        for name in self.categories:
+            members: Dict[Optional[str], List[int]] = {None: list(range(len(self.ids[name])))}
+            for bit, item_id in enumerate(self.ids[name]):
+                group = self.items[name][item_id].get("group")
+                if group:
+                    members.setdefault(group, []).append(bit)
+            self.groups[name] = tuple(group for group in members if group is not None)
+            for group, bits in members.items():
+                self._pages[(name, group)] = tuple(
+                    tuple(bits[start:start + PAGE_SIZE]) for start in range(0, len(bits), PAGE_SIZE)
+                ) or ((),)
+
+        # Bit offset of each category when a cart is packed into a single integer
+        self.offsets: Dict[str, int] = {}
+        offset = 0
+        for name in self.categories:
+            self.offsets[name] = offset
+            offset += len(self.ids[name])
+        self.width = offset
+
+        # The bit layout and its id; packed carts record the id, and the layout
+        # itself is saved alongside so carts from an older catalog can be re-indexed
+        self.layout = json.dumps([[name, list(self.ids[name])] for name in self.categories], separators=(",", ":"))
+        self.layout_id = hashlib.sha1(self.layout.encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple], version: int = 0) -> "Catalog":
+        """Build a catalog from products rows as returned by ShopDatabase.get_catalog_rows"""
+        categories: Dict[str, Dict[str, dict]] = {category: {} for category in CATEGORIES}
+        for category, item_key, name, price, description, attributes in rows:
+            # Prices are stored as REAL; keep whole-dollar prices printing as "$3", not "$3.0"
+            price = int(price) if float(price).is_integer() else price
+            info = {"name": name, "price": price}
+            if description:
+                info["description"] = description
+            info.update(json.loads(attributes or "{}"))
+            categories[category][item_key] = info
+        return cls(categories, version=version)
+
+    @staticmethod
+    def _build_price_tables(prices: Tuple[float, ...]) -> List[List[float]]:
+        """For each CHUNK_BITS-wide slice of a mask, the price of every possible subset"""
+        tables = []
+        for start in range(0, len(prices), CHUNK_BITS):
+            chunk = prices[start:start + CHUNK_BITS]
+            table = [0] * (1 << CHUNK_BITS)
+            for subset in range(1, 1 << len(chunk)):
+                low = subset & -subset
+                table[subset] = table[subset ^ low] + chunk[low.bit_length() - 1]
+            tables.append(table)
+        return tables
+
+    def get(self, category: str, item_id: str) -> dict:
+        return self.items[category][item_id]
+
+    def mask(self, category: str, item_ids: Iterable[str]) -> int:
+        """Bitmask for item ids in a category; unknown ids are ignored"""
+        index = self.index[category]
+        mask = 0
+        for item_id in item_ids:
+            bit = index.get(item_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def pages(self, category: str, group: Optional[str] = None) -> Tuple[Tuple[int, ...], ...]:
+        """Item positions in a category, optionally filtered to one group, split into pages"""
+        return self._pages.get((category, group)) or self._pages[(category, None)]
+
+    def names_in(self, category: str, mask: int) -> List[str]:
+        names = self.names[category]
+        return [names[bit] for bit in iter_bits(mask)]
+
+    def labels_in(self, category: str, mask: int) -> List[str]:
+        """'Name - $price' strings for the items in mask"""
+        labels = self.labels[category]
+        return [labels[bit] for bit in iter_bits(mask)]
+
+    def subtotal(self, category: str, mask: int) -> float:
+        total = 0
+        for table in self._price_tables[category]:
+            if not mask:
+                break
+            total += table[mask & CHUNK_MASK]
+            mask >>= CHUNK_BITS
+        return total
+
+    def total(self, cart) -> float:
+        """Price of everything in a Cart"""
+        return sum(self.subtotal(category, cart.mask(category)) for category in self.categories)
+
+class CatalogCache:
+    """Holds the live Catalog loaded from the products table.
+
+    reload() builds a fresh Catalog with the next version number and swaps
+    it in atomically; views remember the version they were built from so
+    they can tell when they have gone stale.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.current: Optional[Catalog] = None
+        self.version = 0
+        self._listeners: List[Callable[[Catalog], None]] = []
+
+    def add_listener(self, callback: Callable[[Catalog], None]):
+        """Call callback with every newly loaded catalog"""
+        self._listeners.append(callback)
+
+    async def reload(self) -> Catalog:
+        rows = await self.db.get_catalog_rows(CATEGORIES)
+        catalog = Catalog.from_rows(rows, version=self.version + 1)
+        self.current = catalog
+        self.version = catalog.version
+        for callback in self._listeners:
+            callback(catalog)
+
+        counts = ", ".join(f"{len(catalog.ids[category])} {category}" for category in CATEGORIES)
+        logger.info(f"Loaded catalog v{catalog.version}: {counts}")
+        return catalog
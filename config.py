@@ -16,6 +16,7 @@ class BotConfig:
     SHOP_CHANNEL_ID: Optional[int] = int(os.getenv('SHOP_CHANNEL_ID', 0)) or None
     TICKET_CHANNEL_ID: Optional[int] = int(os.getenv('TICKET_CHANNEL_ID', 0)) or None
     CUSTOMER_ROLE_ID: Optional[int] = int(os.getenv('CUSTOMER_ROLE_ID', 0)) or None
+    DEV_GUILD_ID: Optional[int] = int(os.getenv('DEV_GUILD_ID', 0)) or None  # Sync slash commands to this guild only
     
     # Database settings
     DATABASE_PATH = 'shop.db'
@@ -33,6 +34,25 @@ class BotConfig:
     # Shop settings
     ITEMS_PER_PAGE = 1  # Products shown per page in shop browser
     CART_TIMEOUT = 3600  # Cart session timeout in seconds
+    CART_FLUSH_INTERVAL = 5  # Seconds between write-behind cart flushes
+    CART_SWEEP_INTERVAL = 60  # Seconds between expired-cart sweeps
+    CART_MAX_ENTRIES = 10000  # Hard cap on in-memory carts (least recently used evicted first)
+    SELECT_OPTION_CACHE_SIZE = 1024  # Prebuilt dropdown option lists kept (least recently used evicted first)
+    INTERACTION_DEFER_BUDGET = 1.5  # Seconds a slow handler may run before its interaction is deferred for it
+    TICKET_CATEGORY_LIMIT = 50  # Discord allows at most 50 channels in a category
+    TICKET_CATEGORY_HEADROOM = 5  # Create the next overflow category once every one is this close to full
+    TRANSCRIPT_DIR = 'transcripts'  # Closed ticket and tryout transcripts (gzip JSONL), one folder per guild
+    TICKET_IDLE_HOURS = 48  # Tickets and tryouts with no messages for this long are closed automatically
+    TICKET_REAP_INTERVAL = 1800  # Seconds between stale ticket sweeps
+    TICKET_REAP_BATCH_SIZE = 5  # Stale channels closed at once
+    TICKET_REAP_BATCH_PAUSE = 5.0  # Seconds between batches of closes
+    CHANNEL_DELETE_DELAY = 5  # Seconds between a close button press and the channel being deleted
+    CHANNEL_DELETE_RETRY_DELAY = 30  # Seconds before a failed channel deletion is first retried (doubles each attempt)
+    CHANNEL_DELETE_MAX_ATTEMPTS = 5
+    OUTBOUND_QUEUE_SIZE = 1000  # Queued outbound API calls before low-priority work is shed
+    OUTBOUND_CONCURRENCY = 8  # Outbound API calls in flight at once
+    JOIN_BATCH_WINDOW = 1.0  # Seconds to collect member joins into one batch
+    JOIN_ROLE_CONCURRENCY = 4  # Join role assignments in flight at once
     
     @classmethod
     def load_from_env(cls):
@@ -42,6 +62,7 @@ class BotConfig:
         cls.SHOP_CHANNEL_ID = cls._get_int_env('SHOP_CHANNEL_ID')
         cls.TICKET_CHANNEL_ID = cls._get_int_env('TICKET_CHANNEL_ID')
         cls.CUSTOMER_ROLE_ID = cls._get_int_env('CUSTOMER_ROLE_ID')
+        cls.DEV_GUILD_ID = cls._get_int_env('DEV_GUILD_ID')
     
     @staticmethod
     def _get_int_env(key: str) -> Optional[int]:
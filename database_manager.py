@@ -1,65 +1,372 @@
 
+import asyncio
+import functools
+import json
+import queue
 import sqlite3
 import logging
-from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Per-connection tuning. WAL lets readers proceed while a write is in flight,
+# and NORMAL sync is durable under WAL except on power loss.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -8000),      # ~8 MB page cache
+    ("mmap_size", 67108864),    # 64 MB memory-mapped reads
+)
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply the standard pragmas to a freshly opened connection"""
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _migration_base_tables(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            stock INTEGER DEFAULT 0,
+            image_url TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cart (
+            user_id INTEGER,
+            product_id INTEGER,
+            quantity INTEGER DEFAULT 1,
+            PRIMARY KEY (user_id, product_id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            status TEXT DEFAULT 'pending'
+        )
+    ''')
+
+def _migration_order_timestamps(conn: sqlite3.Connection):
+    # ALTER TABLE cannot add a column with a non-constant default, so backfill
+    # existing rows here and let triggers stamp new ones
+    columns = _table_columns(conn, "orders")
+    for column in ("created_at", "updated_at"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE orders ADD COLUMN {column} TIMESTAMP")
+            conn.execute(f"UPDATE orders SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL")
+
+    # Fill in missing timestamps on insert, and keep updated_at current on every
+    # update that didn't set it. The trigger's own UPDATE changes updated_at, so
+    # it never matches its WHEN again.
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_timestamps_insert
+        AFTER INSERT ON orders
+        WHEN NEW.created_at IS NULL OR NEW.updated_at IS NULL
+        BEGIN
+            UPDATE orders SET created_at = COALESCE(NEW.created_at, CURRENT_TIMESTAMP),
+                              updated_at = COALESCE(NEW.updated_at, CURRENT_TIMESTAMP)
+            WHERE rowid = NEW.rowid;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_timestamps_update
+        AFTER UPDATE ON orders
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE orders SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+        END
+    ''')
+
+def _migration_order_user_index(conn: sqlite3.Connection):
+    # cart(user_id) is already served by the leading column of its primary key
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders (user_id)")
+
+def _migration_saved_carts(conn: sqlite3.Connection):
+    # Each cart is one packed bitmask over the catalog layout it was saved
+    # against; the layouts themselves are kept so carts can be re-indexed
+    # after the catalog changes
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS saved_carts (
+            user_id INTEGER PRIMARY KEY,
+            items BLOB NOT NULL,
+            layout_id TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cart_layouts (
+            layout_id TEXT PRIMARY KEY,
+            layout TEXT NOT NULL
+        )
+    ''')
+
+# Shop catalog as it stood when it moved out of main.py into the products table
+_CATALOG_SEED = [
+    # (category, item_key, name, price, description, attributes)
+    ('weapons', 'GoldenButton', 'GoldenButton', 0, None, '{}'),
+    ('weapons', 'GreenSwitch', 'GreenSwitch', 0, None, '{}'),
+    ('weapons', 'BlueTips/Switch', 'BlueTips/Switch', 0, None, '{}'),
+    ('weapons', 'OrangeButton', 'OrangeButton', 0, None, '{}'),
+    ('weapons', 'YellowButtonSwitch', 'YellowButtonSwitch', 0, None, '{}'),
+    ('weapons', 'FullyARP', 'FullyARP', 0, None, '{}'),
+    ('weapons', 'FullyDraco', 'FullyDraco', 0, None, '{}'),
+    ('weapons', 'Fully-MicroAR', 'Fully-MicroAR', 0, None, '{}'),
+    ('weapons', 'Cyanbutton', 'Cyanbutton', 0, None, '{}'),
+    ('weapons', 'BinaryTrigger', 'BinaryTrigger', 0, None, '{}'),
+    ('weapons', '100RndTanG19', '100RndTanG19', 0, None, '{}'),
+    ('weapons', '300ARG', '300ARG', 0, None, '{}'),
+    ('weapons', 'VP9Scope', 'VP9Scope', 0, None, '{}'),
+    ('weapons', 'MasterPiece30', 'MasterPiece30', 0, None, '{}'),
+    ('weapons', 'GSwitch', 'GSwitch', 0, None, '{}'),
+    ('weapons', 'G17WittaButton', 'G17WittaButton', 0, None, '{}'),
+    ('weapons', 'G19Switch', 'G19Switch', 0, None, '{}'),
+    ('weapons', 'G20Switch', 'G20Switch', 0, None, '{}'),
+    ('weapons', 'G21Switch', 'G21Switch', 0, None, '{}'),
+    ('weapons', 'G22 Switch', 'G22 Switch', 0, None, '{}'),
+    ('weapons', 'G23 Switch', 'G23 Switch', 0, None, '{}'),
+    ('weapons', 'G40 Switch', 'G40 Switch', 0, None, '{}'),
+    ('weapons', 'G42 Switch', 'G42 Switch', 0, None, '{}'),
+    ('weapons', 'Fully-FN', 'Fully-FN', 0, None, '{}'),
+    ('weapons', 'BinaryARP', 'BinaryARP', 0, None, '{}'),
+    ('weapons', 'BinaryG17', 'BinaryG17', 0, None, '{}'),
+    ('weapons', 'BinaryDraco', 'BinaryDraco', 0, None, '{}'),
+    ('weapons', 'CustomAR9', 'CustomAR9', 0, None, '{}'),
+    ('money', 'max_money_990k', 'Max Money 990k', 1, None, '{"type": "regular"}'),
+    ('money', 'max_bank_990k', 'Max Bank 990k', 1, None, '{"type": "regular"}'),
+    ('money', 'max_money_1600k_gp', 'Max Money 1.6M (Gamepass)', 2, None, '{"type": "gamepass"}'),
+    ('money', 'max_bank_1600k_gp', 'Max Bank 1.6M (Gamepass)', 2, None, '{"type": "gamepass"}'),
+    ('watches', 'Cartier', 'Cartier', 1, None, '{}'),
+    ('watches', 'BlueFaceCartier', 'Blue Face Cartier', 1, None, '{}'),
+    ('watches', 'WhiteRichardMillie', 'White Richard Millie', 1, None, '{}'),
+    ('watches', 'PinkRichard', 'Pink Richard', 1, None, '{}'),
+    ('watches', 'GreenRichard', 'Green Richard', 1, None, '{}'),
+    ('watches', 'RedRichard', 'Red Richard', 1, None, '{}'),
+    ('watches', 'BlueRichard', 'Blue Richard', 1, None, '{}'),
+    ('watches', 'BlackOutMillie', 'BlackOut Millie', 1, None, '{}'),
+    ('watches', 'Red AP', 'Red AP', 1, None, '{}'),
+    ('watches', 'AP Watch', 'AP Watch', 1, None, '{}'),
+    ('watches', 'Gold AP', 'Gold AP', 1, None, '{}'),
+    ('watches', 'Red AP Watch', 'Red AP Watch', 1, None, '{}'),
+    ('watches', 'CubanG AP', 'CubanG AP', 1, None, '{}'),
+    ('watches', 'CubanP AP', 'CubanP AP', 1, None, '{}'),
+    ('watches', 'CubanB AP', 'CubanB AP', 1, None, '{}'),
+    ('watches', 'Iced AP', 'Iced AP', 1, None, '{}'),
+    ('packages', 'safe_storage', 'SAFE STORAGE', 3, 'Store weapons in your safe', '{"storage_type": "safe"}'),
+    ('packages', 'bag_storage', 'BAG STORAGE', 2, 'Store weapons in your bag', '{"storage_type": "bag"}'),
+    ('packages', 'trunk_storage', 'TRUNK STORAGE', 1, 'Store weapons in your trunk', '{"storage_type": "trunk"}'),
+]
+
+def _migration_catalog_products(conn: sqlite3.Connection):
+    columns = _table_columns(conn, "products")
+    for column, definition in (
+        ("category", "TEXT DEFAULT 'general'"),
+        ("item_key", "TEXT"),
+        ("sort_order", "INTEGER DEFAULT 0"),
+        ("attributes", "TEXT DEFAULT '{}'"),
+        ("is_active", "INTEGER DEFAULT 1"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE products ADD COLUMN {column} {definition}")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_category_key ON products (category, item_key)")
+    conn.executemany('''
+        INSERT OR IGNORE INTO products (category, item_key, name, price, description, attributes, sort_order)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [row + (position,) for position, row in enumerate(_CATALOG_SEED)])
+
+# Filter groups for the paginated weapon picker
+_WEAPON_GROUPS = {
+    "Switches": ("GreenSwitch", "BlueTips/Switch", "YellowButtonSwitch", "GSwitch", "G19Switch", "G20Switch",
+                 "G21Switch", "G22 Switch", "G23 Switch", "G40 Switch", "G42 Switch"),
+    "Buttons": ("GoldenButton", "OrangeButton", "Cyanbutton", "G17WittaButton"),
+    "Fully": ("FullyARP", "FullyDraco", "Fully-MicroAR", "Fully-FN"),
+    "Binary": ("BinaryTrigger", "BinaryARP", "BinaryG17", "BinaryDraco"),
+    "Mods & Builds": ("100RndTanG19", "300ARG", "VP9Scope", "MasterPiece30", "CustomAR9"),
+}
+
+def _migration_weapon_groups(conn: sqlite3.Connection):
+    for group, item_keys in _WEAPON_GROUPS.items():
+        for item_key in item_keys:
+            row = conn.execute(
+                "SELECT id, attributes FROM products WHERE category = 'weapons' AND item_key = ?", (item_key,)
+            ).fetchone()
+            if row is None:
+                continue
+            attributes = json.loads(row[1] or "{}")
+            attributes.setdefault("group", group)
+            conn.execute("UPDATE products SET attributes = ? WHERE id = ?", (json.dumps(attributes), row[0]))
+
+def _migration_bot_state(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_tickets(conn: sqlite3.Connection):
+    # cart is a JSON snapshot of the item ids per category at checkout
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tickets (
+            channel_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            cart TEXT NOT NULL,
+            total REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status, created_at)")
+
+def _migration_ticket_transcripts(conn: sqlite3.Connection):
+    if "transcript_path" not in _table_columns(conn, "tickets"):
+        conn.execute("ALTER TABLE tickets ADD COLUMN transcript_path TEXT")
+
+def _migration_ticket_kinds(conn: sqlite3.Connection):
+    # Tryout channels are tracked alongside purchase tickets
+    if "kind" not in _table_columns(conn, "tickets"):
+        conn.execute("ALTER TABLE tickets ADD COLUMN kind TEXT NOT NULL DEFAULT 'purchase'")
+
+def _migration_channel_deletions(conn: sqlite3.Connection):
+    # due_at is a Unix timestamp in seconds
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS channel_deletions (
+            channel_id INTEGER PRIMARY KEY,
+            due_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            reason TEXT NOT NULL DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_channel_deletions_due_at ON channel_deletions (due_at)")
+
+# Ordered schema migrations: (version, description, step). Append only - never renumber.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base tables", _migration_base_tables),
+    (2, "order timestamps", _migration_order_timestamps),
+    (3, "orders user_id index", _migration_order_user_index),
+    (4, "saved carts", _migration_saved_carts),
+    (5, "catalog in products", _migration_catalog_products),
+    (6, "weapon groups", _migration_weapon_groups),
+    (7, "bot state", _migration_bot_state),
+    (8, "tickets", _migration_tickets),
+    (9, "ticket transcripts", _migration_ticket_transcripts),
+    (10, "ticket kinds", _migration_ticket_kinds),
+    (11, "channel deletions", _migration_channel_deletions),
+]
+
+def run_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Apply every pending migration in order, each in its own transaction"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            step(conn)
+            conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {version} ({description}) failed")
+            raise
+        applied.append(version)
+    return applied
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections shared by worker threads"""
+
+    def __init__(self, db_path: str, size: int = 2):
+        self.db_path = db_path
+        self.size = size
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._open())
+
+    def _open(self) -> sqlite3.Connection:
+        # Connections are handed between executor threads, never used by two at once
+        return configure_connection(sqlite3.connect(self.db_path, check_same_thread=False))
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection, committing on success and rolling back on error"""
+        conn = self._connections.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        """Close every pooled connection"""
+        while True:
+            try:
+                conn = self._connections.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
 class ShopDatabase:
-    def __init__(self, db_path: str = "shop.db"):
+    def __init__(self, db_path: str = "shop.db", pool: Optional[ConnectionPool] = None):
         self.db_path = db_path
+        self.pool = pool
         self.init_database()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield a connection from the pool, or a short-lived one when running unpooled"""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
+        conn = configure_connection(sqlite3.connect(self.db_path))
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
     
     def init_database(self):
-        """Initialize the database with required tables"""
+        """Bring the database schema up to date"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Products table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS products (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        description TEXT,
-                        price REAL NOT NULL,
-                        stock INTEGER DEFAULT 0,
-                        image_url TEXT
-                    )
-                ''')
-                
-                # Cart table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS cart (
-                        user_id INTEGER,
-                        product_id INTEGER,
-                        quantity INTEGER DEFAULT 1,
-                        PRIMARY KEY (user_id, product_id),
-                        FOREIGN KEY (product_id) REFERENCES products (id)
-                    )
-                ''')
-                
-                # Orders table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS orders (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        total_amount REAL NOT NULL,
-                        status TEXT DEFAULT 'pending'
-                    )
-                ''')
-                
-                conn.commit()
+            with self.connection() as conn:
+                applied = run_migrations(conn)
+                if applied:
+                    logger.info(f"Applied schema migrations: {', '.join(str(v) for v in applied)}")
                 logger.info("Database initialized successfully")
-                
+
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
-    
+
     def get_all_products(self) -> List[Tuple]:
         """Get all products from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM products")
                 return cursor.fetchall()
@@ -70,7 +377,7 @@ class ShopDatabase:
     def add_product(self, name: str, description: str, price: float, stock: int = 0, image_url: str = None) -> bool:
         """Add a new product to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO products (name, description, price, stock, image_url)
@@ -86,7 +393,7 @@ class ShopDatabase:
     def get_cart(self, user_id: int) -> List[Tuple]:
         """Get user's cart items"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT p.id, p.name, p.price, c.quantity, p.stock
@@ -102,7 +409,7 @@ class ShopDatabase:
     def add_to_cart(self, user_id: int, product_id: int, quantity: int = 1) -> bool:
         """Add item to user's cart"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO cart (user_id, product_id, quantity)
@@ -117,7 +424,7 @@ class ShopDatabase:
     def clear_cart(self, user_id: int) -> bool:
         """Clear user's cart"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM cart WHERE user_id = ?", (user_id,))
                 conn.commit()
@@ -125,3 +432,337 @@ class ShopDatabase:
         except Exception as e:
             logger.error(f"Error clearing cart: {e}")
             return False
+
+    def get_catalog_rows(self, categories: Tuple[str, ...]) -> List[Tuple]:
+        """Get active catalog products as (category, item_key, name, price, description, attributes) rows in display order"""
+        placeholders = ", ".join("?" for _ in categories)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT category, item_key, name, price, description, attributes
+                FROM products
+                WHERE is_active = 1 AND item_key IS NOT NULL AND category IN ({placeholders})
+                ORDER BY sort_order, id
+            ''', categories)
+            return cursor.fetchall()
+
+    def load_saved_carts(self) -> List[Tuple[int, bytes, str, int]]:
+        """Get persisted shop carts as (user_id, packed items, layout id, age in seconds), oldest first"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT user_id, items, layout_id, CAST(strftime('%s', 'now') AS INTEGER) - CAST(strftime('%s', updated_at) AS INTEGER)
+                    FROM saved_carts
+                    ORDER BY updated_at
+                ''')
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error loading saved carts: {e}")
+            return []
+
+    def load_saved_cart(self, user_id: int) -> Optional[Tuple[bytes, str, Optional[str]]]:
+        """Get one persisted cart as (packed items, layout id, layout JSON if known)"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT saved_carts.items, saved_carts.layout_id, cart_layouts.layout
+                    FROM saved_carts LEFT JOIN cart_layouts USING (layout_id)
+                    WHERE saved_carts.user_id = ?
+                ''', (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Error loading saved cart for {user_id}: {e}")
+            return None
+
+    def load_cart_layouts(self) -> Dict[str, str]:
+        """Get every stored catalog layout by layout id"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT layout_id, layout FROM cart_layouts")
+                return dict(cursor.fetchall())
+        except Exception as e:
+            logger.error(f"Error loading cart layouts: {e}")
+            return {}
+
+    def save_carts(self, upserts: List[Tuple[int, bytes, str, float]], deletes: List[int], layout: Optional[Tuple[str, str]] = None) -> bool:
+        """Write a batch of changed carts and drop emptied ones in a single transaction.
+        Upserts are (user_id, packed items, layout id, seconds since last touched); layout is (layout id, layout JSON)
+        for the catalog the carts were packed against, and replaces any layout no saved cart uses any more."""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO saved_carts (user_id, items, layout_id, updated_at)
+                    VALUES (?, ?, ?, datetime('now', '-' || CAST(? AS INTEGER) || ' seconds'))
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        items = excluded.items, layout_id = excluded.layout_id, updated_at = excluded.updated_at
+                ''', upserts)
+                cursor.executemany("DELETE FROM saved_carts WHERE user_id = ?", [(user_id,) for user_id in deletes])
+                if layout is not None:
+                    cursor.execute("INSERT OR IGNORE INTO cart_layouts (layout_id, layout) VALUES (?, ?)", layout)
+                    cursor.execute('''
+                        DELETE FROM cart_layouts
+                        WHERE layout_id != ? AND layout_id NOT IN (SELECT DISTINCT layout_id FROM saved_carts)
+                    ''', (layout[0],))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error saving carts: {e}")
+            return False
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Get a value from the bot_state key-value table"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT value FROM bot_state WHERE key = ?", (key,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Error reading bot state {key}: {e}")
+            return None
+
+    def set_state(self, key: str, value: str) -> bool:
+        """Set a value in the bot_state key-value table"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO bot_state (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                ''', (key, value))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error writing bot state {key}: {e}")
+            return False
+
+    def create_ticket(self, channel_id: int, user_id: int, cart: str, total: float, kind: str = "purchase") -> bool:
+        """Record a newly opened purchase ticket or tryout channel"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO tickets (channel_id, user_id, cart, total, kind, status, created_at, closed_at)
+                    VALUES (?, ?, ?, ?, ?, 'open', CURRENT_TIMESTAMP, NULL)
+                ''', (channel_id, user_id, cart, total, kind))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error recording ticket {channel_id}: {e}")
+            return False
+
+    def set_ticket_status(self, channel_id: int, status: str) -> bool:
+        """Update a ticket's status; 'closed' also stamps closed_at"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE tickets
+                    SET status = ?, closed_at = CASE WHEN ? = 'closed' THEN CURRENT_TIMESTAMP ELSE closed_at END
+                    WHERE channel_id = ?
+                ''', (status, status, channel_id))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error updating ticket {channel_id}: {e}")
+            return False
+
+    def set_ticket_transcript(self, channel_id: int, path: str) -> bool:
+        """Record where a ticket's transcript was archived"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE tickets SET transcript_path = ? WHERE channel_id = ?", (path, channel_id))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error recording transcript for ticket {channel_id}: {e}")
+            return False
+
+    def get_tickets(self, status: str, limit: int = 50) -> List[Tuple[int, int, str, float, str]]:
+        """Get tickets with a status as (channel_id, user_id, cart, total, created_at) rows, oldest first"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT channel_id, user_id, cart, total, created_at
+                    FROM tickets
+                    WHERE status = ?
+                    ORDER BY created_at
+                    LIMIT ?
+                ''', (status, limit))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error reading {status} tickets: {e}")
+            return []
+
+    def get_open_tickets(self) -> List[Tuple[int, int]]:
+        """Get every purchase ticket not yet closed as (channel_id, user_id) rows, oldest first"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT channel_id, user_id
+                    FROM tickets
+                    WHERE status IN ('open', 'completed') AND kind = 'purchase'
+                    ORDER BY created_at
+                ''')
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error reading open tickets: {e}")
+            return []
+
+    def get_unclosed_tickets(self) -> List[Tuple[int, str]]:
+        """Get every ticket or tryout not yet closed as (channel_id, kind) rows, oldest first"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT channel_id, kind
+                    FROM tickets
+                    WHERE status IN ('open', 'completed')
+                    ORDER BY created_at
+                ''')
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error reading unclosed tickets: {e}")
+            return []
+
+    def schedule_deletion(self, channel_id: int, due_at: float, reason: str = "") -> bool:
+        """Queue a channel deletion due at a Unix timestamp, replacing any earlier one for the channel"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO channel_deletions (channel_id, due_at, attempts, reason)
+                    VALUES (?, ?, 0, ?)
+                ''', (channel_id, due_at, reason))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error scheduling deletion of channel {channel_id}: {e}")
+            return False
+
+    def get_next_deletion(self) -> Optional[Tuple[int, float, int, str]]:
+        """Get the queued deletion due soonest as (channel_id, due_at, attempts, reason)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT channel_id, due_at, attempts, reason FROM channel_deletions ORDER BY due_at LIMIT 1")
+            return cursor.fetchone()
+
+    def reschedule_deletion(self, channel_id: int, due_at: float, attempts: int) -> bool:
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE channel_deletions SET due_at = ?, attempts = ? WHERE channel_id = ?", (due_at, attempts, channel_id))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error rescheduling deletion of channel {channel_id}: {e}")
+            return False
+
+    def remove_deletion(self, channel_id: int) -> bool:
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM channel_deletions WHERE channel_id = ?", (channel_id,))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error removing deletion of channel {channel_id}: {e}")
+            return False
+
+class AsyncShopDatabase:
+    """Awaitable front-end for ShopDatabase.
+
+    Queries run on a dedicated executor whose threads share a small pool of
+    long-lived connections, so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, db_path: str = "shop.db", pool_size: int = 2):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        self._db = ShopDatabase(db_path, pool=self.pool)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="shop-db")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking database call on the database executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def get_all_products(self) -> List[Tuple]:
+        return await self.run(self._db.get_all_products)
+
+    async def add_product(self, name: str, description: str, price: float, stock: int = 0, image_url: str = None) -> bool:
+        return await self.run(self._db.add_product, name, description, price, stock, image_url)
+
+    async def get_cart(self, user_id: int) -> List[Tuple]:
+        return await self.run(self._db.get_cart, user_id)
+
+    async def add_to_cart(self, user_id: int, product_id: int, quantity: int = 1) -> bool:
+        return await self.run(self._db.add_to_cart, user_id, product_id, quantity)
+
+    async def clear_cart(self, user_id: int) -> bool:
+        return await self.run(self._db.clear_cart, user_id)
+
+    async def get_catalog_rows(self, categories: Tuple[str, ...]) -> List[Tuple]:
+        return await self.run(self._db.get_catalog_rows, categories)
+
+    async def load_saved_carts(self) -> List[Tuple[int, bytes, str, int]]:
+        return await self.run(self._db.load_saved_carts)
+
+    async def load_saved_cart(self, user_id: int) -> Optional[Tuple[bytes, str, Optional[str]]]:
+        return await self.run(self._db.load_saved_cart, user_id)
+
+    async def load_cart_layouts(self) -> Dict[str, str]:
+        return await self.run(self._db.load_cart_layouts)
+
+    async def save_carts(self, upserts: List[Tuple[int, bytes, str, float]], deletes: List[int], layout: Optional[Tuple[str, str]] = None) -> bool:
+        return await self.run(self._db.save_carts, upserts, deletes, layout)
+
+    async def get_state(self, key: str) -> Optional[str]:
+        return await self.run(self._db.get_state, key)
+
+    async def set_state(self, key: str, value: str) -> bool:
+        return await self.run(self._db.set_state, key, value)
+
+    async def create_ticket(self, channel_id: int, user_id: int, cart: str, total: float, kind: str = "purchase") -> bool:
+        return await self.run(self._db.create_ticket, channel_id, user_id, cart, total, kind)
+
+    async def set_ticket_status(self, channel_id: int, status: str) -> bool:
+        return await self.run(self._db.set_ticket_status, channel_id, status)
+
+    async def set_ticket_transcript(self, channel_id: int, path: str) -> bool:
+        return await self.run(self._db.set_ticket_transcript, channel_id, path)
+
+    async def get_tickets(self, status: str, limit: int = 50) -> List[Tuple[int, int, str, float, str]]:
+        return await self.run(self._db.get_tickets, status, limit)
+
+    async def get_open_tickets(self) -> List[Tuple[int, int]]:
+        return await self.run(self._db.get_open_tickets)
+
+    async def get_unclosed_tickets(self) -> List[Tuple[int, str]]:
+        return await self.run(self._db.get_unclosed_tickets)
+
+    async def schedule_deletion(self, channel_id: int, due_at: float, reason: str = "") -> bool:
+        return await self.run(self._db.schedule_deletion, channel_id, due_at, reason)
+
+    async def get_next_deletion(self) -> Optional[Tuple[int, float, int, str]]:
+        return await self.run(self._db.get_next_deletion)
+
+    async def reschedule_deletion(self, channel_id: int, due_at: float, attempts: int) -> bool:
+        return await self.run(self._db.reschedule_deletion, channel_id, due_at, attempts)
+
+    async def remove_deletion(self, channel_id: int) -> bool:
+        return await self.run(self._db.remove_deletion, channel_id)
+
+    async def close(self):
+        """Wait for in-flight queries, then release the pooled connections"""
+        # Shutting down blocks until queued queries finish, so keep it off the event loop
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        self.pool.close()
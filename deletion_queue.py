@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class DeletionQueue:
+    """Durable queue of channel deletions, each due at a given time.
+
+    Scheduled deletions are stored in the channel_deletions table, so a
+    countdown interrupted by a restart is picked up again when the worker
+    starts. A single worker handles due deletions one at a time, waiting
+    out any rate limit Discord reports and retrying other failures with a
+    growing delay, up to max_attempts. The handler returns whether it
+    actually deleted the channel; deletions it skipped (the channel was
+    already gone or had to stay open) are counted separately.
+    """
+
+    def __init__(self, db, handler: Callable[[int], Awaitable[bool]], retry_delay: float = 30, max_attempts: int = 5):
+        self.db = db
+        self.handler = handler
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.deleted_count = 0
+        self.skipped_count = 0
+        self.failed_count = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return {
+            "deleted": self.deleted_count,
+            "skipped": self.skipped_count,
+            "failed": self.failed_count,
+        }
+
+    async def schedule(self, channel_id: int, delay: float = 0, reason: str = "") -> bool:
+        """Queue a channel for deletion in delay seconds, replacing any earlier schedule for it"""
+        scheduled = await self.db.schedule_deletion(channel_id, time.time() + delay, reason)
+        self._wake.set()
+        return scheduled
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _worker(self):
+        while True:
+            # Cleared before reading so a schedule() during the read still wakes us
+            self._wake.clear()
+            try:
+                job = await self.db.get_next_deletion()
+            except Exception as e:
+                logger.error(f"Error reading the deletion queue: {e}")
+                job = None
+
+            if job is None:
+                await self._wake.wait()
+                continue
+
+            channel_id, due_at, attempts, reason = job
+            wait = due_at - time.time()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(channel_id, attempts, reason)
+
+    async def _process(self, channel_id: int, attempts: int, reason: str):
+        try:
+            deleted = await self.handler(channel_id)
+        except Exception as e:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                self.failed_count += 1
+                logger.error(f"Giving up deleting channel {channel_id} ({reason}) after {attempts} attempts: {e}")
+                await self.db.remove_deletion(channel_id)
+                return
+
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                delay = getattr(e, "retry_after", None) or self.retry_delay
+            else:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+            logger.warning(f"Error deleting channel {channel_id} ({reason}), retrying in {delay:.0f}s: {e}")
+            await self.db.reschedule_deletion(channel_id, time.time() + delay, attempts)
+            return
+
+        if deleted:
+            self.deleted_count += 1
+        else:
+            self.skipped_count += 1
+        await self.db.remove_deletion(channel_id)
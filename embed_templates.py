@@ -0,0 +1,56 @@
+import datetime
+import logging
+from typing import Callable, Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class EmbedTemplates:
+    """Registry of embeds whose content is the same every time they are sent.
+
+    Each builder runs once, on first use, and its result is kept as a dict
+    payload. get() turns that payload into a new Embed and fills in the
+    per-send parts (timestamp, footer icon). invalidate() drops cached
+    payloads so the next get() rebuilds them from current data.
+
+    Copies share their field dicts with the template, so add fields to a
+    copy freely but don't edit its existing fields in place.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[], discord.Embed]] = {}
+        self._payloads: Dict[str, dict] = {}
+
+    def register(self, name: str):
+        """Decorator registering a zero-argument embed builder under name"""
+        def decorator(builder: Callable[[], discord.Embed]):
+            self._builders[name] = builder
+            self._payloads.pop(name, None)
+            return builder
+        return decorator
+
+    def get(self, name: str, timestamp: Optional[datetime.datetime] = None, footer_icon_url: Optional[str] = None) -> discord.Embed:
+        payload = self._payloads.get(name)
+        if payload is None:
+            payload = self._payloads[name] = self._builders[name]().to_dict()
+
+        data = dict(payload)
+        if "fields" in data:
+            data["fields"] = list(data["fields"])
+        embed = discord.Embed.from_dict(data)
+
+        if timestamp is not None:
+            embed.timestamp = timestamp
+        if footer_icon_url is not None:
+            embed.set_footer(text=embed.footer.text, icon_url=footer_icon_url)
+        return embed
+
+    def invalidate(self, *names: str):
+        """Forget the cached payloads for names, or for every template if none are given"""
+        if names:
+            for name in names:
+                self._payloads.pop(name, None)
+        else:
+            self._payloads.clear()
+        logger.info(f"Invalidated embed templates: {', '.join(names) or 'all'}")
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class JoinQueue:
+    """Processes member joins in batches instead of one event at a time.
+
+    Joins are collected for ``window`` seconds after the first one arrives,
+    so a raid or invite wave becomes a few batches. Each batch is handled
+    per guild: members who already left are skipped, the join role is
+    added with at most ``concurrency`` requests in flight, and the batch's
+    members are welcomed together. Time from join to role is sampled for
+    the p50/p99 in stats().
+    """
+
+    def __init__(self, add_role: Callable[[discord.Member], Awaitable[bool]],
+                 welcome: Callable[[discord.Guild, List[discord.Member]], Awaitable[None]],
+                 window: float = 1.0, concurrency: int = 4, max_batch: int = 100, samples: int = 1000):
+        self.add_role = add_role
+        self.welcome = welcome
+        self.window = window
+        self.concurrency = concurrency
+        self.max_batch = max_batch
+        # (guild id, member id) -> monotonic time the join arrived; insertion ordered
+        self._pending: Dict[Tuple[int, int], float] = {}
+        self._members: Dict[Tuple[int, int], discord.Member] = {}
+        self._latencies: Deque[float] = deque(maxlen=samples)
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.processed_count = 0
+        self.left_count = 0
+        self.failed_count = 0
+        self.batch_count = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        # A rejoin before the batch ran keeps its place and its original join time
+        self._pending.setdefault(key, time.monotonic())
+        self._members[key] = member
+        self._wake.set()
+        self.start()
+
+    def discard(self, member: discord.Member):
+        """Forget a pending join, e.g. because the member left before it was processed"""
+        key = (member.guild.id, member.id)
+        if self._pending.pop(key, None) is not None:
+            self._members.pop(key, None)
+            self.left_count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batch_count,
+            "processed": self.processed_count,
+            "left": self.left_count,
+            "failed": self.failed_count,
+            "p50": self.percentile(0.50),
+            "p99": self.percentile(0.99),
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _worker(self):
+        while True:
+            await self._wake.wait()
+            # Let the burst build up, then take everything that arrived
+            await asyncio.sleep(self.window)
+            self._wake.clear()
+            while self._pending:
+                batch = []
+                for key in list(self._pending)[:self.max_batch]:
+                    batch.append((self._members.pop(key), self._pending.pop(key)))
+                try:
+                    await self._process(batch)
+                except Exception as e:
+                    logger.error(f"Error processing {len(batch)} member join(s): {e}")
+
+    async def _process(self, batch: List[Tuple[discord.Member, float]]):
+        self.batch_count += 1
+        by_guild: Dict[int, List[Tuple[discord.Member, float]]] = {}
+        for member, joined in batch:
+            # Resolve from the cache: anyone no longer there has left (or was banned) since joining
+            current = member.guild.get_member(member.id)
+            if current is None:
+                self.left_count += 1
+                continue
+            by_guild.setdefault(member.guild.id, []).append((current, joined))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def assign(member: discord.Member, joined: float) -> bool:
+            async with semaphore:
+                try:
+                    added = await self.add_role(member)
+                except Exception as e:
+                    logger.error(f"Failed to assign join role to {member.display_name}: {e}")
+                    added = False
+            if added:
+                self._latencies.append(time.monotonic() - joined)
+            return added
+
+        for members in by_guild.values():
+            results = await asyncio.gather(*(assign(member, joined) for member, joined in members))
+            self.processed_count += len(members)
+            self.failed_count += results.count(False)
+            await self.welcome(members[0][0].guild, [member for member, _ in members])
+
+        stats = self.stats()
+        if stats["p50"] is not None:
+            logger.info(f"Processed {sum(len(members) for members in by_guild.values())} join(s) in batch {self.batch_count}; "
+                        f"join-to-role p50 {stats['p50'] * 1000:.0f}ms, p99 {stats['p99'] * 1000:.0f}ms")
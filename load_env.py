@@ -1,8 +1,15 @@
 
 import os
 
+_loaded = False
+
 def load_environment():
-    """Load environment variables from .env file if it exists"""
+    """Load environment variables from .env file if it exists; later calls do nothing"""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
     env_file = '.env'
     
     if os.path.exists(env_file):
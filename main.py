@@ -1,27 +1,120 @@
+import sys
+from startup_profile import StartupProfile
+
+# python main.py --profile-startup reports import and startup timings, then exits before connecting
+startup_profile = StartupProfile(enabled=__name__ == "__main__" and "--profile-startup" in sys.argv)
+startup_profile.track_imports()
+
 import discord
 from discord.ext import commands
 from discord import app_commands
+import abc
 import asyncio
+import functools
 import logging
 import datetime
+import hashlib
+import json
 import random
-import string
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-from config import BotConfig
-from database_manager import ShopDatabase
-from load_env import load_environment
-import aiohttp
-import urllib.parse
-# Load environment variables
-load_environment()
+import time
+from config import BotConfig  # Loads environment variables from .env
+from database_manager import AsyncShopDatabase
+from cart_store import CartStore
+from catalog import Catalog, CatalogCache
+from embed_templates import EmbedTemplates
+from auto_defer import AutoDefer
+from staff_roles import StaffRoleCache
+from ticket_categories import CategoryAllocator
+from ticket_index import TicketIndex
+from transcript_archiver import TranscriptArchiver
+from ticket_reaper import TicketReaper
+from deletion_queue import DeletionQueue
+from outbound import OutboundScheduler, Shed, INTERACTION, TICKET, WELCOME, BACKGROUND
+from join_queue import JoinQueue
+startup_profile.mark("imports")
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize database
-db = ShopDatabase()
+# Initialize database (queries run off the event loop on a pooled executor)
+db = AsyncShopDatabase(BotConfig.DATABASE_PATH)
+startup_profile.mark("database init")
+
+# Static embeds are built once and handed out as copies
+embed_templates = EmbedTemplates()
+
+# Slow button handlers are deferred automatically before Discord's 3-second deadline
+auto_defer = AutoDefer(BotConfig.INTERACTION_DEFER_BUDGET)
+
+# Staff roles get access to ticket categories and channels; resolved once per guild
+STAFF_ROLE_KEYWORDS = ('staff', 'mod', 'admin', 'owner', 'stk', 'management', 'manager')
+staff_roles = StaffRoleCache(BotConfig.ADMIN_ROLE_ID)
+staff_roles.define("category", STAFF_ROLE_KEYWORDS, discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True))
+staff_roles.define("tryout", STAFF_ROLE_KEYWORDS + ('support',), discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True))
+staff_roles.define("ticket", STAFF_ROLE_KEYWORDS + ('support',), discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True), include_admin=False)
+
+# Ticket channels spill over into numbered categories once one fills up
+ticket_categories = CategoryAllocator(
+    BotConfig.TICKET_CATEGORY_LIMIT,
+    BotConfig.TICKET_CATEGORY_HEADROOM,
+    create_category=lambda guild, name, overwrites: outbound.run(TICKET, f"channels:{guild.id}", guild.create_category, name, overwrites=overwrites)
+)
+
+# Outbound API calls go through one prioritised, rate-limited queue
+outbound = OutboundScheduler(BotConfig.OUTBOUND_QUEUE_SIZE, BotConfig.OUTBOUND_CONCURRENCY)
+
+# Ticket and tryout conversations are archived to disk before their channels are deleted
+transcripts = TranscriptArchiver(BotConfig.TRANSCRIPT_DIR)
+
+# Welcome embed sent for new members
+@embed_templates.register("welcome")
+def build_welcome_embed():
+    embed = discord.Embed(
+        title="💀 STK (SHOOT TO KILL) 💀",
+        description="**THE MOST FEARED GANG IN THE STREETS**",
+        color=0xFF0000
+    )
+
+    embed.add_field(
+        name="🏙️ WHO WE ARE",
+        value="STK (Shoot to Kill) is the most elite and respected gang operating in Tha Bronx 3. We provide premium undetected services, fast dupes, and maintain our reputation through elite operations and unmatched street credibility.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="👑 OUR LEADERSHIP",
+        value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n\n🪖 Professional hierarchy with proven results",
+        inline=True
+    )
+
+    embed.add_field(
+        name="🎯 WHAT WE PROVIDE",
+        value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
+        inline=True
+    )
+
+    embed.add_field(
+        name="📍 OUR TERRITORY",
+        value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
+        inline=False
+    )
+
+    embed.add_field(
+        name="💀 THE STK CODE",
+        value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
+        inline=True
+    )
+
+    embed.add_field(
+        name="🔥 JOIN THE ELITE",
+        value="We don't just run the streets, we own them. Welcome to STK territory - where elite quality meets undetected services and infinite supply.",
+        inline=True
+    )
+
+    embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif")
+    embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply")
+    return embed
 
 class ShopBot(commands.Bot):
     def __init__(self):
@@ -39,36 +132,78 @@ class ShopBot(commands.Bot):
         )
 
         self.db = db
-        self.user_carts = {}  # Store user carts in memory - each user gets their own isolated cart
+
+        # Shop catalog lives in the products table; staff can hot-reload it with /reloadcatalog
+        self.catalog_cache = CatalogCache(self.db)
+
+        # Each user gets their own isolated cart, expired after CART_TIMEOUT of inactivity
+        self.carts = CartStore(
+            self.db,
+            flush_interval=BotConfig.CART_FLUSH_INTERVAL,
+            ttl=BotConfig.CART_TIMEOUT,
+            max_entries=BotConfig.CART_MAX_ENTRIES,
+            sweep_interval=BotConfig.CART_SWEEP_INTERVAL
+        )
+        self.catalog_cache.add_listener(self.carts.rebind)
+        self.catalog_cache.add_listener(lambda catalog: cached_select_options.cache_clear())
+        self.catalog_cache.add_listener(lambda catalog: embed_templates.invalidate())
+
+        # Open purchase tickets by user, so a repeat checkout finds the existing channel
+        self.tickets = TicketIndex()
+
+        # Abandoned tickets and tryouts are archived and closed in the background
+        self.reaper = TicketReaper(
+            self.db,
+            self.get_channel,
+            lambda channel, kind: reap_ticket(channel, kind),  # defined further down
+            max_idle=BotConfig.TICKET_IDLE_HOURS * 3600,
+            interval=BotConfig.TICKET_REAP_INTERVAL,
+            batch_size=BotConfig.TICKET_REAP_BATCH_SIZE,
+            batch_pause=BotConfig.TICKET_REAP_BATCH_PAUSE
+        )
+
+        # Joins are coalesced into batches: roles with bounded concurrency, one welcome per batch
+        self.joins = JoinQueue(
+            self.add_join_role,
+            self.send_welcome_to_members,
+            window=BotConfig.JOIN_BATCH_WINDOW,
+            concurrency=BotConfig.JOIN_ROLE_CONCURRENCY
+        )
+
+        # Closed channels are deleted by one worker from a persisted queue that survives restarts
+        self.deletions = DeletionQueue(
+            self.db,
+            lambda channel_id: delete_closed_channel(channel_id),  # defined further down
+            retry_delay=BotConfig.CHANNEL_DELETE_RETRY_DELAY,
+            max_attempts=BotConfig.CHANNEL_DELETE_MAX_ATTEMPTS
+        )
+
+        # on_ready fires again after every gateway reconnect; startup work runs only once
+        self.startup_done = False
+
+    @property
+    def catalog(self) -> Catalog:
+        """The current shop catalog"""
+        return self.catalog_cache.current
 
     async def on_ready(self):
         logger.info(f'{self.user} has connected to Discord!')
         logger.info(f'Bot is in {len(self.guilds)} guilds')
 
+        if self.startup_done:
+            logger.info("Reconnected; startup work already done")
+            return
+        self.startup_done = True
+
         # Test database connection
         try:
-            test_products = self.db.get_all_products()
+            test_products = await self.db.get_all_products()
             logger.info(f'Database connected successfully. Found {len(test_products)} products.')
         except Exception as e:
             logger.error(f'Database connection issue: {e}')
 
-        # Sync slash commands with retry logic
-        try:
-            synced = await self.tree.sync()
-            logger.info(f'Synced {len(synced)} command(s)')
-        except discord.HTTPException as e:
-            if e.status == 429:  # Rate limited
-                logger.warning("Rate limited when syncing commands, retrying in 60 seconds...")
-                await asyncio.sleep(60)
-                try:
-                    synced = await self.tree.sync()
-                    logger.info(f'Synced {len(synced)} command(s) after retry')
-                except Exception as retry_error:
-                    logger.error(f'Failed to sync commands after retry: {retry_error}')
-            else:
-                logger.error(f'Failed to sync commands: {e}')
-        except Exception as e:
-            logger.error(f'Failed to sync commands: {e}')
+        # Sync slash commands, only when they changed since the last sync
+        await self.sync_commands()
 
         # Send STK Board message to specified channel
         await self.send_stk_board_message()
@@ -76,6 +211,49 @@ class ShopBot(commands.Bot):
         # Start cool status rotation
         self.status_task = asyncio.create_task(self.rotate_status())
 
+        # These need the guild cache, so they start once we're ready; queued deletions resume here
+        self.reaper.start()
+        self.deletions.start()
+
+    async def sync_commands(self):
+        """Sync the command tree if its hash differs from the last successful sync.
+
+        With DEV_GUILD_ID set, commands are copied to and synced with that guild
+        only, which applies instantly and keeps test commands off other servers.
+        """
+        guild = discord.Object(id=BotConfig.DEV_GUILD_ID) if BotConfig.DEV_GUILD_ID else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+
+        commands_payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda payload: (payload.get("type", 1), payload["name"])
+        )
+        tree_hash = hashlib.sha256(json.dumps(commands_payload, sort_keys=True).encode()).hexdigest()
+        state_key = f"command_tree:{self.application_id}:{guild.id if guild else 'global'}"
+
+        if await self.db.get_state(state_key) == tree_hash:
+            logger.info("Slash commands unchanged since last sync; skipping")
+            return
+
+        # Retry once if rate limited
+        for attempt in range(2):
+            try:
+                synced = await self.tree.sync(guild=guild)
+                await self.db.set_state(state_key, tree_hash)
+                logger.info(f'Synced {len(synced)} command(s)' + (f' to guild {guild.id}' if guild else ''))
+                return
+            except discord.HTTPException as e:
+                if e.status == 429 and attempt == 0:
+                    logger.warning("Rate limited when syncing commands, retrying in 60 seconds...")
+                    await asyncio.sleep(60)
+                else:
+                    logger.error(f'Failed to sync commands: {e}')
+                    return
+            except Exception as e:
+                logger.error(f'Failed to sync commands: {e}')
+                return
+
     async def rotate_status(self):
         """Rotate through cool status messages"""
         statuses = [
@@ -97,7 +275,8 @@ class ShopBot(commands.Bot):
                     if self.is_closed():
                         break
 
-                    await self.change_presence(
+                    await outbound.run(
+                        BACKGROUND, "presence", self.change_presence,
                         activity=status_info["activity"],
                         status=status_info["status"]
                     )
@@ -113,11 +292,36 @@ class ShopBot(commands.Bot):
         """This is called when the bot is starting up"""
         logger.info("Bot is starting up...")
 
+        # Load the catalog before restoring carts, which are indexed against it
+        with startup_profile.phase("setup_hook: catalog"):
+            await self.catalog_cache.reload()
+
+        # Restore saved carts, then flush changes and sweep expired carts in the background
+        with startup_profile.phase("setup_hook: saved carts"):
+            await self.carts.load()
+            self.carts.start()
+
+        with startup_profile.phase("setup_hook: open tickets"):
+            self.tickets.load(await self.db.get_open_tickets())
+
+        # Persistent views: one stateless instance each answers buttons on every old message
+        with startup_profile.phase("setup_hook: persistent views"):
+            for view in (PersistentSTKShopView(), STKBoardView(), STKJoinView(), ShopEntryView(),
+                         STKTryoutManagementView(), TicketManagementView(), PaymentView()):
+                self.add_view(view)
+            self.add_dynamic_items(StaffActionButton)
+
     async def close(self):
         """Clean up when bot shuts down"""
         if hasattr(self, 'status_task'):
             self.status_task.cancel()
+        self.reaper.stop()
+        self.deletions.stop()
+        outbound.stop()
+        self.joins.stop()
         await super().close()
+        await self.carts.close()
+        await self.db.close()
 
     async def on_command_error(self, ctx, error):
         """Handle command errors to prevent crashes"""
@@ -127,28 +331,52 @@ class ShopBot(commands.Bot):
         """Handle general bot errors"""
         logger.error(f"Bot error in {event}: {args}")
 
-    async def on_member_join(self, member):
-        """Handle new member join"""
-        try:
-            # Assign role to new member
-            role_id = 1406402417863430204
-            try:
-                role = member.guild.get_role(role_id)
-                if role:
-                    await member.add_roles(role)
-                    logger.info(f"Assigned role {role.name} to {member.display_name}")
-                else:
-                    logger.error(f"Role with ID {role_id} not found in guild {member.guild.name}")
-            except Exception as e:
-                logger.error(f"Failed to assign role to {member.display_name}: {e}")
+    # Staff role names decide ticket access, so re-resolve them when roles change
+    async def on_guild_role_create(self, role):
+        staff_roles.invalidate(role.guild.id)
 
-            # Send welcome message
-            await self.send_welcome_to_member(member)
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            staff_roles.invalidate(after.guild.id)
 
-            logger.info(f"New member joined: {member.display_name} ({member.id})")
+    async def on_guild_role_delete(self, role):
+        staff_roles.invalidate(role.guild.id)
 
-        except Exception as e:
-            logger.error(f"Error in member join event: {e}")
+    async def on_guild_remove(self, guild):
+        staff_roles.invalidate(guild.id)
+        ticket_categories.forget_guild(guild.id)
+
+    # Keep the ticket category channel counts in step with the guild
+    async def on_guild_channel_create(self, channel):
+        ticket_categories.channel_created(channel)
+
+    async def on_guild_channel_delete(self, channel):
+        ticket_categories.channel_deleted(channel)
+
+        # Ticket channels deleted by hand never went through close_ticket
+        if self.tickets.forget_channel(channel.id) is not None:
+            await self.db.set_ticket_status(channel.id, "closed")
+
+    async def on_guild_channel_update(self, before, after):
+        ticket_categories.channel_updated(before, after)
+
+    async def on_member_join(self, member):
+        """Handle new member join; the role and welcome are handled in batches by the join queue"""
+        self.joins.add(member)
+        logger.info(f"New member joined: {member.display_name} ({member.id})")
+
+    async def add_join_role(self, member) -> bool:
+        """Give a new member the join role"""
+        role = member.guild.get_role(JOIN_ROLE_ID)
+        if not role:
+            logger.error(f"Role with ID {JOIN_ROLE_ID} not found in guild {member.guild.name}")
+            return False
+        if role in member.roles:
+            return True
+
+        await outbound.run(WELCOME, f"roles:{member.guild.id}", member.add_roles, role)
+        logger.info(f"Assigned role {role.name} to {member.display_name}")
+        return True
 
     async def on_member_ban(self, guild, user):
         """Handle member ban with STK-style message"""
@@ -203,6 +431,7 @@ class ShopBot(commands.Bot):
 
     async def on_member_remove(self, member):
         """Aggressive member leave message - STK style"""
+        self.joins.discard(member)
         try:
             # Random aggressive messages for different scenarios
             leave_messages = [
@@ -261,74 +490,42 @@ class ShopBot(commands.Bot):
         except Exception as e:
             logger.error(f"Error in member remove event: {e}")
 
-    async def send_welcome_to_member(self, member):
-        """Send welcome message when a member joins"""
+    async def send_welcome_to_members(self, guild, members):
+        """Welcome a batch of new members, mentioning as many per message as fit"""
         try:
-            embed = discord.Embed(
-                title="💀 STK (SHOOT TO KILL) 💀",
-                description="**THE MOST FEARED GANG IN THE STREETS**",
-                color=0xFF0000,
-                timestamp=datetime.datetime.now(datetime.timezone.utc)
-            )
-
-            embed.add_field(
-                name="🏙️ WHO WE ARE",
-                value="STK (Shoot to Kill) is the most elite and respected gang operating in Tha Bronx 3. We provide premium undetected services, fast dupes, and maintain our reputation through elite operations and unmatched street credibility.",
-                inline=False
-            )
-
-            embed.add_field(
-                name="👑 OUR LEADERSHIP",
-                value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n\n🪖 Professional hierarchy with proven results",
-                inline=True
-            )
-
-            embed.add_field(
-                name="🎯 WHAT WE PROVIDE",
-                value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
-                inline=True
-            )
-
-            embed.add_field(
-                name="📍 OUR TERRITORY",
-                value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
-                inline=False
-            )
-
-            embed.add_field(
-                name="💀 THE STK CODE",
-                value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
-                inline=True
-            )
-
-            embed.add_field(
-                name="🔥 JOIN THE ELITE",
-                value="We don't just run the streets, we own them. Welcome to STK territory - where elite quality meets undetected services and infinite supply.",
-                inline=True
+            embed = embed_templates.get(
+                "welcome",
+                timestamp=datetime.datetime.now(datetime.timezone.utc),
+                footer_icon_url=guild.me.display_avatar.url
             )
 
-            embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif")
-            embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply", icon_url=member.guild.me.display_avatar.url)
-
             # Find appropriate channel
             welcome_channel = None
-            for channel in member.guild.text_channels:
+            for channel in guild.text_channels:
                 if channel.name.lower() in ['general', 'welcome', 'chat']:
                     welcome_channel = channel
                     break
 
             if not welcome_channel:
-                welcome_channel = member.guild.text_channels[0] if member.guild.text_channels else None
+                welcome_channel = guild.text_channels[0] if guild.text_channels else None
 
             if welcome_channel:
-                await welcome_channel.send(f"🚨 **STK TERRITORY** 🚨\n\n{member.mention} **WELCOME TO THE GANG!** 💀🔥", embed=embed)
-                logger.info(f"Sent welcome message for {member.display_name}")
+                # Mentions are at most ~22 characters, so 60 keep each message under Discord's 2000
+                for start in range(0, len(members), 60):
+                    mentions = " ".join(member.mention for member in members[start:start + 60])
+                    await outbound.run(
+                        WELCOME, f"channel:{welcome_channel.id}", welcome_channel.send,
+                        f"🚨 **STK TERRITORY** 🚨\n\n{mentions} **WELCOME TO THE GANG!** 💀🔥", embed=embed
+                    )
+                logger.info(f"Sent welcome message for {len(members)} member(s)")
 
+        except Shed:
+            logger.warning(f"Dropped welcome message for {len(members)} member(s); outbound queue is full")
         except Exception as e:
             logger.error(f"Error sending welcome message: {e}")
 
     async def send_stk_board_message(self):
-        """Send STK Board message to specified channel on startup"""
+        """Publish the STK Board message, editing the stored one instead of posting duplicates"""
         try:
             target_channel_id = 1398741781331447890
             channel = self.get_channel(target_channel_id)
@@ -340,7 +537,32 @@ class ShopBot(commands.Bot):
             view = STKBoardView()
             embed = view.create_board_embed()
 
-            await channel.send(embed=embed, view=view)
+            # Hash what the message shows, leaving out the ever-changing timestamp
+            payload = embed.to_dict()
+            payload.pop("timestamp", None)
+            content = json.dumps({"embed": payload, "components": view.to_components()}, sort_keys=True)
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
+
+            state = json.loads(await self.db.get_state("stk_board") or "{}")
+            if state.get("channel_id") == channel.id and state.get("message_id"):
+                if state.get("content_hash") == content_hash:
+                    logger.info("STK Board message is up to date")
+                    return
+
+                try:
+                    await outbound.run(BACKGROUND, f"channel:{channel.id}", channel.get_partial_message(state["message_id"]).edit, embed=embed, view=view)
+                    await self.db.set_state("stk_board", json.dumps({**state, "content_hash": content_hash}))
+                    logger.info(f"Updated STK Board message in channel {channel.name}")
+                    return
+                except discord.NotFound:
+                    logger.info("Stored STK Board message was deleted; sending a new one")
+
+            message = await outbound.run(BACKGROUND, f"channel:{channel.id}", channel.send, embed=embed, view=view)
+            await self.db.set_state("stk_board", json.dumps({
+                "channel_id": channel.id,
+                "message_id": message.id,
+                "content_hash": content_hash
+            }))
             logger.info(f"Sent STK Board message to channel {channel.name}")
 
         except Exception as e:
@@ -348,6 +570,7 @@ class ShopBot(commands.Bot):
 
 # Create bot instance
 bot = ShopBot()
+startup_profile.mark("bot instance")
 
 # Payment methods data
 PAYMENT_METHODS = {
@@ -366,87 +589,65 @@ PAYMENT_METHODS = {
 # Customer role ID
 CUSTOMER_ROLE_ID = 1405942363721044199
 
-# Weapon data
-WEAPON_DATA = {
-    "GoldenButton": {"name": "GoldenButton", "price": 0},
-    "GreenSwitch": {"name": "GreenSwitch", "price": 0},
-    "BlueTips/Switch": {"name": "BlueTips/Switch", "price": 0},
-    "OrangeButton": {"name": "OrangeButton", "price": 0},
-    "YellowButtonSwitch": {"name": "YellowButtonSwitch", "price": 0},
-    "FullyARP": {"name": "FullyARP", "price": 0},
-    "FullyDraco": {"name": "FullyDraco", "price": 0},
-    "Fully-MicroAR": {"name": "Fully-MicroAR", "price": 0},
-    "Cyanbutton": {"name": "Cyanbutton", "price": 0},
-    "BinaryTrigger": {"name": "BinaryTrigger", "price": 0},
-    "100RndTanG19": {"name": "100RndTanG19", "price": 0},
-    "300ARG": {"name": "300ARG", "price": 0},
-    "VP9Scope": {"name": "VP9Scope", "price": 0},
-    "MasterPiece30": {"name": "MasterPiece30", "price": 0},
-    "GSwitch": {"name": "GSwitch", "price": 0},
-    "G17WittaButton": {"name": "G17WittaButton", "price": 0},
-    "G19Switch": {"name": "G19Switch", "price": 0},
-    "G20Switch": {"name": "G20Switch", "price": 0},
-    "G21Switch": {"name": "G21Switch", "price": 0},
-    "G22 Switch": {"name": "G22 Switch", "price": 0},
-    "G23 Switch": {"name": "G23 Switch", "price": 0},
-    "G40 Switch": {"name": "G40 Switch", "price": 0},
-    "G42 Switch": {"name": "G42 Switch", "price": 0},
-    "Fully-FN": {"name": "Fully-FN", "price": 0},
-    "BinaryARP": {"name": "BinaryARP", "price": 0},
-    "BinaryG17": {"name": "BinaryG17", "price": 0},
-    "BinaryDraco": {"name": "BinaryDraco", "price": 0},
-    "CustomAR9": {"name": "CustomAR9", "price": 0}
-}
-
-# Watch data
-WATCH_DATA = {
-    "Cartier": {"name": "Cartier", "price": 1},
-    "BlueFaceCartier": {"name": "Blue Face Cartier", "price": 1},
-    "WhiteRichardMillie": {"name": "White Richard Millie", "price": 1},
-    "PinkRichard": {"name": "Pink Richard", "price": 1},
-    "GreenRichard": {"name": "Green Richard", "price": 1},
-    "RedRichard": {"name": "Red Richard", "price": 1},
-    "BlueRichard": {"name": "Blue Richard", "price": 1},
-    "BlackOutMillie": {"name": "BlackOut Millie", "price": 1},
-    "Red AP": {"name": "Red AP", "price": 1},
-    "AP Watch": {"name": "AP Watch", "price": 1},
-    "Gold AP": {"name": "Gold AP", "price": 1},
-    "Red AP Watch": {"name": "Red AP Watch", "price": 1},
-    "CubanG AP": {"name": "CubanG AP", "price": 1},
-    "CubanP AP": {"name": "CubanP AP", "price": 1},
-    "CubanB AP": {"name": "CubanB AP", "price": 1},
-    "Iced AP": {"name": "Iced AP", "price": 1}
-}
+# Role given to every member who joins
+JOIN_ROLE_ID = 1406402417863430204
 
-# Money data with regular and gamepass options
-MONEY_DATA = {
-    "max_money_990k": {"name": "Max Money 990k", "price": 1, "type": "regular"},
-    "max_bank_990k": {"name": "Max Bank 990k", "price": 1, "type": "regular"},
-    "max_money_1600k_gp": {"name": "Max Money 1.6M (Gamepass)", "price": 2, "type": "gamepass"},
-    "max_bank_1600k_gp": {"name": "Max Bank 1.6M (Gamepass)", "price": 2, "type": "gamepass"}
-}
 
-# Storage package data - these are storage types, not weapon bundles
-PACKAGE_DATA = {
-    "safe_storage": {
-        "name": "SAFE STORAGE",
-        "price": 3,
-        "description": "Store weapons in your safe",
-        "storage_type": "safe"
-    },
-    "bag_storage": {
-        "name": "BAG STORAGE",
-        "price": 2,
-        "description": "Store weapons in your bag",
-        "storage_type": "bag"
-    },
-    "trunk_storage": {
-        "name": "TRUNK STORAGE",
-        "price": 1,
-        "description": "Store weapons in your trunk",
-        "storage_type": "trunk"
-    }
+# How each category describes its select options
+OPTION_DESCRIPTIONS = {
+    "weapons": lambda info, selected: "Selected" if selected else "Click to add",
+    "money": lambda info, selected: "Selected" if selected else f"${info['price']} - {'GP Required' if info['type'] == 'gamepass' else 'No GP'}",
+    "watches": lambda info, selected: f"${info['price']} - Selected" if selected else f"${info['price']}",
+    "packages": lambda info, selected: f"${info['price']} - {info['description']}",
 }
+OPTION_EMOJIS = {"packages": "📦"}
+
+# Prebuilt select options; the same (catalog, page, selection) comes up over and over across users
+@functools.lru_cache(maxsize=BotConfig.SELECT_OPTION_CACHE_SIZE)
+def cached_select_options(catalog, category, page_bits, selected_mask):
+    """SelectOptions for the items at page_bits, ticking those set in selected_mask"""
+    item_ids = catalog.ids[category]
+    item_names = catalog.names[category]
+    describe = OPTION_DESCRIPTIONS[category]
+
+    options = []
+    for bit in page_bits:
+        is_selected = bool(selected_mask >> bit & 1)
+        options.append(discord.SelectOption(
+            label=f"✅ {item_names[bit]}" if is_selected else item_names[bit],
+            value=item_ids[bit],
+            description=describe(catalog.items[category][item_ids[bit]], is_selected),
+            emoji=OPTION_EMOJIS.get(category)
+        ))
+    return tuple(options)
+
+def select_options(catalog, category, selected_ids, page_bits=None):
+    """Options for one page of a category (the first if page_bits is None)"""
+    if page_bits is None:
+        page_bits = catalog.pages(category)[0]
+    # Select keeps the list it is given, so hand out a copy of the shared tuple
+    return list(cached_select_options(catalog, category, page_bits, catalog.mask(category, selected_ids)))
+
+# Base for shop views whose options come from the catalog
+class CatalogBoundView(discord.ui.View, abc.ABC):
+    """Shop view bound to the catalog it was built from; subclasses must say how to rebuild it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.catalog = bot.catalog
+
+    @abc.abstractmethod
+    def rebuild(self):
+        """Return (embed, view) rebuilt against the current catalog"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # A /reloadcatalog since this view was built may have moved or removed items
+        if self.catalog.version == bot.catalog.version:
+            return True
+
+        embed, view = self.rebuild()
+        await interaction.response.edit_message(content="🔄 **Shop updated** - check your picks and try again.", embed=embed, view=view)
+        return False
 
 # Storage select dropdown
 class StorageSelect(discord.ui.Select):
@@ -454,23 +655,15 @@ class StorageSelect(discord.ui.Select):
         self.user_id = user_id
         self.selected_storage = selected_storage
 
-        options = []
-        for package_id, package_info in PACKAGE_DATA.items():
-            is_selected = package_id == self.selected_storage
-            label = f"✅ {package_info['name']}" if is_selected else package_info['name']
-            options.append(discord.SelectOption(
-                label=label,
-                value=package_id,
-                description=f"${package_info['price']} - {package_info['description']}",
-                emoji="📦"
-            ))
-
         super().__init__(
             placeholder="Select storage type for your weapons...",
             min_values=0,
-            max_values=1,
-            options=options
+            max_values=1
         )
+        self.show(bot.catalog)
+
+    def show(self, catalog):
+        self.options = select_options(catalog, "packages", [self.selected_storage] if self.selected_storage else ())
 
     async def callback(self, interaction: discord.Interaction):
         try:
@@ -478,44 +671,35 @@ class StorageSelect(discord.ui.Select):
                 await interaction.response.send_message("❌ This isn't your shop session!", ephemeral=True)
                 return
 
-            self.selected_storage = self.values[0] if self.values else None
-
-            # Get the parent view and update storage
-            view = interaction.message.view
-            if hasattr(view, 'selected_storage'):
-                view.selected_storage = self.selected_storage
-
-            # Update embed and view
-            embed = view.create_weapon_embed()
-            await interaction.response.edit_message(embed=embed, view=view)
+            # Update the parent view in place
+            await self.view.redraw(interaction, selected_storage=self.values[0] if self.values else None)
 
         except Exception as e:
             logger.error(f"Error in StorageSelect callback: {e}")
             if not interaction.response.is_done():
                 await interaction.response.send_message("❌ Some shit went wrong.", ephemeral=True)
 
-# Multi-select dropdown for weapons
+# Multi-select dropdown for one page of weapons
 class WeaponSelect(discord.ui.Select):
-    def __init__(self, selected_weapons=None, user_id=None):
+    EMPTY = "__empty__"
+
+    def __init__(self, catalog, selected_weapons=None, user_id=None, page_bits=None):
         self.selected_weapons = selected_weapons or set()
         self.user_id = user_id
 
-        options = []
-        for weapon_id, weapon_info in list(WEAPON_DATA.items())[:25]:  # Discord limit
-            is_selected = weapon_id in self.selected_weapons
-            label = f"✅ {weapon_info['name']}" if is_selected else weapon_info['name']
-            options.append(discord.SelectOption(
-                label=label,
-                value=weapon_id,
-                description="Selected" if is_selected else "Click to add"
-            ))
-
         super().__init__(
             placeholder="Pick your guns from the arsenal...",
             min_values=0,
-            max_values=len(options),
-            options=options
+            row=0
         )
+        self.show(catalog, page_bits)
+
+    def show(self, catalog, page_bits):
+        options = select_options(catalog, "weapons", self.selected_weapons, page_bits)
+        # Discord rejects a select with no options, so an empty page gets a disabled placeholder
+        self.disabled = not options
+        self.options = options or [discord.SelectOption(label="No weapons in stock right now", value=self.EMPTY, emoji="🚫")]
+        self.max_values = len(self.options)
 
     async def callback(self, interaction: discord.Interaction):
         try:
@@ -532,36 +716,61 @@ class WeaponSelect(discord.ui.Select):
                     self.selected_weapons.add(value)
 
             # Update the view with new selections
-            view = WeaponShopView(interaction.user.id, self.selected_weapons)
-            embed = view.create_weapon_embed()
-            await interaction.response.edit_message(embed=embed, view=view)
+            await self.view.redraw(interaction)
         except Exception as e:
             logger.error(f"Error in WeaponSelect callback: {e}")
             if not interaction.response.is_done():
                 await interaction.response.send_message("❌ Some shit went wrong. Try again.", ephemeral=True)
 
+# Weapon category filter for the paginated weapon picker
+class WeaponGroupSelect(discord.ui.Select):
+    ALL = "__all__"
+
+    def __init__(self, user_id, selected_group=None):
+        self.user_id = user_id
+
+        super().__init__(
+            placeholder="Filter by category...",
+            min_values=1,
+            max_values=1,
+            row=3
+        )
+        self.show(bot.catalog, selected_group)
+
+    def show(self, catalog, selected_group):
+        options = [discord.SelectOption(label="All weapons", value=self.ALL, emoji="🔫", default=selected_group is None)]
+        for group in catalog.groups["weapons"]:
+            options.append(discord.SelectOption(label=group, value=group, default=group == selected_group))
+        self.options = options
+
+    async def callback(self, interaction: discord.Interaction):
+        try:
+            if self.user_id and interaction.user.id != self.user_id:
+                await interaction.response.send_message("❌ This isn't your shop session!", ephemeral=True)
+                return
+
+            group = None if self.values[0] == self.ALL else self.values[0]
+            await self.view.redraw(interaction, group=group, page=0)
+        except Exception as e:
+            logger.error(f"Error in WeaponGroupSelect callback: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("❌ Some shit went wrong. Try again.", ephemeral=True)
+
 # Watch select dropdown
 class WatchSelect(discord.ui.Select):
     def __init__(self, selected_watch=None, user_id=None):
         self.selected_watch = selected_watch
         self.user_id = user_id
 
-        options = []
-        for watch_id, watch_info in WATCH_DATA.items():
-            is_selected = watch_id == self.selected_watch
-            label = f"✅ {watch_info['name']}" if is_selected else watch_info['name']
-            options.append(discord.SelectOption(
-                label=label,
-                value=watch_id,
-                description=f"${watch_info['price']} - Selected" if is_selected else f"${watch_info['price']}"
-            ))
-
         super().__init__(
             placeholder="Pick a watch...",
             min_values=0,
-            max_values=1,
-            options=options
+            max_values=1
         )
+        self.show(bot.catalog)
+
+    def show(self, catalog):
+        self.options = select_options(catalog, "watches", [self.selected_watch] if self.selected_watch else ())
 
     async def callback(self, interaction: discord.Interaction):
         try:
@@ -572,14 +781,11 @@ class WatchSelect(discord.ui.Select):
 
             self.selected_watch = self.values[0] if self.values else None
 
-            # Get the parent view and update cart
-            view = interaction.message.view
-            if hasattr(view, 'selected_watch'):
-                view.selected_watch = self.selected_watch
-
-            # Update embed and view
-            embed = view.create_other_embed()
-            await interaction.response.edit_message(embed=embed, view=view)
+            # Update the parent view in place
+            view = self.view
+            view.selected_watch = self.selected_watch
+            self.show(view.catalog)
+            await interaction.response.edit_message(embed=view.create_other_embed(), view=view)
         except Exception as e:
             logger.error(f"Error in WatchSelect callback: {e}")
             if not interaction.response.is_done():
@@ -591,26 +797,15 @@ class MoneySelect(discord.ui.Select):
         self.selected_money = selected_money or set()
         self.user_id = user_id
 
-        options = []
-        for money_id, money_info in MONEY_DATA.items():
-            is_selected = money_id in self.selected_money
-            label = f"✅ {money_info['name']}" if is_selected else money_info['name']
-            description = f"${money_info['price']} - {'GP Required' if money_info['type'] == 'gamepass' else 'No GP'}"
-            if is_selected:
-                description = "Selected"
-
-            options.append(discord.SelectOption(
-                label=label,
-                value=money_id,
-                description=description
-            ))
-
         super().__init__(
             placeholder="Pick your money packages...",
-            min_values=0,
-            max_values=len(options),
-            options=options
+            min_values=0
         )
+        self.show(bot.catalog)
+
+    def show(self, catalog):
+        self.options = select_options(catalog, "money", self.selected_money)
+        self.max_values = len(self.options)
 
     async def callback(self, interaction: discord.Interaction):
         try:
@@ -626,27 +821,88 @@ class MoneySelect(discord.ui.Select):
                 else:
                     self.selected_money.add(value)
 
-            # Update the view with new selections
-            view = MoneyShopView(interaction.user.id, self.selected_money)
-            embed = view.create_money_embed()
-            await interaction.response.edit_message(embed=embed, view=view)
+            # Update the parent view in place
+            self.show(self.view.catalog)
+            await interaction.response.edit_message(embed=self.view.create_money_embed(), view=self.view)
         except Exception as e:
             logger.error(f"Error in MoneySelect callback: {e}")
             if not interaction.response.is_done():
                 await interaction.response.send_message("❌ Some shit went wrong. Try again.", ephemeral=True)
 
-class WeaponShopView(discord.ui.View):
-    def __init__(self, user_id, selected_weapons=None, selected_storage=None):
+class WeaponShopView(CatalogBoundView):
+    def __init__(self, user_id, selected_weapons=None, selected_storage=None, page=0, group=None):
         super().__init__(timeout=180)
         self.user_id = user_id
         self.selected_weapons = selected_weapons or set()
         self.selected_storage = selected_storage
+        self.group = group if group in self.catalog.groups["weapons"] else None
+        self.page = page
 
         # Add the weapon select dropdown with user_id
-        self.add_item(WeaponSelect(self.selected_weapons, self.user_id))
+        self.weapon_select = WeaponSelect(self.catalog, self.selected_weapons, self.user_id)
+        self.add_item(self.weapon_select)
 
         # Add storage select dropdown
-        self.add_item(StorageSelect(self.user_id, self.selected_storage))
+        self.storage_select = StorageSelect(self.user_id, self.selected_storage)
+        self.storage_select.row = 2
+        self.add_item(self.storage_select)
+
+        # Category filter
+        self.group_select = None
+        if self.catalog.groups["weapons"]:
+            self.group_select = WeaponGroupSelect(self.user_id, self.group)
+            self.add_item(self.group_select)
+
+        self.refresh()
+
+    def refresh(self):
+        """Point every component at the current page, filter and selections"""
+        # Pages come pre-sliced from the catalog, so only one page of options is ever shown
+        self.pages = self.catalog.pages("weapons", self.group)
+        self.page = max(0, min(self.page, len(self.pages) - 1))
+
+        self.weapon_select.show(self.catalog, self.pages[self.page])
+        self.storage_select.selected_storage = self.selected_storage
+        self.storage_select.show(self.catalog)
+        if self.group_select:
+            self.group_select.show(self.catalog, self.group)
+
+        # Page controls, only when there is more than one page
+        paged = len(self.pages) > 1
+        for button in (self.previous_page, self.page_indicator, self.next_page):
+            if paged and button not in self.children:
+                self.add_item(button)
+            elif not paged and button in self.children:
+                self.remove_item(button)
+
+        self.page_indicator.label = f"Page {self.page + 1}/{len(self.pages)}"
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= len(self.pages) - 1
+
+    def copy(self, **changes):
+        """Build a fresh view with the same state, overriding any keyword given"""
+        state = {
+            "selected_weapons": self.selected_weapons,
+            "selected_storage": self.selected_storage,
+            "page": self.page,
+            "group": self.group,
+        }
+        state.update(changes)
+        return WeaponShopView(self.user_id, **state)
+
+    async def redraw(self, interaction: discord.Interaction, **changes):
+        """Apply state changes to this view and re-render it in place"""
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self.refresh()
+        await interaction.response.edit_message(embed=self.create_weapon_embed(), view=self)
+
+    def rebuild(self):
+        catalog = bot.catalog
+        weapons = {weapon_id for weapon_id in self.selected_weapons if weapon_id in catalog.index["weapons"]}
+        storage = self.selected_storage if self.selected_storage in catalog.index["packages"] else None
+        view = self.copy(selected_weapons=weapons, selected_storage=storage)
+        return view.create_weapon_embed(), view
 
     def create_weapon_embed(self):
         embed = discord.Embed(
@@ -658,7 +914,7 @@ class WeaponShopView(discord.ui.View):
         if self.selected_weapons:
             selected_list = []
             for weapon_id in self.selected_weapons:
-                weapon_name = WEAPON_DATA[weapon_id]['name']
+                weapon_name = self.catalog.get("weapons", weapon_id)['name']
                 selected_list.append(f"💥 {weapon_name}")
 
             embed.add_field(
@@ -675,7 +931,7 @@ class WeaponShopView(discord.ui.View):
 
         # Storage selection display
         if self.selected_storage:
-            storage_info = PACKAGE_DATA[self.selected_storage]
+            storage_info = self.catalog.get("packages", self.selected_storage)
             embed.add_field(
                 name="📦 SELECTED STORAGE",
                 value=f"✅ {storage_info['name']} - ${storage_info['price']}\n{storage_info['description']}",
@@ -703,20 +959,17 @@ class WeaponShopView(discord.ui.View):
                 return
 
             # Add to cart
-            if interaction.user.id not in bot.user_carts:
-                bot.user_carts[interaction.user.id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-
             if self.selected_weapons:
-                bot.user_carts[interaction.user.id]["weapons"].update(self.selected_weapons)
+                await bot.carts.add(interaction.user.id, "weapons", self.selected_weapons)
 
             if self.selected_storage:
-                bot.user_carts[interaction.user.id]["packages"].add(self.selected_storage)
+                await bot.carts.add(interaction.user.id, "packages", [self.selected_storage])
 
             message = f"✅ Added "
             if self.selected_weapons:
                 message += f"{len(self.selected_weapons)} weapons"
             if self.selected_storage:
-                storage_name = PACKAGE_DATA[self.selected_storage]['name']
+                storage_name = self.catalog.get("packages", self.selected_storage)['name']
                 if self.selected_weapons:
                     message += f" + {storage_name}"
                 else:
@@ -743,11 +996,29 @@ class WeaponShopView(discord.ui.View):
             return
 
         self.selected_weapons.clear()
-        view = WeaponShopView(interaction.user.id, self.selected_weapons)
-        embed = view.create_weapon_embed()
-        await interaction.response.edit_message(embed=embed, view=view)
+        await self.redraw(interaction, selected_storage=None)
+
+    @discord.ui.button(label='◀', style=discord.ButtonStyle.secondary, row=4)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ This ain't your session!", ephemeral=True)
+            return
+
+        await self.redraw(interaction, page=self.page - 1)
+
+    @discord.ui.button(label='Page 1/1', style=discord.ButtonStyle.secondary, disabled=True, row=4)
+    async def page_indicator(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label='▶', style=discord.ButtonStyle.secondary, row=4)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ This ain't your session!", ephemeral=True)
+            return
+
+        await self.redraw(interaction, page=self.page + 1)
 
-class MoneyShopView(discord.ui.View):
+class MoneyShopView(CatalogBoundView):
     def __init__(self, user_id, selected_money=None):
         super().__init__(timeout=180)
         self.user_id = user_id
@@ -756,6 +1027,11 @@ class MoneyShopView(discord.ui.View):
         # Add the money select dropdown with user_id
         self.add_item(MoneySelect(self.selected_money, self.user_id))
 
+    def rebuild(self):
+        money = {money_id for money_id in self.selected_money if money_id in bot.catalog.index["money"]}
+        view = MoneyShopView(self.user_id, money)
+        return view.create_money_embed(), view
+
     def create_money_embed(self):
         embed = discord.Embed(
             title="💰 CASH FLOW",
@@ -767,7 +1043,7 @@ class MoneyShopView(discord.ui.View):
         regular_packages = []
         gamepass_packages = []
 
-        for money_id, money_info in MONEY_DATA.items():
+        for money_id, money_info in self.catalog.items["money"].items():
             package_text = f"{money_info['name']} - ${money_info['price']}"
             if money_info['type'] == 'regular':
                 regular_packages.append(f"💰 **{package_text}**")
@@ -787,12 +1063,9 @@ class MoneyShopView(discord.ui.View):
         )
 
         if self.selected_money:
-            selected_list = []
-            total_cost = 0
-            for money_id in self.selected_money:
-                money_info = MONEY_DATA[money_id]
-                selected_list.append(f"💵 {money_info['name']} - ${money_info['price']}")
-                total_cost += money_info['price']
+            selected_mask = self.catalog.mask("money", self.selected_money)
+            selected_list = [f"💵 {label}" for label in self.catalog.labels_in("money", selected_mask)]
+            total_cost = self.catalog.subtotal("money", selected_mask)
 
             embed.add_field(
                 name=f"✅ SELECTED ({len(self.selected_money)}) - Total: ${total_cost}",
@@ -809,13 +1082,10 @@ class MoneyShopView(discord.ui.View):
         embed.set_footer(text="STK Supply • No BS business")
         return embed
 
-    def auto_add_to_cart(self, user_id):
+    async def auto_add_to_cart(self, user_id):
         """Automatically add selected money to cart"""
-        if user_id not in bot.user_carts:
-            bot.user_carts[user_id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-
         if self.selected_money:
-            bot.user_carts[user_id]["money"].update(self.selected_money)
+            await bot.carts.add(user_id, "money", self.selected_money)
 
 
     @discord.ui.button(label='🛒 ADD', style=discord.ButtonStyle.success, emoji='🔥', row=1)
@@ -829,23 +1099,20 @@ class MoneyShopView(discord.ui.View):
             return
 
         # Add to cart
-        if interaction.user.id not in bot.user_carts:
-            bot.user_carts[interaction.user.id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-
-        bot.user_carts[interaction.user.id]["money"].update(self.selected_money)
+        await bot.carts.add(interaction.user.id, "money", self.selected_money)
         await interaction.response.send_message(f"✅ Added {len(self.selected_money)} packages!", ephemeral=True)
 
     @discord.ui.button(label='◀️ BACK', style=discord.ButtonStyle.secondary, row=1)
     async def back_to_shop(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Auto-add items to cart before going back
-        self.auto_add_to_cart(interaction.user.id)
+        await self.auto_add_to_cart(interaction.user.id)
 
         # Always go back to personal shop since this is user-specific
         view = PersonalSTKShopView(self.user_id)
         embed = view.create_personal_shop_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
-class OtherShopView(discord.ui.View):
+class OtherShopView(CatalogBoundView):
     def __init__(self, user_id):
         super().__init__(timeout=180)
         self.user_id = user_id
@@ -854,6 +1121,10 @@ class OtherShopView(discord.ui.View):
         # Add dropdowns with user_id
         self.add_item(WatchSelect(self.selected_watch, self.user_id))
 
+    def rebuild(self):
+        view = OtherShopView(self.user_id)
+        return view.create_other_embed(), view
+
     def create_other_embed(self):
         embed = discord.Embed(
             title="📦 PREMIUM GEAR",
@@ -869,7 +1140,7 @@ class OtherShopView(discord.ui.View):
         )
 
         if self.selected_watch:
-            watch_info = WATCH_DATA[self.selected_watch]
+            watch_info = self.catalog.get("watches", self.selected_watch)
             embed.add_field(
                 name="✅ SELECTED",
                 value=f"⌚ {watch_info['name']} - ${watch_info['price']}",
@@ -892,65 +1163,62 @@ class OtherShopView(discord.ui.View):
             return
 
         # Add to cart
-        if interaction.user.id not in bot.user_carts:
-            bot.user_carts[interaction.user.id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-
-        if self.selected_watch not in bot.user_carts[interaction.user.id]["watches"]:
-            bot.user_carts[interaction.user.id]["watches"].add(self.selected_watch)
+        if await bot.carts.add(interaction.user.id, "watches", [self.selected_watch]):
             await interaction.response.send_message(f"✅ Added watch to cart!", ephemeral=True)
         else:
             await interaction.response.send_message("Already in cart!", ephemeral=True)
 
-    def auto_add_to_cart(self, user_id):
+    async def auto_add_to_cart(self, user_id):
         """Automatically add selected watch to cart"""
-        if user_id not in bot.user_carts:
-            bot.user_carts[user_id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-
         if self.selected_watch:
-            bot.user_carts[user_id]["watches"].add(self.selected_watch)
+            await bot.carts.add(user_id, "watches", [self.selected_watch])
 
     @discord.ui.button(label='◀️ BACK', style=discord.ButtonStyle.secondary, row=1)
     async def back_to_shop(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Auto-add items to cart before going back
-        self.auto_add_to_cart(interaction.user.id)
+        await self.auto_add_to_cart(interaction.user.id)
 
         # Always go back to personal shop since this is user-specific
         view = PersonalSTKShopView(self.user_id)
         embed = view.create_personal_shop_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
+@embed_templates.register("stk_info")
+def build_info_embed():
+    embed = discord.Embed(
+        title="ℹ️ ABOUT STK",
+        description="**The Block's Most Trusted Connect** • Your neighborhood plugs",
+        color=0x00BFFF
+    )
+
+    embed.add_field(
+        name="👑 THE CREW",
+        value="💀 **ZPOFE** • Main connect • 3+ years • Lightning delivery\n⚡ **DROW** • Specialist • Premium connections • Trusted",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🏆 STREET CRED",
+        value="💀 **50+** customers\n⚡ **2-5 min** delivery\n🔥 **99.9%** success\n💯 **24/7** grinding",
+        inline=True
+    )
+
+    embed.add_field(
+        name="📞 CONTACT",
+        value="🎯 **Active now**\n*Ready for business*",
+        inline=True
+    )
+
+    embed.set_footer(text="STK Supply • No BS business")
+    return embed
+
 class InfoView(discord.ui.View):
     def __init__(self, user_id):
         super().__init__(timeout=180)
         self.user_id = user_id
 
     def create_info_embed(self):
-        embed = discord.Embed(
-            title="ℹ️ ABOUT STK",
-            description="**The Block's Most Trusted Connect** • Your neighborhood plugs",
-            color=0x00BFFF
-        )
-
-        embed.add_field(
-            name="👑 THE CREW",
-            value="💀 **ZPOFE** • Main connect • 3+ years • Lightning delivery\n⚡ **DROW** • Specialist • Premium connections • Trusted",
-            inline=False
-        )
-
-        embed.add_field(
-            name="🏆 STREET CRED",
-            value="💀 **50+** customers\n⚡ **2-5 min** delivery\n🔥 **99.9%** success\n💯 **24/7** grinding",
-            inline=True
-        )
-
-        embed.add_field(
-            name="📞 CONTACT",
-            value="🎯 **Active now**\n*Ready for business*",
-            inline=True
-        )
-
-        embed.set_footer(text="STK Supply • No BS business")
-        return embed
+        return embed_templates.get("stk_info")
 
     @discord.ui.button(label='📞 CONTACT', style=discord.ButtonStyle.primary, row=1)
     async def contact_support(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -968,49 +1236,39 @@ class CartView(discord.ui.View):
         super().__init__(timeout=180)
         self.user_id = user_id
 
-    def create_cart_embed(self):
+    def create_cart_embed(self, cart):
         embed = discord.Embed(
             title="🛒 YOUR CART",
             description="**Review your shit:**",
             color=0xFF8C00
         )
 
-        cart = bot.user_carts.get(self.user_id, {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None})
-        total = 0
+        catalog = cart.catalog
+        total = catalog.total(cart)
         items = []
 
         # Weapons
-        if cart["weapons"]:
-            items.append(f"🔫 **WEAPONS** ({len(cart['weapons'])})")
-            for weapon_id in list(cart["weapons"])[:3]:  # Show only first 3
-                items.append(f"  • {WEAPON_DATA[weapon_id]['name']}")
-            if len(cart["weapons"]) > 3:
-                items.append(f"  • ...and {len(cart['weapons']) - 3} more")
+        if cart.weapons:
+            items.append(f"🔫 **WEAPONS** ({cart.count('weapons')})")
+            for weapon_name in catalog.names_in("weapons", cart.weapons)[:3]:  # Show only first 3
+                items.append(f"  • {weapon_name}")
+            if cart.count("weapons") > 3:
+                items.append(f"  • ...and {cart.count('weapons') - 3} more")
 
         # Money
-        if cart["money"]:
-            items.append(f"💰 **MONEY** ({len(cart['money'])})")
-            for money_id in cart["money"]:
-                money_info = MONEY_DATA[money_id]
-                items.append(f"  • {money_info['name']} - ${money_info['price']}")
-                total += money_info["price"]
+        if cart.money:
+            items.append(f"💰 **MONEY** ({cart.count('money')})")
+            items.extend(f"  • {label}" for label in catalog.labels_in("money", cart.money))
 
         # Watches
-        if cart["watches"]:
-            items.append(f"⌚ **WATCHES** ({len(cart['watches'])})")
-            for watch_id in cart["watches"]:
-                watch_info = WATCH_DATA[watch_id]
-                items.append(f"  • {watch_info['name']} - ${watch_info['price']}")
-                total += watch_info["price"]
+        if cart.watches:
+            items.append(f"⌚ **WATCHES** ({cart.count('watches')})")
+            items.extend(f"  • {label}" for label in catalog.labels_in("watches", cart.watches))
 
         # Storage packages
-        if cart["packages"]:
-            items.append(f"📦 **STORAGE** ({len(cart['packages'])})")
-            for package_id in cart["packages"]:
-                if package_id in PACKAGE_DATA:
-                    package_info = PACKAGE_DATA[package_id]
-                    items.append(f"  • {package_info['name']} - ${package_info['price']}")
-                    total += package_info["price"]
+        if cart.packages:
+            items.append(f"📦 **STORAGE** ({cart.count('packages')})")
+            items.extend(f"  • {label}" for label in catalog.labels_in("packages", cart.packages))
 
         if not items:
             embed.add_field(
@@ -1028,7 +1286,7 @@ class CartView(discord.ui.View):
             if total > 0:
                 embed.add_field(
                     name="💰 TOTAL",
-                    value=f"**${total:.2f}**\n*(+ weapon pricing)*",
+                    value=f"**${total:.2f}**",
                     inline=True
                 )
 
@@ -1041,35 +1299,65 @@ class CartView(discord.ui.View):
             await interaction.response.send_message("❌ This ain't your cart!", ephemeral=True)
             return
 
-        cart = bot.user_carts.get(self.user_id, {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None})
+        # A checkout for this user is already creating their ticket (e.g. a double click)
+        if bot.tickets.checkout_busy(self.user_id):
+            await interaction.response.send_message("⏳ Your order is already being placed...", ephemeral=True)
+            return
+
+        async with bot.tickets.checkout(self.user_id):
+            await self.place_order(interaction)
+
+    async def place_order(self, interaction: discord.Interaction):
+        """Checkout body, run under the user's checkout lock"""
+        # One open ticket per user: point them back at it instead of opening another
+        existing = bot.tickets.channel_for(self.user_id)
+        if existing is not None:
+            channel = interaction.guild.get_channel(existing) if interaction.guild else None
+            if channel is not None:
+                await interaction.response.send_message(f"🎫 **You already have an open order:** {channel.mention}\n\nFinish or close it before placing another.", ephemeral=True)
+                return
+            # Deleted while we weren't watching
+            bot.tickets.forget_channel(existing)
+            await db.set_ticket_status(existing, "closed")
+
+        cart = await bot.carts.get(self.user_id)
 
-        if not any([cart["weapons"], cart["money"], cart["watches"], cart["packages"]]):
+        if not cart:
             await interaction.response.send_message("❌ Your cart is empty!", ephemeral=True)
             return
 
+        # Acknowledge right away; creating the ticket takes several round trips
+        started = time.perf_counter()
+        stages = {}
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        stages["defer"] = time.perf_counter() - started
+
         try:
-            ticket_channel = await create_purchase_ticket(interaction, cart)
+            ticket_channel = await create_purchase_ticket(interaction, cart, stages)
             if ticket_channel:
-                # Assign customer role
-                try:
-                    guild = interaction.guild
-                    member = guild.get_member(interaction.user.id)
-                    role = guild.get_role(CUSTOMER_ROLE_ID)
-                    if role and member:
-                        await member.add_roles(role)
-                        logger.info(f"Assigned customer role to {member.display_name}")
-                except Exception as e:
-                    logger.error(f"Error assigning customer role: {e}")
-
-                await interaction.response.send_message(f"✅ **Order placed!**\n\nYour channel: {ticket_channel.mention}\n\nYou've been given the customer role!", ephemeral=True)
-
-                # Clear cart after successful ticket creation
-                bot.user_carts[self.user_id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
+                # Index the new ticket and clear the cart
+                bot.tickets.add(self.user_id, ticket_channel.id)
+                bot.carts.clear(self.user_id)
+
+                stage_started = time.perf_counter()
+                if await assign_customer_role(interaction.guild, interaction.user.id):
+                    role_note = "You've been given the customer role!"
+                else:
+                    logger.warning(f"Order placed for {interaction.user.id} in #{ticket_channel.name} but the customer role wasn't assigned")
+                    role_note = "⚠️ Couldn't give you the customer role; staff will sort it out in your ticket."
+                await outbound.run(
+                    INTERACTION, f"interaction:{interaction.id}", interaction.followup.send,
+                    f"✅ **Order placed!**\n\nYour channel: {ticket_channel.mention}\n\n{role_note}", ephemeral=True
+                )
+                stages["confirm"] = time.perf_counter() - stage_started
+
+                timings = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in stages.items())
+                logger.info(f"Checkout for {interaction.user.id} took {(time.perf_counter() - started) * 1000:.0f}ms ({timings})")
             else:
-                await interaction.response.send_message("❌ Couldn't place order. Contact support.", ephemeral=True)
+                await interaction.followup.send("❌ Couldn't place order. Contact support.", ephemeral=True)
         except Exception as e:
             logger.error(f"Error during checkout: {e}")
-            await interaction.response.send_message("❌ Some shit went wrong during checkout.", ephemeral=True)
+            await interaction.followup.send("❌ Some shit went wrong during checkout.", ephemeral=True)
 
     @discord.ui.button(label='🗑️ CLEAR', style=discord.ButtonStyle.danger, row=1)
     async def clear_cart(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -1077,8 +1365,8 @@ class CartView(discord.ui.View):
             await interaction.response.send_message("❌ This ain't your cart!", ephemeral=True)
             return
 
-        bot.user_carts[self.user_id] = {"weapons": set(), "money": set(), "watches": set(), "packages": set(), "hub": None}
-        embed = self.create_cart_embed()
+        bot.carts.clear(self.user_id)
+        embed = self.create_cart_embed(await bot.carts.get(self.user_id))
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label='◀️ BACK', style=discord.ButtonStyle.secondary, row=1)
@@ -1235,7 +1523,7 @@ class PersonalSTKShopView(discord.ui.View):
     @discord.ui.button(label='🛒 CART', style=discord.ButtonStyle.primary, emoji='🔥', row=2)
     async def cart_tab(self, interaction: discord.Interaction, button: discord.ui.Button):
         view = CartView(self.user_id)
-        embed = view.create_cart_embed()
+        embed = view.create_cart_embed(await bot.carts.get(self.user_id))
         await interaction.response.edit_message(embed=embed, view=view)
 
     @discord.ui.button(label='◀️ BACK TO MAIN', style=discord.ButtonStyle.secondary, row=3)
@@ -1244,128 +1532,163 @@ class PersonalSTKShopView(discord.ui.View):
         embed = view.create_shop_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
-# Persistent STK Shop View - For setup command (no user restrictions)
-class PersistentSTKShopView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
+@embed_templates.register("stk_shop")
+def build_shop_embed():
+    embed = discord.Embed(
+        title="💀 STK (SHOOT TO KILL) 💀",
+        description="**THE MOST FEARED GANG IN THE STREETS**",
+        color=0xFF0000
+    )
 
-    def create_shop_embed(self):
-        embed = discord.Embed(
-            title="💀 STK (SHOOT TO KILL) 💀",
-            description="**THE MOST FEARED GANG IN THE STREETS**",
-            color=0xFF0000
-        )
+    # Add images
+    embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif?ex=68a1c8a6&is=68a07726&hm=1a990b57e6e70e8c31978e9d90aba07b1607e688f610331dddd8b42d4ccb88dd&")
+    embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069645164937368/standard_2.gif?ex=68a1c8a6&is=68a07726&hm=a73756ad78ccbf90f487df0045bc1ce19d558842ea8527d1444691fd4a29dc74&")
 
-        # Add images
-        embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif?ex=68a1c8a6&is=68a07726&hm=1a990b57e6e70e8c31978e9d90aba07b1607e688f610331dddd8b42d4ccb88dd&")
-        embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069645164937368/standard_2.gif?ex=68a1c8a6&is=68a07726&hm=a73756ad78ccbf90f487df0045bc1ce19d558842ea8527d1444691fd4a29dc74&")
+    embed.add_field(
+        name="🚨 SHOP NO LONGER AVAILABLE HERE 🚨",
+        value="**STK has moved to a new location!**\n\n🔗 **NEW DISCORD:** https://discord.gg/89j5c2SEK3\n\n⚡ **Join our new server for all STK services!**",
+        inline=False
+    )
 
-        embed.add_field(
-            name="🚨 SHOP NO LONGER AVAILABLE HERE 🚨",
-            value="**STK has moved to a new location!**\n\n🔗 **NEW DISCORD:** https://discord.gg/89j5c2SEK3\n\n⚡ **Join our new server for all STK services!**",
-            inline=False
-        )
+    embed.add_field(
+        name="👑 OUR LEADERSHIP",
+        value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n🏛️ **AVERY** - STK Founder\n\n🪖 Professional hierarchy with proven results",
+        inline=True
+    )
 
-        embed.add_field(
-            name="👑 OUR LEADERSHIP",
-            value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n🏛️ **AVERY** - STK Founder\n\n🪖 Professional hierarchy with proven results",
-            inline=True
-        )
+    embed.add_field(
+        name="🎯 WHAT WE PROVIDE",
+        value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
+        inline=True
+    )
 
-        embed.add_field(
-            name="🎯 WHAT WE PROVIDE",
-            value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
-            inline=True
-        )
+    embed.add_field(
+        name="📍 OUR TERRITORY",
+        value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
+        inline=False
+    )
 
-        embed.add_field(
-            name="📍 OUR TERRITORY",
-            value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
-            inline=False
-        )
+    embed.add_field(
+        name="💰 WHERE TO BUY",
+        value="🛒 **JOIN OUR NEW DISCORD:** https://discord.gg/89j5c2SEK3\n\n🔥 **All premium services available**\n💎 **Elite quality guaranteed**\n⚡ **Fast delivery & professional service**",
+        inline=True
+    )
 
-        embed.add_field(
-            name="💰 WHERE TO BUY",
-            value="🛒 **JOIN OUR NEW DISCORD:** https://discord.gg/89j5c2SEK3\n\n🔥 **All premium services available**\n💎 **Elite quality guaranteed**\n⚡ **Fast delivery & professional service**",
-            inline=True
-        )
+    embed.add_field(
+        name="💀 THE STK CODE",
+        value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
+        inline=True
+    )
 
-        embed.add_field(
-            name="💀 THE STK CODE",
-            value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
-            inline=True
-        )
+    embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply")
+    return embed
 
-        embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply")
-        return embed
+# Persistent STK Shop View - For setup command (no user restrictions)
+class PersistentSTKShopView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    def create_shop_embed(self):
+        return embed_templates.get("stk_shop")
 
-    @discord.ui.button(label='📞 CONTACT', style=discord.ButtonStyle.secondary, emoji='📱', row=1)
+    @discord.ui.button(label='📞 CONTACT', style=discord.ButtonStyle.secondary, emoji='📱', row=1, custom_id='stk_shop_contact')
     async def contact_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_message("📞 **CONTACT STK**\n\nDM **Zpofe** or **Drow** for business inquiries.\n\n⚡ **Response time:** Usually within a few hours\n💀 **We're always grinding!**", ephemeral=True)
 
-    @discord.ui.button(label='👥 MEET THE TEAM', style=discord.ButtonStyle.primary, emoji='👑', row=1)
+    @discord.ui.button(label='👥 MEET THE TEAM', style=discord.ButtonStyle.primary, emoji='👑', row=1, custom_id='stk_shop_meet_team')
     async def meet_team(self, interaction: discord.Interaction, button: discord.ui.Button):
         view = STKBoardView()
         embed = view.create_board_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
-# STK Join System
-class STKJoinView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
+@embed_templates.register("stk_join")
+def build_join_embed():
+    embed = discord.Embed(
+        title="💀 JOIN STK 💀",
+        description="**🔥 STK Entry Requirements**\n**No exceptions, no shortcuts.**",
+        color=0xFF0000
+    )
 
-    def create_join_embed(self):
-        embed = discord.Embed(
-            title="💀 JOIN STK 💀",
-            description="**🔥 STK Entry Requirements**\n**No exceptions, no shortcuts.**",
-            color=0xFF0000
-        )
+    # Warning section
+    embed.add_field(
+        name="⚠️ **AGE REQUIREMENT**",
+        value="**IF YOU ARE NOT 16+ DO NOT TRY TO JOIN**\n**WE CHECK THIS SHIT**",
+        inline=False
+    )
 
-        # Warning section
-        embed.add_field(
-            name="⚠️ **AGE REQUIREMENT**",
-            value="**IF YOU ARE NOT 16+ DO NOT TRY TO JOIN**\n**WE CHECK THIS SHIT**",
-            inline=False
-        )
+    embed.add_field(
+        name="🧠 Eligibility",
+        value="• Must be 16+ years old\n• Active Roblox main account\n• Regularly play Tha Bronx 3",
+        inline=True
+    )
 
-        embed.add_field(
-            name="🧠 Eligibility",
-            value="• Must be 16+ years old\n• Active Roblox main account\n• Regularly play Tha Bronx 3",
-            inline=True
-        )
+    embed.add_field(
+        name="🎯 Behavior Standards",
+        value="• No leaking, stealing, advertising\n• No alternate accounts\n• No disruptive behavior",
+        inline=True
+    )
 
-        embed.add_field(
-            name="🎯 Behavior Standards",
-            value="• No leaking, stealing, advertising\n• No alternate accounts\n• No disruptive behavior",
-            inline=True
-        )
+    embed.add_field(
+        name="🏗️ Respect Structure",
+        value="• All services through Zpofe\n• Verified sellers only\n• STK channels only",
+        inline=False
+    )
 
-        embed.add_field(
-            name="🏗️ Respect Structure",
-            value="• All services through Zpofe\n• Verified sellers only\n• STK channels only",
-            inline=False
-        )
+    embed.add_field(
+        name="⚔️ **TRYOUTS**",
+        value="**3 FIGHTS TO JOIN:**\n🥊 **1v1 ZPOFE**\n🥊 **1v1 ASAI**\n🥊 **1v1 DROW**\n\n*Wait for all 3 members to join before starting*",
+        inline=False
+    )
 
-        embed.add_field(
-            name="⚔️ **TRYOUTS**",
-            value="**3 FIGHTS TO JOIN:**\n🥊 **1v1 ZPOFE**\n🥊 **1v1 ASAI**\n🥊 **1v1 DROW**\n\n*Wait for all 3 members to join before starting*",
-            inline=False
-        )
+    embed.set_footer(text="STK Gang • Elite only • No weak shit allowed")
+    return embed
 
-        embed.set_footer(text="STK Gang • Elite only • No weak shit allowed")
-        return embed
+# STK Join System
+class STKJoinView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
 
-    @discord.ui.button(label='🥊 JOIN STK', style=discord.ButtonStyle.danger, emoji='💀', row=1)
+    def create_join_embed(self):
+        return embed_templates.get("stk_join")
+
+    @discord.ui.button(label='🥊 JOIN STK', style=discord.ButtonStyle.danger, emoji='💀', row=1, custom_id='join_stk')
+    @auto_defer
     async def join_stk(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             ticket_channel = await create_stk_join_ticket(interaction)
             if ticket_channel:
-                await interaction.response.send_message(f"✅ **STK JOIN REQUEST CREATED!**\n\nYour tryout channel: {ticket_channel.mention}\n\n**Wait for all 3 STK members to join before starting fights!**", ephemeral=True)
+                await auto_defer.respond(interaction, f"✅ **STK JOIN REQUEST CREATED!**\n\nYour tryout channel: {ticket_channel.mention}\n\n**Wait for all 3 STK members to join before starting fights!**", ephemeral=True)
             else:
-                await interaction.response.send_message("❌ Couldn't create join request. Contact staff.", ephemeral=True)
+                await auto_defer.respond(interaction, "❌ Couldn't create join request. Contact staff.", ephemeral=True)
         except Exception as e:
             logger.error(f"Error creating STK join ticket: {e}")
-            await interaction.response.send_message("❌ Some shit went wrong.", ephemeral=True)
+            await auto_defer.respond(interaction, "❌ Some shit went wrong.", ephemeral=True)
+
+def ticket_category_overwrites(guild: discord.Guild):
+    """Permissions for a ticket category - default deny all, then allow the bot and staff"""
+    category_overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False, send_messages=False),
+        guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+    }
+
+    # Add staff and admin role permissions
+    category_overwrites.update(staff_roles.overwrites(guild, "category"))
+    return category_overwrites
+
+async def create_ticket_channel(guild: discord.Guild, category_name: str, name: str, **kwargs):
+    """Create a text channel in the first category_name category with room, adding overflow categories as needed"""
+    try:
+        category = await ticket_categories.acquire(guild, category_name, lambda: ticket_category_overwrites(guild))
+    except discord.Forbidden:
+        logger.error("No permission to create category")
+        raise
+
+    channel = None
+    try:
+        channel = await outbound.run(TICKET, f"channels:{guild.id}", guild.create_text_channel, name, category=category, **kwargs)
+        return channel
+    finally:
+        ticket_categories.release(category, channel)
 
 async def create_stk_join_ticket(interaction: discord.Interaction):
     """Create a ticket channel for STK join processing"""
@@ -1373,33 +1696,6 @@ async def create_stk_join_ticket(interaction: discord.Interaction):
     if not guild:
         return None
 
-    # Create ticket category if it doesn't exist
-    category = discord.utils.get(guild.categories, name="🥊・STK TRYOUTS")
-    if not category:
-        try:
-            # Set proper permissions for category - default deny all
-            category_overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False, send_messages=False),
-                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-            }
-
-            # Add staff role permissions
-            staff_roles = ['staff', 'mod', 'admin', 'owner', 'stk', 'management', 'manager']
-            for role in guild.roles:
-                if any(keyword in role.name.lower() for keyword in staff_roles):
-                    category_overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-
-            # Add admin role permissions if configured
-            if BotConfig.ADMIN_ROLE_ID:
-                admin_role = guild.get_role(BotConfig.ADMIN_ROLE_ID)
-                if admin_role:
-                    category_overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-
-            category = await guild.create_category("🥊・STK TRYOUTS", overwrites=category_overwrites)
-        except discord.Forbidden:
-            logger.error("No permission to create category")
-            return None
-
     # Create ticket channel
     ticket_name = f"stk-tryout-{interaction.user.name}-{datetime.datetime.now().strftime('%m%d-%H%M')}"
 
@@ -1410,17 +1706,8 @@ async def create_stk_join_ticket(interaction: discord.Interaction):
         guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
     }
 
-    # Add staff role permissions - only specific staff roles can see tryouts
-    staff_roles = ['staff', 'mod', 'admin', 'owner', 'stk', 'management', 'manager', 'support']
-    for role in guild.roles:
-        if any(keyword in role.name.lower() for keyword in staff_roles):
-            overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
-
-    # Add admin role permissions if configured
-    if BotConfig.ADMIN_ROLE_ID:
-        admin_role = guild.get_role(BotConfig.ADMIN_ROLE_ID)
-        if admin_role:
-            overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
+    # Add staff and admin role permissions - only specific staff roles can see tryouts
+    overwrites.update(staff_roles.overwrites(guild, "tryout"))
 
     # Add specific permissions for STK members
     stk_member_ids = [1385239185006268457, 954818761729376357, 1394285950464426066]  # Zpofe, Asai, Drow
@@ -1430,15 +1717,26 @@ async def create_stk_join_ticket(interaction: discord.Interaction):
             overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
 
     try:
-        ticket_channel = await guild.create_text_channel(
+        ticket_channel = await create_ticket_channel(
+            guild,
+            "🥊・STK TRYOUTS",
             ticket_name,
-            category=category,
             overwrites=overwrites,
             topic=f"STK join tryout for {interaction.user.display_name}"
         )
 
-        # Send STK join embed
-        await send_stk_join_embed(ticket_channel, interaction.user)
+        # Record the tryout (so it can be reaped when abandoned) while its embed goes out
+        recorded, sent = await asyncio.gather(
+            bot.db.create_ticket(ticket_channel.id, interaction.user.id, "{}", 0, kind="tryout"),
+            send_stk_join_embed(ticket_channel, interaction.user),
+            return_exceptions=True
+        )
+
+        if recorded is not True or isinstance(sent, BaseException):
+            error = sent if isinstance(sent, BaseException) else recorded if isinstance(recorded, BaseException) else "tryout row not recorded"
+            logger.error(f"Error setting up tryout {ticket_channel.name}, discarding it: {error}")
+            await discard_ticket_channel(ticket_channel)
+            return None
 
         return ticket_channel
 
@@ -1483,7 +1781,7 @@ async def send_stk_join_embed(channel, user):
     embed.set_thumbnail(url=user.display_avatar.url)
     embed.set_footer(text="STK Gang • Elite tryouts • No weak shit", icon_url=channel.guild.me.display_avatar.url)
 
-    await channel.send(embed=embed)
+    await outbound.run(TICKET, f"channel:{channel.id}", channel.send, embed=embed)
 
     # Ping STK members
     ping_message = "🔔 **NEW STK TRYOUT!**\n\n"
@@ -1502,10 +1800,10 @@ async def send_stk_join_embed(channel, user):
 
     ping_message += "\n\n**SOMEONE WANTS TO JOIN STK!**\n**ALL 3 OF YOU NEED TO FIGHT THEM!**"
 
-    await channel.send(ping_message)
+    await outbound.run(TICKET, f"channel:{channel.id}", channel.send, ping_message)
 
     # Add tryout management buttons
-    view = STKTryoutManagementView()
+    view = STKTryoutManagementView(user.id)
     management_embed = discord.Embed(
         title="🛠️ Tryout Controls",
         description="**STK Member Controls**",
@@ -1527,41 +1825,32 @@ async def send_stk_join_embed(channel, user):
         inline=True
     )
 
-    await channel.send(embed=management_embed, view=view)
+    await outbound.run(TICKET, f"channel:{channel.id}", channel.send, embed=management_embed, view=view)
+
+async def assign_customer_role(guild, user_id) -> bool:
+    """Give a member the customer role after checkout; returns whether they have it"""
+    try:
+        member = guild.get_member(user_id)
+        role = guild.get_role(CUSTOMER_ROLE_ID)
+        if not role or not member:
+            logger.error(f"Can't assign customer role to {user_id}: {'role' if not role else 'member'} not found")
+            return False
+        await outbound.run(TICKET, f"roles:{guild.id}", member.add_roles, role)
+        logger.info(f"Assigned customer role to {member.display_name}")
+        return True
+    except Exception as e:
+        logger.error(f"Error assigning customer role: {e}")
+        return False
+
+async def create_purchase_ticket(interaction: discord.Interaction, cart, stages=None):
+    """Create a ticket channel for purchase processing; stages collects per-stage latency if given"""
+    stages = {} if stages is None else stages
+    stage_started = time.perf_counter()
 
-async def create_purchase_ticket(interaction: discord.Interaction, cart):
-    """Create a ticket channel for purchase processing"""
     guild = interaction.guild
     if not guild:
         return None
 
-    # Create ticket category if it doesn't exist
-    category = discord.utils.get(guild.categories, name="🎫・TICKETS")
-    if not category:
-        try:
-            # Set proper permissions for category - default deny all
-            category_overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False, send_messages=False),
-                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-            }
-
-            # Add staff role permissions
-            staff_roles = ['staff', 'mod', 'admin', 'owner', 'stk', 'management', 'manager']
-            for role in guild.roles:
-                if any(keyword in role.name.lower() for keyword in staff_roles):
-                    category_overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-
-            # Add admin role permissions if configured
-            if BotConfig.ADMIN_ROLE_ID:
-                admin_role = guild.get_role(BotConfig.ADMIN_ROLE_ID)
-                if admin_role:
-                    category_overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
-
-            category = await guild.create_category("🎫・TICKETS", overwrites=category_overwrites)
-        except discord.Forbidden:
-            logger.error("No permission to create category")
-            return None
-
     # Create ticket channel
     ticket_name = f"ticket-{interaction.user.name}-{datetime.datetime.now().strftime('%m%d-%H%M')}"
 
@@ -1573,10 +1862,7 @@ async def create_purchase_ticket(interaction: discord.Interaction, cart):
     }
 
     # Add staff role permissions - only specific staff roles can see tickets
-    staff_roles = ['staff', 'mod', 'admin', 'owner', 'stk', 'management', 'manager', 'support']
-    for role in guild.roles:
-        if any(keyword in role.name.lower() for keyword in staff_roles):
-            overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
+    overwrites.update(staff_roles.overwrites(guild, "ticket"))
 
     # Add specific STK members permissions
     stk_member_ids = [1385239185006268457, 954818761729376357, 1394285950464426066]  # Zpofe, Asai, Drow
@@ -1586,15 +1872,30 @@ async def create_purchase_ticket(interaction: discord.Interaction, cart):
             overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_messages=True)
 
     try:
-        ticket_channel = await guild.create_text_channel(
+        ticket_channel = await create_ticket_channel(
+            guild,
+            "🎫・TICKETS",
             ticket_name,
-            category=category,
             overwrites=overwrites,
             topic=f"Purchase ticket for {interaction.user.display_name}"
         )
+        stages["channel"] = time.perf_counter() - stage_started
+
+        # Record the ticket while its messages go out
+        stage_started = time.perf_counter()
+        recorded, sent = await asyncio.gather(
+            bot.db.create_ticket(ticket_channel.id, interaction.user.id, json.dumps(cart.snapshot()), cart.total()),
+            send_ticket_embed(ticket_channel, interaction.user, cart),
+            return_exceptions=True
+        )
+        stages["messages"] = time.perf_counter() - stage_started
 
-        # Send ticket embed
-        await send_ticket_embed(ticket_channel, interaction.user, cart)
+        if recorded is not True or isinstance(sent, BaseException):
+            # A ticket without its row or its payment info is no use to anyone; undo it so checkout can be retried
+            error = sent if isinstance(sent, BaseException) else recorded if isinstance(recorded, BaseException) else "ticket row not recorded"
+            logger.error(f"Error setting up ticket {ticket_channel.name}, discarding it: {error}")
+            await discard_ticket_channel(ticket_channel)
+            return None
 
         return ticket_channel
 
@@ -1602,42 +1903,113 @@ async def create_purchase_ticket(interaction: discord.Interaction, cart):
         logger.error("No permission to create ticket channel")
         return None
 
+async def discard_ticket_channel(channel):
+    """Roll back a half-created ticket or tryout: delete its channel and close its row"""
+    try:
+        await asyncio.gather(
+            outbound.run(TICKET, f"channels:{channel.guild.id}", channel.delete),
+            bot.db.set_ticket_status(channel.id, "closed")
+        )
+    except Exception as e:
+        logger.error(f"Error discarding ticket channel {channel.name}: {e}")
+
+# Payment buttons on purchase tickets
+class PaymentView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label='💀 PAY ZPOFE', style=discord.ButtonStyle.success, custom_id='pay_zpofe')
+    async def pay_zpofe(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = discord.Embed(
+            title="💀 ZPOFE'S PAYMENT",
+            description="**Send payment to Zpofe:**",
+            color=0x00ff00
+        )
+
+        embed.add_field(
+            name="💰 CashApp Link",
+            value=f"[Click here to pay Zpofe]({PAYMENT_METHODS['zpofe']['cashapp']})",
+            inline=False
+        )
+
+        embed.add_field(
+            name="📋 Instructions",
+            value="1️⃣ Click the link above\n2️⃣ Send the exact amount\n3️⃣ Screenshot the payment\n4️⃣ Send proof in this ticket",
+            inline=False
+        )
+
+        if PAYMENT_METHODS["zpofe"]["qr_code"]:
+            embed.set_image(url=PAYMENT_METHODS["zpofe"]["qr_code"])
+
+        embed.set_footer(text="STK Supply • Zpofe's Payment")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @discord.ui.button(label='⚡ PAY DROW', style=discord.ButtonStyle.primary, custom_id='pay_drow')
+    async def pay_drow(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = discord.Embed(
+            title="⚡ DROW'S PAYMENT",
+            description="**Send payment to Drow:**",
+            color=0x3498db
+        )
+
+        embed.add_field(
+            name="💰 CashApp Link",
+            value=f"[Click here to pay Drow]({PAYMENT_METHODS['drow']['cashapp']})",
+            inline=False
+        )
+
+        embed.add_field(
+            name="📋 Instructions",
+            value="1️⃣ Click the link above\n2️⃣ Send the exact amount\n3️⃣ Screenshot the payment\n4️⃣ Send proof in this ticket",
+            inline=False
+        )
+
+        embed.set_footer(text="STK Supply • Drow's Payment")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# Discord allows at most 10 embeds and 6000 embed characters per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+def pack_embeds(embeds):
+    """Group embeds, in order, into as few messages as Discord's limits allow"""
+    batches = []
+    batch = []
+    size = 0
+    for embed in embeds:
+        length = len(embed)
+        if batch and (len(batch) == MAX_EMBEDS_PER_MESSAGE or size + length > MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(embed)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+async def send_embeds(channel, embeds, view=None):
+    """Send embeds in as few messages as possible, attaching view to the first"""
+    for index, batch in enumerate(pack_embeds(embeds)):
+        if index == 0 and view is not None:
+            await outbound.run(TICKET, f"channel:{channel.id}", channel.send, embeds=batch, view=view)
+        else:
+            await outbound.run(TICKET, f"channel:{channel.id}", channel.send, embeds=batch)
+
 async def send_ticket_embed(channel, user, cart):
-    """Send the purchase ticket embed with payment information"""
+    """Send the order summary, payment info, delivery tutorials and staff controls to a ticket.
+
+    Customer-facing embeds are merged into one message (split only if Discord's
+    limits require it) and sent concurrently with the staff ping and controls
+    """
 
     # Calculate total and create detailed items list
-    total = 0
-    weapons_list = []
-    money_list = []
-    watches_list = []
-
-    # Process packages first
-    packages_list = []
-    if cart["packages"]:
-        for package_id in cart["packages"]:
-            if package_id in PACKAGE_DATA:
-                package_info = PACKAGE_DATA[package_id]
-                packages_list.append(f"{package_info['name']} - ${package_info['price']}")
-                total += package_info["price"]
-
-    # Process weapons
-    if cart["weapons"]:
-        for weapon_id in cart["weapons"]:
-            weapons_list.append(WEAPON_DATA[weapon_id]['name'])
-
-    # Process money with pricing
-    if cart["money"]:
-        for money_id in cart["money"]:
-            money_info = MONEY_DATA[money_id]
-            money_list.append(f"{money_info['name']} - ${money_info['price']}")
-            total += money_info["price"]
-
-    # Process watches with pricing
-    if cart["watches"]:
-        for watch_id in cart["watches"]:
-            watch_info = WATCH_DATA[watch_id]
-            watches_list.append(f"{watch_info['name']} - ${watch_info['price']}")
-            total += watch_info["price"]
+    catalog = cart.catalog
+    total = catalog.total(cart)
+    packages_list = catalog.labels_in("packages", cart.packages)
+    weapons_list = catalog.names_in("weapons", cart.weapons)
+    money_list = catalog.labels_in("money", cart.money)
+    watches_list = catalog.labels_in("watches", cart.watches)
 
     # Create detailed order summary embed
     order_embed = discord.Embed(
@@ -1687,16 +2059,14 @@ async def send_ticket_embed(channel, user, cart):
     # Add total
     order_embed.add_field(
         name="💰 TOTAL AMOUNT",
-        value=f"**${total:.2f}**" if total > 0 else "**FREE** (Weapons only)",
+        value=f"**${total:.2f}**" if total > 0 else "**FREE**",
         inline=True
     )
 
     order_embed.set_thumbnail(url=user.display_avatar.url)
     order_embed.set_footer(text="STK Supply • Order Processing", icon_url=channel.guild.me.display_avatar.url)
 
-    await channel.send(embed=order_embed)
-
-    # Send payment options with buttons
+    # Payment options with buttons
     payment_view = PaymentView()
     payment_embed = discord.Embed(
         title="💳 PAYMENT OPTIONS",
@@ -1727,10 +2097,9 @@ async def send_ticket_embed(channel, user, cart):
         payment_embed.set_image(url=PAYMENT_METHODS["zpofe"]["qr_code"])
 
     payment_embed.set_footer(text="STK Supply • Secure Payments")
-    await channel.send(embed=payment_embed, view=payment_view)
 
-    # Send delivery tutorials based on cart contents
-    await send_delivery_tutorials(channel, cart)
+    # Delivery tutorials based on cart contents
+    customer_embeds = [order_embed, payment_embed, *build_delivery_tutorials(cart)]
 
     # Ping sellers
     ping_message = "🔔 **NEW ORDER ALERT!**\n\n"
@@ -1741,10 +2110,9 @@ async def send_ticket_embed(channel, user, cart):
     ping_message += f"⚡ <@{drow_id}> (DROW)"
 
     ping_message += f"\n\n**CUSTOMER:** {user.mention}\n**TOTAL:** ${total:.2f}\n**READY FOR BUSINESS!**"
-    await channel.send(ping_message)
 
     # Add ticket management
-    management_view = TicketManagementView()
+    management_view = TicketManagementView(user.id)
     management_embed = discord.Embed(
         title="🛠️ STAFF CONTROLS",
         description="**Order Management Tools**",
@@ -1753,13 +2121,17 @@ async def send_ticket_embed(channel, user, cart):
     management_embed.add_field(name="✅ Complete", value="Mark order as completed", inline=True)
     management_embed.add_field(name="🔒 Close", value="Close and archive ticket", inline=True)
 
-    await channel.send(embed=management_embed, view=management_view)
+    await asyncio.gather(
+        send_embeds(channel, customer_embeds, view=payment_view),
+        outbound.run(TICKET, f"channel:{channel.id}", channel.send, ping_message, embed=management_embed, view=management_view)
+    )
 
-async def send_delivery_tutorials(channel, cart):
-    """Send appropriate tutorials based on cart contents"""
+def build_delivery_tutorials(cart):
+    """Tutorial embeds for the categories in the cart"""
+    tutorials = []
 
     # Money tutorial
-    if cart["money"]:
+    if cart.money:
         money_embed = discord.Embed(
             title="💰 MONEY DELIVERY TUTORIAL",
             description="**How to receive your money packages:**",
@@ -1785,10 +2157,10 @@ async def send_delivery_tutorials(channel, cart):
         )
 
         money_embed.set_footer(text="STK Supply • Money Delivery")
-        await channel.send(embed=money_embed)
+        tutorials.append(money_embed)
 
     # Weapons tutorial
-    if cart["weapons"]:
+    if cart.weapons:
         weapons_embed = discord.Embed(
             title="🔫 WEAPONS DELIVERY TUTORIAL",
             description="**How to receive your weapons:**",
@@ -1797,9 +2169,10 @@ async def send_delivery_tutorials(channel, cart):
 
         # Check if they need storage
         storage_needed = []
-        if any("bag" in weapon.lower() for weapon in [WEAPON_DATA[w]['name'] for w in cart["weapons"]]):
+        weapon_names = cart.catalog.names_in("weapons", cart.weapons)
+        if any("bag" in weapon.lower() for weapon in weapon_names):
             storage_needed.append("**Get a bag** from safe")
-        if any("trunk" in weapon.lower() for weapon in [WEAPON_DATA[w]['name'] for w in cart["weapons"]]):
+        if any("trunk" in weapon.lower() for weapon in weapon_names):
             storage_needed.append("**Get a car** and empty trunk")
 
         weapons_embed.add_field(
@@ -1833,10 +2206,10 @@ async def send_delivery_tutorials(channel, cart):
         )
 
         weapons_embed.set_footer(text="STK Supply • Weapons Delivery")
-        await channel.send(embed=weapons_embed)
+        tutorials.append(weapons_embed)
 
     # Watches tutorial
-    if cart["watches"]:
+    if cart.watches:
         watch_embed = discord.Embed(
             title="⌚ WATCHES DELIVERY TUTORIAL",
             description="**How to receive your luxury watches:**",
@@ -1856,137 +2229,220 @@ async def send_delivery_tutorials(channel, cart):
         )
 
         watch_embed.set_footer(text="STK Supply • Watch Delivery")
-        await channel.send(embed=watch_embed)
+        tutorials.append(watch_embed)
+
+    return tutorials
+
+# Staff-only check shared by the ticket and tryout controls
+def is_staff(member) -> bool:
+    if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in member.roles):
+        return True
+    return member.guild_permissions.manage_channels
+
+TRANSCRIPT_FAILED_MESSAGE = "⚠️ **Couldn't save the transcript, so this channel was left open.** Check the logs, then close it again."
+
+async def archive_transcript(channel):
+    """Save a channel's transcript before it is deleted; None if it couldn't be saved"""
+    try:
+        return await transcripts.archive(channel)
+    except Exception as e:
+        logger.error(f"Error archiving transcript for #{channel.name}: {e}")
+        return None
+
+async def archive_and_delete(channel) -> bool:
+    """Archive a ticket or tryout channel, delete it and mark it closed.
+    The channel is left open if its transcript couldn't be saved."""
+    path = await archive_transcript(channel)
+    if path is None:
+        await outbound.run(TICKET, f"channel:{channel.id}", channel.send, TRANSCRIPT_FAILED_MESSAGE)
+        return False
+
+    await db.set_ticket_transcript(channel.id, path)
+    try:
+        await outbound.run(TICKET, f"channels:{channel.guild.id}", channel.delete)
+    except discord.NotFound:
+        pass  # Already deleted by hand
+    # Only closed once it is really gone, so a failed delete stays visible to the reaper and retries
+    bot.tickets.forget_channel(channel.id)
+    await db.set_ticket_status(channel.id, "closed")
+    return True
+
+async def delete_closed_channel(channel_id: int) -> bool:
+    """Deletion queue handler for closed tickets and tryouts; returns whether the channel was deleted.
+    Errors are retried by the queue"""
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        # Gone already; just make sure the registry agrees
+        bot.tickets.forget_channel(channel_id)
+        await db.set_ticket_status(channel_id, "closed")
+        return False
+    return await archive_and_delete(channel)
+
+async def reap_ticket(channel, kind) -> bool:
+    """Close a ticket or tryout nobody has written in for TICKET_IDLE_HOURS"""
+    what = "tryout" if kind == "tryout" else "ticket"
+    await outbound.run(BACKGROUND, f"channel:{channel.id}", channel.send, f"🔒 **Closing this {what}: no activity for {BotConfig.TICKET_IDLE_HOURS} hours.**")
+    return await archive_and_delete(channel)
+
+# Tryout actions; user_id is the applicant, or None for buttons sent before it was recorded
+async def accept_stk(interaction: discord.Interaction, user_id=None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="✅ ACCEPTED INTO STK",
+        description="**Welcome to the gang!**\n\nYou've proven yourself. Welcome to STK!",
+        color=0x00ff00,
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    await interaction.response.send_message(embed=embed)
+
+async def reject_stk(interaction: discord.Interaction, user_id=None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="❌ STK TRYOUT REJECTED",
+        description="**Better luck next time.**\n\nYou didn't meet our standards.",
+        color=0xff0000,
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    await interaction.response.send_message(embed=embed)
+
+async def close_tryout(interaction: discord.Interaction, user_id=None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
+        return
+
+    await asyncio.gather(
+        interaction.response.send_message(f"🔒 **Closing tryout channel in {BotConfig.CHANNEL_DELETE_DELAY} seconds...**"),
+        bot.deletions.schedule(interaction.channel.id, BotConfig.CHANNEL_DELETE_DELAY, f"tryout closed by {interaction.user}")
+    )
+
+# Order ticket actions; user_id is the customer, or None for buttons sent before it was recorded
+async def complete_order(interaction: discord.Interaction, user_id=None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("❌ Only STK staff can do this.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="✅ ORDER COMPLETED",
+        description="**Thank you for your business!**\n\nOrder has been marked as completed.",
+        color=0x00ff00,
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    await asyncio.gather(
+        interaction.response.send_message(embed=embed),
+        db.set_ticket_status(interaction.channel.id, "completed")
+    )
+
+async def close_ticket(interaction: discord.Interaction, user_id=None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("❌ Only STK staff can do this.", ephemeral=True)
+        return
+
+    await asyncio.gather(
+        interaction.response.send_message(f"🔒 **Closing ticket in {BotConfig.CHANNEL_DELETE_DELAY} seconds...**"),
+        bot.deletions.schedule(interaction.channel.id, BotConfig.CHANNEL_DELETE_DELAY, f"ticket closed by {interaction.user}")
+    )
+
+# Staff button dispatch table: custom_id action -> (label, style, handler)
+STAFF_ACTIONS = {
+    "tryout:accept": ('✅ ACCEPT', discord.ButtonStyle.success, accept_stk),
+    "tryout:reject": ('❌ REJECT', discord.ButtonStyle.danger, reject_stk),
+    "tryout:close": ('🔒 CLOSE', discord.ButtonStyle.secondary, close_tryout),
+    "ticket:complete": ('✅ COMPLETE', discord.ButtonStyle.success, complete_order),
+    "ticket:close": ('🔒 CLOSE', discord.ButtonStyle.secondary, close_ticket),
+}
+
+# Staff button whose custom_id ("ticket:close:<user id>") carries all of its state, so one
+# registered handler answers it on every ticket, across restarts, with nothing kept per message
+class StaffActionButton(discord.ui.DynamicItem[discord.ui.Button], template=r"(?P<action>(?:ticket|tryout):[a-z]+):(?P<user_id>[0-9]+)"):
+    def __init__(self, action: str, user_id: int):
+        label, style, _ = STAFF_ACTIONS[action]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=f"{action}:{user_id}"))
+        self.action = action
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        if match["action"] not in STAFF_ACTIONS:
+            raise ValueError(f"Unknown staff action {match['action']}")
+        return cls(match["action"], int(match["user_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        _, _, handler = STAFF_ACTIONS[self.action]
+        await handler(interaction, self.user_id)
 
 # STK Tryout Management View
 class STKTryoutManagementView(discord.ui.View):
-    def __init__(self):
+    """Tryout controls. Pass the applicant's id for new channels; the bare instance
+    registered at startup serves the static custom_ids on older channels."""
+
+    def __init__(self, user_id=None):
         super().__init__(timeout=None)
+        if user_id is not None:
+            self.clear_items()
+            for action in ("tryout:accept", "tryout:reject", "tryout:close"):
+                self.add_item(StaffActionButton(action, user_id))
 
     @discord.ui.button(label='✅ ACCEPT', style=discord.ButtonStyle.success, custom_id='accept_stk')
     async def accept_stk(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Check permissions
-        has_permission = False
-        if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
-            has_permission = True
-        elif interaction.user.guild_permissions.manage_channels:
-            has_permission = True
-
-        if not has_permission:
-            await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
-            return
-
-        embed = discord.Embed(
-            title="✅ ACCEPTED INTO STK",
-            description="**Welcome to the gang!**\n\nYou've proven yourself. Welcome to STK!",
-            color=0x00ff00,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
-        )
-
-        await interaction.response.send_message(embed=embed)
+        await accept_stk(interaction)
 
     @discord.ui.button(label='❌ REJECT', style=discord.ButtonStyle.danger, custom_id='reject_stk')
     async def reject_stk(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Check permissions
-        has_permission = False
-        if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
-            has_permission = True
-        elif interaction.user.guild_permissions.manage_channels:
-            has_permission = True
-
-        if not has_permission:
-            await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
-            return
-
-        embed = discord.Embed(
-            title="❌ STK TRYOUT REJECTED",
-            description="**Better luck next time.**\n\nYou didn't meet our standards.",
-            color=0xff0000,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
-        )
-
-        await interaction.response.send_message(embed=embed)
+        await reject_stk(interaction)
 
     @discord.ui.button(label='🔒 CLOSE', style=discord.ButtonStyle.secondary, custom_id='close_tryout')
     async def close_tryout(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Check permissions
-        has_permission = False
-        if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
-            has_permission = True
-        elif interaction.user.guild_permissions.manage_channels:
-            has_permission = True
-
-        if not has_permission:
-            await interaction.response.send_message("❌ Only STK members can do this.", ephemeral=True)
-            return
-
-        await interaction.response.send_message("🔒 **Closing tryout channel in 5 seconds...**")
-        await asyncio.sleep(5)
-        await interaction.channel.delete()
+        await close_tryout(interaction)
 
 # Ticket Management View
 class TicketManagementView(discord.ui.View):
-    def __init__(self):
+    """Order ticket controls. Pass the customer's id for new tickets; the bare instance
+    registered at startup serves the static custom_ids on older tickets."""
+
+    def __init__(self, user_id=None):
         super().__init__(timeout=None)
+        if user_id is not None:
+            self.clear_items()
+            for action in ("ticket:complete", "ticket:close"):
+                self.add_item(StaffActionButton(action, user_id))
 
     @discord.ui.button(label='✅ COMPLETE', style=discord.ButtonStyle.success, custom_id='complete_order')
     async def complete_order(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Check permissions
-        has_permission = False
-        if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
-            has_permission = True
-        elif interaction.user.guild_permissions.manage_channels:
-            has_permission = True
-
-        if not has_permission:
-            await interaction.response.send_message("❌ Only STK staff can do this.", ephemeral=True)
-            return
-
-        embed = discord.Embed(
-            title="✅ ORDER COMPLETED",
-            description="**Thank you for your business!**\n\nOrder has been marked as completed.",
-            color=0x00ff00,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
-        )
-
-        await interaction.response.send_message(embed=embed)
+        await complete_order(interaction)
 
     @discord.ui.button(label='🔒 CLOSE', style=discord.ButtonStyle.secondary, custom_id='close_ticket')
     async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Check permissions
-        has_permission = False
-        if BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
-            has_permission = True
-        elif interaction.user.guild_permissions.manage_channels:
-            has_permission = True
-
-        if not has_permission:
-            await interaction.response.send_message("❌ Only STK staff can do this.", ephemeral=True)
-            return
-
-        await interaction.response.send_message("🔒 **Closing ticket in 5 seconds...**")
-        await asyncio.sleep(5)
-        await interaction.channel.delete()
+        await close_ticket(interaction)
 
 # Shop Entry View - For setup command
 class ShopEntryView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
 
-    @discord.ui.button(label='🛒 OPEN SHOP', style=discord.ButtonStyle.success, emoji='🔥', row=1)
+    @discord.ui.button(label='🛒 OPEN SHOP', style=discord.ButtonStyle.success, emoji='🔥', row=1, custom_id='shop_entry_open')
+    @auto_defer
     async def open_shop(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Create a personal shop for the user
         view = PersonalSTKShopView(interaction.user.id)
         embed = view.create_personal_shop_embed()
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        await auto_defer.respond(interaction, embed=embed, view=view, ephemeral=True)
 
-    @discord.ui.button(label='🏪 VIEW ALL SHOPS', style=discord.ButtonStyle.primary, emoji='🌍', row=1)
+    @discord.ui.button(label='🏪 VIEW ALL SHOPS', style=discord.ButtonStyle.primary, emoji='🌍', row=1, custom_id='shop_entry_all_shops')
     async def view_all_shops(self, interaction: discord.Interaction, button: discord.ui.Button):
         view = ShopSelectorView()
         embed = view.create_selector_embed()
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
-    @discord.ui.button(label='ℹ️ ABOUT STK', style=discord.ButtonStyle.secondary, emoji='💀', row=1)
+    @discord.ui.button(label='ℹ️ ABOUT STK', style=discord.ButtonStyle.secondary, emoji='💀', row=1, custom_id='shop_entry_about')
     async def about_stk(self, interaction: discord.Interaction, button: discord.ui.Button):
         view = STKBoardView()
         embed = view.create_board_embed()
@@ -2192,82 +2648,85 @@ STK_BOARD_MEMBERS = {
 # STK Board member IDs for permission checking
 STK_BOARD_IDS = [1385239185006268457, 1394285950464426066, 666394721039417346, 954818761729376357]
 
-# STK Board View
-class STKBoardView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
+@embed_templates.register("stk_board")
+def build_board_embed():
+    embed = discord.Embed(
+        title="💀 STK (SHOOT TO KILL) 💀",
+        description="**THE MOST FEARED GANG IN THE STREETS**\n\n🔥 **WELCOME TO STK TERRITORY** 🔥",
+        color=0xFF0000
+    )
 
-    def create_board_embed(self):
-        embed = discord.Embed(
-            title="💀 STK (SHOOT TO KILL) 💀",
-            description="**THE MOST FEARED GANG IN THE STREETS**\n\n🔥 **WELCOME TO STK TERRITORY** 🔥",
-            color=0xFF0000,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
-        )
+    embed.add_field(
+        name="🏙️ WHO WE ARE",
+        value="STK (Shoot to Kill) is the most elite and respected gang operating in Tha Bronx 3. We provide premium undetected services, fast dupes, and maintain our reputation through elite operations and unmatched street credibility.",
+        inline=False
+    )
 
-        embed.add_field(
-            name="🏙️ WHO WE ARE",
-            value="STK (Shoot to Kill) is the most elite and respected gang operating in Tha Bronx 3. We provide premium undetected services, fast dupes, and maintain our reputation through elite operations and unmatched street credibility.",
-            inline=False
-        )
+    embed.add_field(
+        name="👑 OUR LEADERSHIP",
+        value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n🏛️ **AVERY** - STK Founder\n\n🪖 Professional hierarchy with proven results",
+        inline=True
+    )
 
-        embed.add_field(
-            name="👑 OUR LEADERSHIP",
-            value="💎 **ZPOFE** - Chief Architect & Elite Developer\n⚡ **ASAI** - Operations General\n🔥 **DROW** - Multi-Role Elite\n🏛️ **AVERY** - STK Founder\n\n🪖 Professional hierarchy with proven results",
-            inline=True
-        )
+    embed.add_field(
+        name="🎯 WHAT WE PROVIDE",
+        value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
+        inline=True
+    )
 
-        embed.add_field(
-            name="🎯 WHAT WE PROVIDE",
-            value="• Elite quality undetected services\n• Fast dupes with infinite money supply\n• Premium weapons & luxury items\n• 24/7 business operations\n• Most trusted connects in the game\n• Response time: 2-5 minutes\n• 99.9% success rate",
-            inline=True
-        )
+    embed.add_field(
+        name="📍 OUR TERRITORY",
+        value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
+        inline=False
+    )
 
-        embed.add_field(
-            name="📍 OUR TERRITORY",
-            value="🏙️ **Primary Base:** Tha Bronx 3\n🌍 **Expanding:** New territories coming soon\n💯 **Reputation:** 50+ satisfied customers\n⚡ **Business Hours:** 24/7 grinding",
-            inline=False
-        )
+    embed.add_field(
+        name="💰 WHERE TO BUY",
+        value=f"🛒 **SHOP NOW:** <#{1398576146441965629}>\n\n🔥 **All premium services available**\n💎 **Elite quality guaranteed**\n⚡ **Fast delivery & professional service**",
+        inline=True
+    )
 
-        embed.add_field(
-            name="💰 WHERE TO BUY",
-            value=f"🛒 **SHOP NOW:** <#{1398576146441965629}>\n\n🔥 **All premium services available**\n💎 **Elite quality guaranteed**\n⚡ **Fast delivery & professional service**",
-            inline=True
-        )
+    embed.add_field(
+        name="💀 THE STK CODE",
+        value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
+        inline=True
+    )
 
-        embed.add_field(
-            name="💀 THE STK CODE",
-            value="• Respect the gang hierarchy\n• Elite members only - no weak links\n• Business first, always professional\n• Undetected services guaranteed\n• Fast delivery, no delays",
-            inline=True
-        )
+    embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif")
+    embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply", icon_url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069645164937368/standard_2.gif")
+    return embed
 
-        embed.set_image(url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069644812357753/standard.gif")
-        embed.set_footer(text="STK Supply • Elite Quality • Undetected Services • Fast Dupes • Infinite Money Supply", icon_url="https://cdn.discordapp.com/attachments/1398907047734673500/1406069645164937368/standard_2.gif")
-        return embed
+# STK Board View
+class STKBoardView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    def create_board_embed(self):
+        return embed_templates.get("stk_board", timestamp=datetime.datetime.now(datetime.timezone.utc))
 
-    @discord.ui.button(label='◀️ BACK TO MAIN', style=discord.ButtonStyle.secondary, emoji='🏠', row=1)
+    @discord.ui.button(label='◀️ BACK TO MAIN', style=discord.ButtonStyle.secondary, emoji='🏠', row=1, custom_id='stk_board_back')
     async def back_to_main(self, interaction: discord.Interaction, button: discord.ui.Button):
         view = PersistentSTKShopView()
         embed = view.create_shop_embed()
         await interaction.response.edit_message(embed=embed, view=view)
 
-    @discord.ui.button(label='💎 MEET ZPOFE', style=discord.ButtonStyle.primary, emoji='💎', row=1)
+    @discord.ui.button(label='💎 MEET ZPOFE', style=discord.ButtonStyle.primary, emoji='💎', row=1, custom_id='stk_board_zpofe')
     async def zpofe_profile(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.show_member_profile(interaction, "zpofe")
 
-    @discord.ui.button(label='👑 MEET ASAI', style=discord.ButtonStyle.success, emoji='👑', row=1)
+    @discord.ui.button(label='👑 MEET ASAI', style=discord.ButtonStyle.success, emoji='👑', row=1, custom_id='stk_board_asai')
     async def asai_profile(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.show_member_profile(interaction, "asai")
 
-    @discord.ui.button(label='⚡ MEET DROW', style=discord.ButtonStyle.danger, emoji='⚡', row=2)
+    @discord.ui.button(label='⚡ MEET DROW', style=discord.ButtonStyle.danger, emoji='⚡', row=2, custom_id='stk_board_drow')
     async def drow_profile(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.show_member_profile(interaction, "drow")
 
-    @discord.ui.button(label='🏛️ MEET AVERY', style=discord.ButtonStyle.secondary, emoji='🏛️', row=2)
+    @discord.ui.button(label='🏛️ MEET AVERY', style=discord.ButtonStyle.secondary, emoji='🏛️', row=2, custom_id='stk_board_avery')
     async def avery_profile(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.show_member_profile(interaction, "avery")
 
-    @discord.ui.button(label='📞 CONTACT TEAM', style=discord.ButtonStyle.primary, emoji='📱', row=3)
+    @discord.ui.button(label='📞 CONTACT TEAM', style=discord.ButtonStyle.primary, emoji='📱', row=3, custom_id='stk_board_contact')
     async def contact_team(self, interaction: discord.Interaction, button: discord.ui.Button):
         embed = discord.Embed(
             title="📞 CONTACT STK TEAM",
@@ -2454,6 +2913,9 @@ class CardEditorModal(discord.ui.Modal):
                 inline=False
             )
 
+            # Board embeds are cached templates; rebuild them with the new card
+            embed_templates.invalidate()
+
             await interaction.response.send_message(embed=embed, ephemeral=True)
             logger.info(f"{interaction.user.display_name} updated {member['name']}'s card")
 
@@ -2604,6 +3066,105 @@ async def setup_stk_join(interaction: discord.Interaction):
         if not interaction.response.is_done():
             await interaction.response.send_message("❌ Some shit went wrong.", ephemeral=True)
 
+# Reload catalog command
+@bot.tree.command(name="reloadcatalog", description="Reload the shop catalog from the database (staff only)")
+async def reload_catalog(interaction: discord.Interaction):
+    """Hot-reload the shop catalog without restarting the bot"""
+    try:
+        # Check permissions
+        has_permission = False
+        if interaction.user.guild_permissions.manage_channels:
+            has_permission = True
+        elif BotConfig.ADMIN_ROLE_ID and any(role.id == BotConfig.ADMIN_ROLE_ID for role in interaction.user.roles):
+            has_permission = True
+
+        if not has_permission:
+            await interaction.response.send_message("❌ You need admin permissions.", ephemeral=True)
+            return
+
+        catalog = await bot.catalog_cache.reload()
+        counts = "\n".join(f"• **{category.upper()}:** {len(catalog.ids[category])}" for category in catalog.categories)
+        await interaction.response.send_message(f"✅ **Catalog reloaded** (v{catalog.version})\n\n{counts}", ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error in reload_catalog command: {e}")
+        if not interaction.response.is_done():
+            await interaction.response.send_message("❌ Couldn't reload the catalog. Check the logs.", ephemeral=True)
+
+@bot.tree.command(name="opentickets", description="List open purchase tickets (staff only)")
+async def open_tickets(interaction: discord.Interaction):
+    """List open and completed-but-not-closed purchase tickets from the ticket registry"""
+    try:
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("❌ You need admin permissions.", ephemeral=True)
+            return
+
+        open_rows, completed_rows = await asyncio.gather(db.get_tickets("open", 10), db.get_tickets("completed", 10))
+        embed = discord.Embed(
+            title="🎫 OPEN TICKETS",
+            description="**Oldest first.** Completed tickets stay listed until they are closed.",
+            color=0x39FF14
+        )
+        for name, rows in (("🟢 Open", open_rows), ("✅ Completed", completed_rows)):
+            lines = [f"<#{channel_id}> • <@{user_id}> • ${total:.2f} • {created_at}" for channel_id, user_id, _, total, created_at in rows]
+            embed.add_field(name=name, value="\n".join(lines) or "None", inline=False)
+        last_run = bot.reaper.last_run
+        if last_run:
+            embed.add_field(
+                name="🧹 Auto-close",
+                value=f"Last run <t:{int(last_run['at'].timestamp())}:R>: **{last_run['reaped']}** closed, {last_run['failed']} failed "
+                      f"({last_run['checked']} checked) • **{bot.reaper.reaped_count}** closed in {bot.reaper.runs} run(s)",
+                inline=False
+            )
+        embed.set_footer(text="STK Supply • Ticket registry")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error in open_tickets command: {e}")
+        if not interaction.response.is_done():
+            await interaction.response.send_message("❌ Couldn't load tickets. Check the logs.", ephemeral=True)
+
+@bot.tree.command(name="botstats", description="Show outbound queue and background task stats (staff only)")
+async def bot_stats(interaction: discord.Interaction):
+    """Outbound queue depth and shedding, plus the background workers' counters"""
+    try:
+        if not is_staff(interaction.user):
+            await interaction.response.send_message("❌ You need admin permissions.", ephemeral=True)
+            return
+
+        stats = outbound.stats()
+        depths = " • ".join(f"{name} **{depth}**" for name, depth in stats["depth_by_priority"].items())
+        shed = " • ".join(f"{name} **{count}**" for name, count in stats["shed"].items())
+        embed = discord.Embed(title="📊 BOT STATS", color=0x39FF14)
+        embed.add_field(
+            name="📤 Outbound queue",
+            value=f"**{stats['depth']}** queued (peak {stats['peak_depth']}) • **{stats['in_flight']}** in flight\n"
+                  f"Queued: {depths}\nShed: {shed}\nRate limited: **{stats['rate_limited']}** • Routes tracked: {stats['routes']}",
+            inline=False
+        )
+        embed.add_field(
+            name="🧹 Background",
+            value=f"Channels deleted: **{bot.deletions.deleted_count}** ({bot.deletions.skipped_count} skipped, {bot.deletions.failed_count} gave up)\n"
+                  f"Stale tickets closed: **{bot.reaper.reaped_count}** in {bot.reaper.runs} run(s)\n"
+                  f"Auto-deferred: **{auto_defer.deferred_count}** of {auto_defer.handled_count} interactions",
+            inline=False
+        )
+        joins = bot.joins.stats()
+        latency = f"p50 **{joins['p50'] * 1000:.0f}ms** • p99 **{joins['p99'] * 1000:.0f}ms**" if joins["p50"] is not None else "no samples yet"
+        embed.add_field(
+            name="👋 Joins",
+            value=f"**{joins['processed']}** processed in {joins['batches']} batch(es) • {joins['pending']} pending\n"
+                  f"Left before processing: {joins['left']} • Role failures: {joins['failed']}\nJoin to role: {latency}",
+            inline=False
+        )
+        embed.set_footer(text="STK Supply • Since last restart")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error in bot_stats command: {e}")
+        if not interaction.response.is_done():
+            await interaction.response.send_message("❌ Couldn't load stats. Check the logs.", ephemeral=True)
+
 
 # Error handling
 @bot.tree.error
@@ -2641,7 +3202,20 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
     except Exception as e:
         logger.error(f"Unexpected error in error handler: {e}")
 
+startup_profile.mark("views and commands")
+
+async def profile_startup():
+    """Run the pre-gateway startup work without logging in, for --profile-startup"""
+    async with bot:
+        await bot.setup_hook()
+
 if __name__ == "__main__":
+    if startup_profile.enabled:
+        startup_profile.stop_tracking_imports()
+        asyncio.run(profile_startup())
+        print(startup_profile.report())
+        sys.exit(0)
+
     try:
         # Add connection retries and better error handling
         import time
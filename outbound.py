@@ -0,0 +1,247 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most important first
+INTERACTION, TICKET, WELCOME, BACKGROUND = range(4)
+PRIORITY_NAMES = ("interaction", "ticket", "welcome", "background")
+
+# Route kind -> (requests, per seconds). Routes are "<kind>:<id>", e.g. "channel:123"
+DEFAULT_ROUTE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "interaction": (5, 1.0),
+    "channel": (5, 5.0),
+    "roles": (10, 10.0),
+    "presence": (5, 60.0),
+}
+DEFAULT_LIMIT = (5, 5.0)
+
+class Shed(Exception):
+    """Raised for outbound work dropped because the queue was full of more important work"""
+
+class TokenBucket:
+    """Allows capacity requests at once, refilled at capacity per ``per`` seconds"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "paused_until")
+
+    def __init__(self, capacity: int, per: float, now: float):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = now
+        self.paused_until = 0.0
+
+    def delay(self, now: float, reserve: int = 0) -> float:
+        """Seconds until a request may be made (0 if one may be made now) while leaving reserve tokens unused"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        needed = 1 + reserve
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, until: float):
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 0.0
+
+    def idle(self, now: float) -> bool:
+        return now >= self.paused_until and self.delay(now) == 0 and self.tokens >= self.capacity
+
+class _Job:
+    __slots__ = ("priority", "route", "func", "args", "kwargs", "future", "queued_at")
+
+    def __init__(self, priority, route, func, args, kwargs, future, queued_at):
+        self.priority = priority
+        self.route = route
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.queued_at = queued_at
+
+class OutboundScheduler:
+    """Single gate for outbound Discord API calls.
+
+    Calls are queued by priority class and run by a fixed number of workers.
+    A worker takes the most important queued call whose route bucket and the
+    global bucket both have a token, so bursts are spread out here instead
+    of piling up as 429 retries inside discord.py, and a throttled route
+    never holds a worker while other work is ready. Welcome and background
+    calls leave a reserved share of each route's tokens to interaction and
+    ticket calls on the same route. The queue is bounded: when it is full,
+    new work evicts the least important queued job if it outranks it, and
+    is shed otherwise; shed work fails with Shed.
+    """
+
+    def __init__(self, max_queue: int = 1000, concurrency: int = 8, route_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 global_limit: Tuple[int, float] = (40, 1.0), reserved_share: float = 0.3, clock: Callable[[], float] = time.monotonic):
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self.route_limits = dict(DEFAULT_ROUTE_LIMITS if route_limits is None else route_limits)
+        self.reserved_share = reserved_share
+        self._clock = clock
+        self._global = TokenBucket(*global_limit, clock())
+        self._buckets: Dict[str, TokenBucket] = {}
+        # Min-heap of (priority, sequence, job); the sequence keeps each class first in, first out
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._sequence = itertools.count()
+        self._wake = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.peak_depth = 0
+        self.completed = [0] * len(PRIORITY_NAMES)
+        self.shed = [0] * len(PRIORITY_NAMES)
+        self.rate_limited = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def depth_by_priority(self) -> Dict[str, int]:
+        depths = [0] * len(PRIORITY_NAMES)
+        for priority, _, _ in self._heap:
+            depths[priority] += 1
+        return dict(zip(PRIORITY_NAMES, depths))
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._heap),
+            "depth_by_priority": self.depth_by_priority(),
+            "peak_depth": self.peak_depth,
+            "in_flight": self.in_flight,
+            "completed": dict(zip(PRIORITY_NAMES, self.completed)),
+            "shed": dict(zip(PRIORITY_NAMES, self.shed)),
+            "rate_limited": self.rate_limited,
+            "routes": len(self._buckets),
+        }
+
+    async def run(self, priority: int, route: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Queue func(*args, **kwargs) and wait for its result. Raises Shed if it was dropped."""
+        return await self.submit(priority, route, func, *args, **kwargs)
+
+    def submit(self, priority: int, route: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Future:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(priority, route, func, args, kwargs, future, self._clock())
+
+        if len(self._heap) >= self.max_queue:
+            worst = max(self._heap, key=lambda entry: (entry[0], entry[1]))
+            if worst[0] <= priority:
+                self._shed(job)
+                return future
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self._shed(worst[2])
+
+        heapq.heappush(self._heap, (priority, next(self._sequence), job))
+        self.peak_depth = max(self.peak_depth, len(self._heap))
+        self._wake.set()
+        return future
+
+    def _shed(self, job: _Job):
+        self.shed[job.priority] += 1
+        if not job.future.done():
+            job.future.set_exception(Shed(f"Outbound queue full; dropped {PRIORITY_NAMES[job.priority]} call on {job.route}"))
+        if sum(self.shed) % 100 == 1:
+            logger.warning(f"Outbound queue full ({len(self._heap)} queued); shedding {PRIORITY_NAMES[job.priority]} work, {sum(self.shed)} dropped so far")
+
+    def bucket(self, route: str) -> TokenBucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            now = self._clock()
+            if len(self._buckets) >= 1000:
+                # Forget routes that are back to a full bucket; they start full anyway
+                for name in [name for name, other in self._buckets.items() if other.idle(now)]:
+                    del self._buckets[name]
+            limit = self.route_limits.get(route.split(":", 1)[0], DEFAULT_LIMIT)
+            bucket = self._buckets[route] = TokenBucket(*limit, now)
+        return bucket
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        for _, _, job in self._heap:
+            job.future.cancel()
+        self._heap.clear()
+
+    def _pick(self, now: float) -> Tuple[Optional[_Job], Optional[float]]:
+        """Take the most important ready job, spending its tokens; otherwise None and the seconds until one may be ready"""
+        wait = self._global.delay(now)
+        if wait > 0:
+            return None, wait
+
+        delays: Dict[Tuple[str, int], float] = {}
+        for entry in sorted(self._heap):
+            priority, _, job = entry
+            if job.future.done():
+                self._remove(entry)
+                continue
+            bucket = self.bucket(job.route)
+            reserve = self.reserve(bucket) if priority > TICKET else 0
+            delay = delays.get((job.route, reserve))
+            if delay is None:
+                delay = delays[(job.route, reserve)] = bucket.delay(now, reserve)
+            if delay <= 0:
+                self._remove(entry)
+                bucket.take()
+                self._global.take()
+                return job, None
+            wait = delay if wait <= 0 else min(wait, delay)
+        return None, wait if wait > 0 else None
+
+    def reserve(self, bucket: TokenBucket) -> int:
+        """Tokens of a route that welcome and background calls may not use"""
+        return min(bucket.capacity - 1, int(bucket.capacity * self.reserved_share))
+
+    def _remove(self, entry: Tuple[int, int, _Job]):
+        if self._heap[0] is entry:
+            heapq.heappop(self._heap)
+        else:
+            self._heap.remove(entry)
+            heapq.heapify(self._heap)
+
+    async def _next_job(self) -> _Job:
+        while True:
+            # No awaits between clearing and waiting, so a submit() can't slip through unnoticed
+            self._wake.clear()
+            job, wait = self._pick(self._clock())
+            if job is not None:
+                return job
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            bucket = self.bucket(job.route)
+            self.in_flight += 1
+            try:
+                result = await job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                if isinstance(e, discord.HTTPException) and e.status == 429:
+                    # discord.py gave up waiting; hold the route back for a while
+                    self.rate_limited += 1
+                    bucket.pause(self._clock() + getattr(e, "retry_after", 5.0))
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.completed[job.priority] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.in_flight -= 1
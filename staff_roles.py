@@ -0,0 +1,52 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class StaffRoleCache:
+    """Per-guild staff roles and the permission overwrites granted to them.
+
+    Staff roles are recognised by keywords in their names, which takes a
+    pass over every role in the guild. Each named overwrite set is built
+    with one such pass per guild and kept until a role change invalidates
+    the guild; ticket creation then only copies the prebuilt dict.
+    """
+
+    def __init__(self, admin_role_id: Optional[int] = None):
+        self.admin_role_id = admin_role_id
+        self._specs: Dict[str, Tuple[Tuple[str, ...], discord.PermissionOverwrite, bool]] = {}
+        self._cache: Dict[int, Dict[str, Dict[discord.Role, discord.PermissionOverwrite]]] = {}
+
+    def define(self, name: str, keywords: Iterable[str], permissions: discord.PermissionOverwrite, include_admin: bool = True):
+        """Register an overwrite set: permissions for roles whose name contains any keyword"""
+        self._specs[name] = (tuple(keywords), permissions, include_admin)
+        self._cache.clear()
+
+    def overwrites(self, guild: discord.Guild, name: str) -> Dict[discord.Role, discord.PermissionOverwrite]:
+        """New overwrites dict for the guild's staff roles, safe for the caller to extend"""
+        guild_cache = self._cache.setdefault(guild.id, {})
+        overwrites = guild_cache.get(name)
+        if overwrites is None:
+            overwrites = guild_cache[name] = self._build(guild, name)
+        return dict(overwrites)
+
+    def _build(self, guild: discord.Guild, name: str) -> Dict[discord.Role, discord.PermissionOverwrite]:
+        keywords, permissions, include_admin = self._specs[name]
+        overwrites = {
+            role: permissions for role in guild.roles
+            if any(keyword in role.name.lower() for keyword in keywords)
+        }
+
+        if include_admin and self.admin_role_id:
+            admin_role = guild.get_role(self.admin_role_id)
+            if admin_role:
+                overwrites[admin_role] = permissions
+
+        logger.info(f"Resolved {len(overwrites)} staff role(s) for '{name}' in guild {guild.id}")
+        return overwrites
+
+    def invalidate(self, guild_id: int):
+        """Forget a guild's staff roles so they are resolved again on next use"""
+        self._cache.pop(guild_id, None)
@@ -0,0 +1,73 @@
+import builtins
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+class StartupProfile:
+    """Wall-clock timings for startup, enabled with ``python main.py --profile-startup``.
+
+    track_imports() times each import statement executed directly by one
+    module (its cost includes everything that import pulls in). mark()
+    records the time since the previous mark as a phase, and phase() times
+    a named block. All of them are no-ops when disabled.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports: List[Tuple[str, float]] = []
+        self.phases: List[Tuple[str, float]] = []
+        self._original_import = None
+        self._last_mark = self.started
+
+    def track_imports(self, module_name: str = "__main__"):
+        """Time import statements run at the top level of module_name"""
+        if not self.enabled or self._original_import is not None:
+            return
+
+        original_import = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if not globals or globals.get("__name__") != module_name:
+                return original_import(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self.imports.append((name, time.perf_counter() - start))
+
+        builtins.__import__ = timed_import
+
+    def stop_tracking_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, name: str):
+        """Record the time since the previous mark (or since startup) as phase name"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, top: int = 15) -> str:
+        lines = [f"Startup profile: {(time.perf_counter() - self.started) * 1000:.1f} ms total"]
+        lines.append("Imports (slowest first):")
+        for name, seconds in sorted(self.imports, key=lambda entry: entry[1], reverse=True)[:top]:
+            lines.append(f"  {seconds * 1000:8.1f} ms  {name}")
+        lines.append("Phases:")
+        for name, seconds in self.phases:
+            lines.append(f"  {seconds * 1000:8.1f} ms  {name}")
+        return "\n".join(lines)
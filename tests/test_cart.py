@@ -0,0 +1,74 @@
+import pytest
+
+from cart_store import Cart
+from catalog import Catalog
+
+def make_catalog(weapons=20, money=3, watches=0, packages=2):
+    def items(prefix, count):
+        return {f"{prefix}{n}": {"name": f"{prefix.title()} {n}", "price": n + 1} for n in range(count)}
+    return Catalog({
+        "weapons": items("gun", weapons),
+        "money": items("cash", money),
+        "watches": items("watch", watches),
+        "packages": items("pkg", packages),
+    })
+
+CATALOG = make_catalog()
+
+def test_empty_cart_round_trips():
+    cart = Cart(CATALOG)
+    assert cart.to_int() == 0
+    assert cart.to_bytes() == b""
+    assert not Cart.from_bytes(CATALOG, b"")
+
+@pytest.mark.parametrize("selection", [
+    {"weapons": ["gun0"]},
+    {"weapons": ["gun19"], "packages": ["pkg1"]},
+    {"weapons": [f"gun{n}" for n in range(20)], "money": ["cash0", "cash2"], "packages": ["pkg0", "pkg1"]},
+    {"money": ["cash1"]},
+])
+def test_packed_cart_round_trips(selection):
+    cart = Cart(CATALOG)
+    for category, item_ids in selection.items():
+        cart.add(category, item_ids)
+
+    for restored in (Cart.from_int(CATALOG, cart.to_int()), Cart.from_bytes(CATALOG, cart.to_bytes())):
+        for category in CATALOG.categories:
+            assert restored.items(category) == selection.get(category, [])
+
+def test_categories_do_not_overlap_when_packed():
+    cart = Cart(CATALOG)
+    cart.add("money", ["cash0"])
+    # Money sits right after the 20 weapon bits
+    assert cart.to_int() == 1 << 20
+    assert Cart.from_int(CATALOG, cart.to_int()).count("weapons") == 0
+
+def test_items_follow_catalog_order_and_ignore_unknown_ids():
+    cart = Cart(CATALOG)
+    assert cart.add("weapons", ["gun5", "gun1", "nope"]) == 2
+    assert cart.items("weapons") == ["gun1", "gun5"]
+    assert cart.has("weapons", "gun5")
+    assert not cart.has("weapons", "nope")
+
+def test_snapshot_lists_non_empty_categories():
+    cart = Cart(CATALOG)
+    cart.add("packages", ["pkg1"])
+    assert cart.snapshot() == {"packages": ["pkg1"]}
+
+def test_rebind_keeps_items_still_sold():
+    cart = Cart(CATALOG)
+    cart.add("weapons", ["gun3", "gun15"])
+    smaller = make_catalog(weapons=10)
+    rebound = cart.rebind(smaller)
+    assert rebound.items("weapons") == ["gun3"]
+    assert rebound.catalog is smaller
+    assert Cart.from_int(smaller, rebound.to_int()).items("weapons") == ["gun3"]
+
+def test_from_layout_reads_carts_packed_against_another_catalog():
+    cart = Cart(CATALOG)
+    cart.add("weapons", ["gun3", "gun15"])
+    cart.add("packages", ["pkg1"])
+    smaller = make_catalog(weapons=10)
+    restored = Cart.from_layout(smaller, CATALOG.layout, cart.to_bytes())
+    assert restored.items("weapons") == ["gun3"]
+    assert restored.items("packages") == ["pkg1"]
@@ -0,0 +1,297 @@
+import asyncio
+
+from cart_store import Cart, CartStore
+from catalog import Catalog
+
+CATALOG = Catalog({
+    "weapons": {"glock": {"name": "Glock", "price": 5}, "ak": {"name": "AK", "price": 8}},
+    "money": {"1m": {"name": "$1M", "price": 3}},
+    "watches": {},
+    "packages": {"safe": {"name": "Safe", "price": 2}},
+})
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeDB:
+    """In-memory stand-in for the saved cart methods of AsyncShopDatabase; ages are kept relative to clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        # user id -> (items, layout id, clock time last touched)
+        self.rows = {}
+        self.layouts = {}
+        self.fail = False
+        self.saves = 0
+
+    async def load_saved_carts(self):
+        rows = sorted(self.rows.items(), key=lambda row: row[1][2])
+        return [(user_id, items, layout_id, self.clock() - touched) for user_id, (items, layout_id, touched) in rows]
+
+    async def load_saved_cart(self, user_id):
+        row = self.rows.get(user_id)
+        return (row[0], row[1], self.layouts.get(row[1])) if row else None
+
+    async def load_cart_layouts(self):
+        return dict(self.layouts)
+
+    async def save_carts(self, upserts, deletes, layout=None):
+        self.saves += 1
+        if self.fail:
+            return False
+        for user_id, items, layout_id, age in upserts:
+            self.rows[user_id] = (items, layout_id, self.clock() - age)
+        for user_id in deletes:
+            self.rows.pop(user_id, None)
+        if layout:
+            self.layouts[layout[0]] = layout[1]
+        return True
+
+def make_store(catalog=CATALOG, **kwargs):
+    clock = Clock()
+    return CartStore(FakeDB(clock), catalog, clock=clock, **kwargs), clock
+
+def saved(store, user_id):
+    items, layout_id, _ = store.db.rows[user_id]
+    assert layout_id == CATALOG.layout_id
+    return Cart.from_bytes(CATALOG, items)
+
+def test_get_missing_cart_is_empty_and_untracked():
+    async def run():
+        store, _ = make_store()
+        assert not await store.get(1)
+        assert len(store) == 0
+    asyncio.run(run())
+
+def test_add_counts_only_new_items():
+    async def run():
+        store, _ = make_store()
+        assert await store.add(1, "weapons", ["glock", "ak"]) == 2
+        assert await store.add(1, "weapons", ["glock", "missing"]) == 0
+        assert (await store.get(1)).items("weapons") == ["glock", "ak"]
+    asyncio.run(run())
+
+def test_cart_expires_after_ttl_on_access():
+    async def run():
+        store, clock = make_store(ttl=60)
+        await store.add(1, "money", ["1m"])
+        clock.now += 59
+        assert await store.get(1)
+        # Access refreshed it, so the TTL restarts from here
+        clock.now += 59
+        assert await store.get(1)
+        clock.now += 60
+        assert not await store.get(1)
+        assert store.stats()["expired"] == 1
+    asyncio.run(run())
+
+def test_sweep_drops_only_stale_carts():
+    async def run():
+        store, clock = make_store(ttl=60)
+        await store.add(1, "money", ["1m"])
+        clock.now += 30
+        await store.add(2, "money", ["1m"])
+        clock.now += 30
+        assert store.sweep() == 1
+        assert not await store.get(1)
+        assert await store.get(2)
+    asyncio.run(run())
+
+def test_least_recently_used_cart_is_evicted():
+    async def run():
+        store, _ = make_store(max_entries=2)
+        await store.add(1, "weapons", ["glock"])
+        await store.add(2, "weapons", ["ak"])
+        await store.get(1)
+        await store.add(3, "money", ["1m"])
+        assert len(store) == 2
+        assert store.stats()["evicted"] == 1
+        assert 2 not in store._carts
+    asyncio.run(run())
+
+def test_flush_writes_changes_and_deletes_cleared_carts():
+    async def run():
+        store, _ = make_store()
+        await store.add(1, "weapons", ["glock"])
+        await store.add(2, "packages", ["safe"])
+        await store.flush()
+        assert saved(store, 1).items("weapons") == ["glock"]
+        assert saved(store, 2).items("packages") == ["safe"]
+        assert store.db.layouts == {CATALOG.layout_id: CATALOG.layout}
+
+        store.clear(2)
+        await store.flush()
+        assert 2 not in store.db.rows
+        assert store.stats()["dirty"] == 0
+
+        # Nothing dirty, nothing written
+        saves = store.db.saves
+        await store.flush()
+        assert store.db.saves == saves
+    asyncio.run(run())
+
+def test_failed_flush_is_retried():
+    async def run():
+        store, _ = make_store()
+        await store.add(1, "weapons", ["ak"])
+        store.db.fail = True
+        await store.flush()
+        assert store.stats()["dirty"] == 1
+
+        store.db.fail = False
+        await store.flush()
+        assert saved(store, 1).items("weapons") == ["ak"]
+    asyncio.run(run())
+
+def test_evicted_cart_comes_back_before_it_is_flushed():
+    async def run():
+        store, _ = make_store(max_entries=1)
+        await store.add(1, "weapons", ["glock"])
+        await store.add(2, "money", ["1m"])
+        assert (await store.get(1)).items("weapons") == ["glock"]
+        assert store.db.saves == 0
+    asyncio.run(run())
+
+def test_evicted_cart_is_saved_and_read_back():
+    async def run():
+        store, clock = make_store(max_entries=1)
+        await store.add(1, "weapons", ["glock"])
+        clock.now += 10
+        await store.add(2, "money", ["1m"])
+        await store.flush()
+        assert 1 not in store._evicted
+        assert store.stats()["on_disk"] == 1
+        # Saved with its own last touch, not the flush time
+        assert store.db.rows[1][2] == 1000.0
+
+        # Adding to it keeps what was already there
+        assert await store.add(1, "weapons", ["ak"]) == 1
+        assert (await store.get(1)).items("weapons") == ["glock", "ak"]
+        await store.flush()
+        assert saved(store, 1).items("weapons") == ["glock", "ak"]
+        assert saved(store, 2).items("money") == ["1m"]
+    asyncio.run(run())
+
+def test_evicted_cart_past_its_ttl_is_deleted():
+    async def run():
+        store, clock = make_store(max_entries=1, ttl=60)
+        await store.add(1, "weapons", ["glock"])
+        await store.flush()
+        clock.now += 30
+        await store.add(2, "money", ["1m"])
+        clock.now += 30
+        # Never re-saved with a fresh timestamp, so it can't come back after a restart
+        await store.flush()
+        assert 1 not in store.db.rows
+        assert not await store.get(1)
+    asyncio.run(run())
+
+def test_sweep_expires_carts_on_disk():
+    async def run():
+        store, clock = make_store(max_entries=1, ttl=60)
+        await store.add(1, "weapons", ["glock"])
+        await store.add(2, "money", ["1m"])
+        await store.flush()
+        assert store.stats()["on_disk"] == 1
+        clock.now += 60
+        assert store.sweep() == 2
+        await store.flush()
+        assert store.db.rows == {}
+    asyncio.run(run())
+
+def test_expired_cart_is_deleted_on_flush():
+    async def run():
+        store, clock = make_store(ttl=60)
+        await store.add(1, "weapons", ["glock"])
+        await store.flush()
+        clock.now += 60
+        store.sweep()
+        await store.flush()
+        assert 1 not in store.db.rows
+    asyncio.run(run())
+
+def test_load_keeps_recent_carts_in_memory_and_the_rest_on_disk():
+    async def run():
+        store, clock = make_store()
+        for user_id in (1, 2, 3):
+            await store.add(user_id, "money", ["1m"])
+            clock.now += 1
+        await store.flush()
+
+        restored = CartStore(store.db, CATALOG, clock=clock, max_entries=2)
+        await restored.load()
+        assert list(restored._carts) == [2, 3]
+        assert restored.stats()["on_disk"] == 1
+        assert (await restored.get(1)).items("money") == ["1m"]
+    asyncio.run(run())
+
+def test_load_deletes_expired_rows():
+    async def run():
+        store, clock = make_store(ttl=60)
+        await store.add(1, "money", ["1m"])
+        await store.flush()
+        clock.now += 60
+        restored = CartStore(store.db, CATALOG, clock=clock, ttl=60)
+        await restored.load()
+        assert not await restored.get(1)
+        await restored.flush()
+        assert store.db.rows == {}
+    asyncio.run(run())
+
+def test_load_rebinds_carts_from_an_older_catalog():
+    async def run():
+        store, clock = make_store()
+        await store.add(1, "weapons", ["glock", "ak"])
+        await store.add(1, "packages", ["safe"])
+        await store.flush()
+
+        # The glock is gone and a new item sits at the front
+        changed = Catalog({
+            "weapons": {"mp5": {"name": "MP5", "price": 6}, "ak": {"name": "AK", "price": 8}},
+            "money": {"1m": {"name": "$1M", "price": 3}},
+            "watches": {},
+            "packages": {"safe": {"name": "Safe", "price": 2}},
+        })
+        restored = CartStore(store.db, changed, clock=clock)
+        await restored.load()
+        cart = await restored.get(1)
+        assert cart.items("weapons") == ["ak"]
+        assert cart.items("packages") == ["safe"]
+
+        await restored.flush()
+        assert store.db.rows[1][1] == changed.layout_id
+    asyncio.run(run())
+
+def test_load_discards_carts_with_an_unknown_layout():
+    async def run():
+        store, clock = make_store()
+        store.db.rows[1] = (b"\x01", "some-other-layout", clock.now)
+        await store.load()
+        assert not await store.get(1)
+        # Marked dirty so the stale row is cleaned up
+        await store.flush()
+        assert 1 not in store.db.rows
+    asyncio.run(run())
+
+def test_round_trip_through_sqlite(tmp_path):
+    from database_manager import AsyncShopDatabase
+
+    async def run():
+        db = AsyncShopDatabase(str(tmp_path / "shop.db"))
+        try:
+            store = CartStore(db, CATALOG, max_entries=1)
+            await store.add(1, "weapons", ["ak"])
+            await store.add(2, "packages", ["safe"])
+            await store.flush()
+
+            restored = CartStore(db, CATALOG, max_entries=1)
+            await restored.load()
+            assert (await restored.get(2)).items("packages") == ["safe"]
+            assert (await restored.get(1)).items("weapons") == ["ak"]
+        finally:
+            await db.close()
+    asyncio.run(run())
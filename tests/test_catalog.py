@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import pytest
+
+from cart_store import Cart
+from catalog import CHUNK_BITS, PAGE_SIZE, Catalog, iter_bits
+
+def make_catalog(prices, groups=None):
+    weapons = {}
+    for n, price in enumerate(prices):
+        weapons[f"w{n}"] = {"name": f"Weapon {n}", "price": price}
+        if groups:
+            weapons[f"w{n}"]["group"] = groups[n % len(groups)]
+    return Catalog({"weapons": weapons, "money": {}, "watches": {}, "packages": {}})
+
+def brute_force_total(prices, mask):
+    return sum(prices[bit] for bit in range(len(prices)) if mask >> bit & 1)
+
+def test_iter_bits_yields_set_positions_lowest_first():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 70)) == [70]
+
+@pytest.mark.parametrize("count", [0, 1, CHUNK_BITS - 1, CHUNK_BITS, CHUNK_BITS + 1, 3 * CHUNK_BITS + 5])
+def test_subtotal_matches_brute_force_for_every_small_subset(count):
+    prices = [n * 3 + 1 for n in range(count)]
+    catalog = make_catalog(prices)
+    masks = range(1 << count) if count <= CHUNK_BITS + 1 else [0, (1 << count) - 1]
+    for mask in masks:
+        assert catalog.subtotal("weapons", mask) == brute_force_total(prices, mask)
+
+def test_subtotal_matches_brute_force_across_chunks():
+    prices = [round(random.Random(n).uniform(1, 50), 2) for n in range(40)]
+    catalog = make_catalog(prices)
+    rng = random.Random(0)
+    for _ in range(500):
+        mask = rng.getrandbits(len(prices))
+        assert catalog.subtotal("weapons", mask) == pytest.approx(brute_force_total(prices, mask))
+
+def test_price_tables_cover_each_chunk():
+    tables = Catalog._build_price_tables((1, 2, 4, 8, 16, 32, 64, 128, 1000))
+    assert len(tables) == 2
+    assert tables[0][0b11111111] == 255
+    assert tables[1][1] == 1000
+    # Bits beyond the last item in a partial chunk price as nothing
+    assert tables[1][0b10] == 0
+
+def test_cart_total_sums_every_category():
+    catalog = Catalog({
+        "weapons": {"a": {"name": "A", "price": 5}, "b": {"name": "B", "price": 7}},
+        "money": {"m": {"name": "M", "price": 2.5}},
+        "watches": {},
+        "packages": {"p": {"name": "P", "price": 1}},
+    })
+    cart = Cart(catalog)
+    cart.add("weapons", ["b"])
+    cart.add("money", ["m"])
+    cart.add("packages", ["p"])
+    assert catalog.total(cart) == 10.5
+
+def test_pages_are_sliced_to_select_size():
+    catalog = make_catalog([1] * (PAGE_SIZE * 2 + 3), groups=["Pistols", "Rifles"])
+    pages = catalog.pages("weapons")
+    assert [len(page) for page in pages] == [PAGE_SIZE, PAGE_SIZE, 3]
+    assert list(itertools.chain(*pages)) == list(range(PAGE_SIZE * 2 + 3))
+
+    assert catalog.groups["weapons"] == ("Pistols", "Rifles")
+    pistols = list(itertools.chain(*catalog.pages("weapons", "Pistols")))
+    assert all(catalog.items["weapons"][catalog.ids["weapons"][bit]]["group"] == "Pistols" for bit in pistols)
+    # An unknown group falls back to everything
+    assert catalog.pages("weapons", "Shotguns") == pages
+
+def test_empty_category_has_one_empty_page():
+    assert make_catalog([]).pages("weapons") == ((),)
+
+def test_layout_id_tracks_item_order():
+    assert make_catalog([1, 2]).layout_id == make_catalog([5, 9]).layout_id
+    assert make_catalog([1, 2]).layout_id != make_catalog([1, 2, 3]).layout_id
+
+def test_from_rows_keeps_whole_prices_integral():
+    catalog = Catalog.from_rows([
+        ("weapons", "glock", "Glock", 5.0, "A pistol", '{"group": "Pistols"}'),
+        ("money", "1m", "$1M", 2.5, None, None),
+    ])
+    assert catalog.get("weapons", "glock") == {"name": "Glock", "price": 5, "description": "A pistol", "group": "Pistols"}
+    assert catalog.labels["weapons"] == ("Glock - $5",)
+    assert catalog.prices["money"] == (2.5,)
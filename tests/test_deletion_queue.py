@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import discord
+import pytest
+
+from database_manager import AsyncShopDatabase
+from deletion_queue import DeletionQueue
+
+class Handler:
+    def __init__(self, *outcomes):
+        # Each call returns the next outcome, or raises it if it is an exception
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def __call__(self, channel_id):
+        self.calls.append(channel_id)
+        outcome = self.outcomes.pop(0) if self.outcomes else True
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+def rate_limited(retry_after):
+    response = type("Response", (), {"status": 429, "reason": "Too Many Requests"})()
+    error = discord.HTTPException(response, "rate limited")
+    error.retry_after = retry_after
+    return error
+
+def with_queue(tmp_path, handler, test, **kwargs):
+    async def run():
+        db = AsyncShopDatabase(str(tmp_path / "shop.db"))
+        try:
+            await test(DeletionQueue(db, handler, **kwargs), db)
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+def test_successful_deletion_is_counted_and_removed(tmp_path):
+    handler = Handler(True)
+
+    async def test(queue, db):
+        await queue.schedule(5, reason="closed")
+        await queue._process(5, 0, "closed")
+        assert queue.stats() == {"deleted": 1, "skipped": 0, "failed": 0}
+        assert await db.get_next_deletion() is None
+    with_queue(tmp_path, handler, test)
+
+def test_channel_left_open_is_skipped_not_counted(tmp_path):
+    handler = Handler(False)
+
+    async def test(queue, db):
+        await queue.schedule(5)
+        await queue._process(5, 0, "")
+        assert queue.stats() == {"deleted": 0, "skipped": 1, "failed": 0}
+        assert await db.get_next_deletion() is None
+    with_queue(tmp_path, handler, test)
+
+def test_failures_back_off_exponentially(tmp_path):
+    handler = Handler(RuntimeError("boom"), RuntimeError("boom"))
+
+    async def test(queue, db):
+        await queue.schedule(5)
+        for attempts, delay in ((0, 10), (1, 20)):
+            before = time.time()
+            await queue._process(5, attempts, "")
+            channel_id, due_at, recorded, _ = await db.get_next_deletion()
+            assert recorded == attempts + 1
+            assert before + delay <= due_at <= time.time() + delay
+        assert queue.stats()["failed"] == 0
+    with_queue(tmp_path, handler, test, retry_delay=10)
+
+def test_rate_limit_waits_for_retry_after(tmp_path):
+    handler = Handler(rate_limited(3.0))
+
+    async def test(queue, db):
+        await queue.schedule(5)
+        before = time.time()
+        await queue._process(5, 0, "")
+        _, due_at, attempts, _ = await db.get_next_deletion()
+        assert attempts == 1
+        assert before + 3 <= due_at <= time.time() + 3
+    with_queue(tmp_path, handler, test, retry_delay=60)
+
+def test_gives_up_after_max_attempts(tmp_path):
+    handler = Handler(RuntimeError("still broken"))
+
+    async def test(queue, db):
+        await queue.schedule(5)
+        await queue._process(5, 2, "")
+        assert queue.stats() == {"deleted": 0, "skipped": 0, "failed": 1}
+        assert await db.get_next_deletion() is None
+    with_queue(tmp_path, handler, test, max_attempts=3)
+
+def test_worker_runs_due_deletions_in_order(tmp_path):
+    handler = Handler()
+
+    async def test(queue, db):
+        await queue.schedule(6, delay=0.05)
+        await queue.schedule(5)
+        queue.start()
+        try:
+            for _ in range(100):
+                if len(handler.calls) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            queue.stop()
+        assert handler.calls == [5, 6]
+        assert queue.stats()["deleted"] == 2
+    with_queue(tmp_path, handler, test)
+
+def test_rescheduling_replaces_the_earlier_entry(tmp_path):
+    handler = Handler()
+
+    async def test(queue, db):
+        await queue.schedule(5, delay=100)
+        await queue.schedule(5, delay=0)
+        channel_id, due_at, attempts, _ = await db.get_next_deletion()
+        assert channel_id == 5
+        assert due_at == pytest.approx(time.time(), abs=1)
+        assert attempts == 0
+    with_queue(tmp_path, handler, test)
@@ -0,0 +1,130 @@
+import asyncio
+
+from join_queue import JoinQueue
+
+class Guild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.members = {}
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+class Member:
+    def __init__(self, guild, member_id):
+        self.guild = guild
+        self.id = member_id
+        self.display_name = f"member{member_id}"
+        guild.members[member_id] = self
+
+class Recorder:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.roles = []
+        self.welcomes = []
+
+    async def add_role(self, member):
+        if member.id in self.fail:
+            raise RuntimeError("missing permissions")
+        self.roles.append(member.id)
+        return True
+
+    async def welcome(self, guild, members):
+        self.welcomes.append((guild.id, [member.id for member in members]))
+
+def make_queue(recorder, **kwargs):
+    return JoinQueue(recorder.add_role, recorder.welcome, window=0.01, **kwargs)
+
+async def drain(queue):
+    while len(queue) or queue._wake.is_set():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    queue.stop()
+
+def test_burst_becomes_one_batch_per_guild():
+    async def run():
+        recorder = Recorder()
+        queue = make_queue(recorder)
+        first, second = Guild(1), Guild(2)
+        for member_id in range(5):
+            queue.add(Member(first, member_id))
+        queue.add(Member(second, 10))
+        await drain(queue)
+        return recorder, queue
+    recorder, queue = asyncio.run(run())
+    assert sorted(recorder.roles) == [0, 1, 2, 3, 4, 10]
+    assert sorted(recorder.welcomes) == [(1, [0, 1, 2, 3, 4]), (2, [10])]
+    assert queue.stats()["batches"] == 1
+    assert queue.stats()["processed"] == 6
+
+def test_large_burst_is_split_at_max_batch():
+    async def run():
+        recorder = Recorder()
+        queue = make_queue(recorder, max_batch=3)
+        guild = Guild(1)
+        for member_id in range(7):
+            queue.add(Member(guild, member_id))
+        await drain(queue)
+        return recorder, queue
+    recorder, queue = asyncio.run(run())
+    assert [len(ids) for _, ids in recorder.welcomes] == [3, 3, 1]
+    assert queue.stats()["batches"] == 3
+
+def test_members_who_left_are_skipped():
+    async def run():
+        recorder = Recorder()
+        queue = make_queue(recorder)
+        guild = Guild(1)
+        stays, leaves, discarded = Member(guild, 1), Member(guild, 2), Member(guild, 3)
+        for member in (stays, leaves, discarded):
+            queue.add(member)
+        # One leaves without the bot hearing about it, one is reported through discard()
+        del guild.members[2]
+        queue.discard(discarded)
+        await drain(queue)
+        return recorder, queue
+    recorder, queue = asyncio.run(run())
+    assert recorder.roles == [1]
+    assert queue.stats()["left"] == 2
+
+def test_rejoin_keeps_a_single_entry():
+    async def run():
+        recorder = Recorder()
+        queue = make_queue(recorder)
+        guild = Guild(1)
+        queue.add(Member(guild, 1))
+        queue.add(Member(guild, 1))
+        assert len(queue) == 1
+        await drain(queue)
+        return recorder
+    assert asyncio.run(run()).roles == [1]
+
+def test_failed_role_is_counted_and_still_welcomed():
+    async def run():
+        recorder = Recorder(fail={2})
+        queue = make_queue(recorder)
+        guild = Guild(1)
+        queue.add(Member(guild, 1))
+        queue.add(Member(guild, 2))
+        await drain(queue)
+        return recorder, queue
+    recorder, queue = asyncio.run(run())
+    assert queue.stats()["failed"] == 1
+    assert recorder.welcomes == [(1, [1, 2])]
+    # Only successful assignments are sampled
+    assert len(queue._latencies) == 1
+
+def test_percentiles():
+    queue = JoinQueue(None, None)
+    assert queue.percentile(0.5) is None
+    queue._latencies.extend(float(n) for n in range(100, 0, -1))
+    assert queue.percentile(0.0) == 1.0
+    assert queue.percentile(0.50) == 51.0
+    assert queue.percentile(0.99) == 100.0
+    assert queue.percentile(1.0) == 100.0
+
+def test_latency_samples_are_bounded():
+    queue = JoinQueue(None, None, samples=10)
+    queue._latencies.extend(float(n) for n in range(100))
+    assert len(queue._latencies) == 10
+    assert queue.percentile(0.0) == 90.0
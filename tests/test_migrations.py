@@ -0,0 +1,120 @@
+import sqlite3
+
+import pytest
+
+from database_manager import MIGRATIONS, ShopDatabase, _table_columns, run_migrations
+
+LATEST = MIGRATIONS[-1][0]
+
+# Schema created by the bot before versioned migrations existed
+LEGACY_SCHEMA = '''
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        price REAL NOT NULL,
+        stock INTEGER DEFAULT 0,
+        image_url TEXT
+    );
+    CREATE TABLE cart (
+        user_id INTEGER,
+        product_id INTEGER,
+        quantity INTEGER DEFAULT 1,
+        PRIMARY KEY (user_id, product_id),
+        FOREIGN KEY (product_id) REFERENCES products (id)
+    );
+    CREATE TABLE orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        total_amount REAL NOT NULL,
+        status TEXT DEFAULT 'pending'
+    );
+'''
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "shop.db")
+
+def versions(path):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+
+def test_versions_are_unique_and_increasing():
+    numbers = [version for version, _, _ in MIGRATIONS]
+    assert numbers == sorted(set(numbers))
+    assert numbers[0] == 1
+
+def test_fresh_database_gets_every_migration(db_path):
+    ShopDatabase(db_path)
+    assert versions(db_path) == [version for version, _, _ in MIGRATIONS]
+
+    with sqlite3.connect(db_path) as conn:
+        assert {"created_at", "updated_at"} <= _table_columns(conn, "orders")
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"products", "orders", "saved_carts", "bot_state", "tickets", "channel_deletions"} <= tables
+
+def test_rerun_applies_nothing(db_path):
+    ShopDatabase(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert run_migrations(conn) == []
+    assert versions(db_path)[-1] == LATEST
+
+def test_legacy_database_is_upgraded_in_place(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute("INSERT INTO orders (user_id, total_amount) VALUES (42, 9.5)")
+
+    ShopDatabase(db_path)
+
+    assert versions(db_path)[-1] == LATEST
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT user_id, total_amount, status, created_at, updated_at FROM orders").fetchone()
+    assert row[:3] == (42, 9.5, "pending")
+    # Existing rows are backfilled by migration 2
+    assert row[3] is not None and row[4] is not None
+
+def test_partially_migrated_database_resumes(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.isolation_level = None
+        for version, description, step in MIGRATIONS[:3]:
+            step(conn)
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                         [(version, description) for version, description, _ in MIGRATIONS[:3]])
+
+    with sqlite3.connect(db_path) as conn:
+        assert run_migrations(conn) == [version for version, _, _ in MIGRATIONS[3:]]
+
+def test_failed_migration_is_rolled_back(db_path, monkeypatch):
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("database_manager.MIGRATIONS", MIGRATIONS + [(LATEST + 1, "broken", broken)])
+    with sqlite3.connect(db_path) as conn:
+        with pytest.raises(RuntimeError):
+            run_migrations(conn)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "half_done" not in tables
+    assert versions(db_path)[-1] == LATEST
+
+def test_new_orders_get_timestamps(db_path):
+    ShopDatabase(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO orders (user_id, total_amount) VALUES (1, 5)")
+        created_at, updated_at = conn.execute("SELECT created_at, updated_at FROM orders").fetchone()
+    assert created_at is not None
+    assert updated_at is not None
+
+def test_updates_refresh_updated_at_unless_set(db_path):
+    ShopDatabase(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO orders (user_id, total_amount, created_at, updated_at) VALUES (1, 5, '2000-01-01', '2000-01-01')")
+
+        conn.execute("UPDATE orders SET status = 'completed'")
+        created_at, updated_at = conn.execute("SELECT created_at, updated_at FROM orders").fetchone()
+        assert created_at == "2000-01-01"
+        assert updated_at > "2000-01-01"
+
+        conn.execute("UPDATE orders SET updated_at = '2001-01-01'")
+        assert conn.execute("SELECT updated_at FROM orders").fetchone()[0] == "2001-01-01"
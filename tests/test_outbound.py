@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from outbound import BACKGROUND, INTERACTION, TICKET, WELCOME, OutboundScheduler, Shed, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+async def noop(*args):
+    return args
+
+def make_scheduler(**kwargs):
+    clock = Clock()
+    kwargs.setdefault("route_limits", {"channel": (2, 2.0), "roles": (10, 10.0)})
+    return OutboundScheduler(clock=clock, **kwargs), clock
+
+def picked(scheduler, now):
+    job, wait = scheduler._pick(now)
+    return job.args if job is not None else None
+
+def test_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(2, 2.0, now=0.0)
+    for _ in range(2):
+        assert bucket.delay(0.0) == 0
+        bucket.take()
+    assert bucket.delay(0.0) == pytest.approx(1.0)
+    assert bucket.delay(0.5) == pytest.approx(0.5)
+    assert bucket.delay(1.0) == 0
+
+def test_bucket_refill_is_capped_at_capacity():
+    bucket = TokenBucket(3, 3.0, now=0.0)
+    assert bucket.delay(1000.0) == 0
+    assert bucket.tokens == 3
+
+def test_bucket_reserve_holds_back_tokens():
+    bucket = TokenBucket(10, 10.0, now=0.0)
+    for _ in range(7):
+        bucket.take()
+    assert bucket.delay(0.0) == 0
+    assert bucket.delay(0.0, reserve=3) == pytest.approx(1.0)
+
+def test_bucket_pause_blocks_until_it_ends():
+    bucket = TokenBucket(5, 5.0, now=0.0)
+    bucket.pause(4.0)
+    assert bucket.delay(1.0) == pytest.approx(3.0)
+    assert bucket.delay(4.0) == 0
+    assert not bucket.idle(4.0)
+    assert bucket.idle(9.0)
+
+def test_picks_by_priority_then_arrival():
+    async def run():
+        scheduler, clock = make_scheduler()
+        scheduler.submit(BACKGROUND, "channel:1", noop, "background")
+        scheduler.submit(WELCOME, "channel:2", noop, "welcome 1")
+        scheduler.submit(INTERACTION, "channel:3", noop, "interaction")
+        scheduler.submit(WELCOME, "channel:4", noop, "welcome 2")
+        order = [picked(scheduler, clock.now)[0] for _ in range(4)]
+        scheduler.stop()
+        return order
+    assert asyncio.run(run()) == ["interaction", "welcome 1", "welcome 2", "background"]
+
+def test_throttled_route_does_not_hold_back_other_work():
+    async def run():
+        scheduler, clock = make_scheduler()
+        for n in range(3):
+            scheduler.submit(INTERACTION, "channel:1", noop, f"busy {n}")
+        scheduler.submit(BACKGROUND, "channel:2", noop, "other")
+
+        assert picked(scheduler, clock.now) == ("busy 0",)
+        assert picked(scheduler, clock.now) == ("busy 1",)
+        # channel:1 is out of tokens, so the less important call on another route goes next
+        assert picked(scheduler, clock.now) == ("other",)
+
+        job, wait = scheduler._pick(clock.now)
+        assert job is None
+        assert wait == pytest.approx(1.0)
+        assert picked(scheduler, clock.now + wait) == ("busy 2",)
+        scheduler.stop()
+    asyncio.run(run())
+
+def test_welcome_calls_leave_a_share_for_tickets():
+    async def run():
+        scheduler, clock = make_scheduler(reserved_share=0.3)
+        for n in range(10):
+            scheduler.submit(WELCOME, "roles:1", noop, n)
+
+        welcomed = 0
+        while picked(scheduler, clock.now) is not None:
+            welcomed += 1
+        assert welcomed == 7
+
+        scheduler.submit(TICKET, "roles:1", noop, "customer role")
+        assert picked(scheduler, clock.now) == ("customer role",)
+        scheduler.stop()
+    asyncio.run(run())
+
+def test_global_limit_caps_all_routes():
+    async def run():
+        scheduler, clock = make_scheduler(global_limit=(3, 1.0))
+        for n in range(5):
+            scheduler.submit(INTERACTION, f"channel:{n}", noop, n)
+        assert [picked(scheduler, clock.now) for _ in range(4)] == [(0,), (1,), (2,), None]
+        scheduler.stop()
+    asyncio.run(run())
+
+def test_full_queue_evicts_less_important_work():
+    async def run():
+        scheduler, _ = make_scheduler(max_queue=2)
+        first = scheduler.submit(BACKGROUND, "channel:1", noop)
+        second = scheduler.submit(BACKGROUND, "channel:1", noop)
+        urgent = scheduler.submit(INTERACTION, "channel:1", noop)
+        late = scheduler.submit(BACKGROUND, "channel:1", noop)
+
+        # The newest background call made way for the interaction
+        assert not first.done() and not urgent.done()
+        assert isinstance(second.exception(), Shed)
+        assert isinstance(late.exception(), Shed)
+        assert scheduler.stats()["shed"]["background"] == 2
+        scheduler.stop()
+    asyncio.run(run())
+
+def test_run_returns_results_and_raises_errors():
+    async def fail():
+        raise ValueError("nope")
+
+    async def run():
+        scheduler = OutboundScheduler(concurrency=2)
+        assert await scheduler.run(INTERACTION, "channel:1", noop, 1, 2) == (1, 2)
+        with pytest.raises(ValueError):
+            await scheduler.run(TICKET, "channel:1", fail)
+        stats = scheduler.stats()
+        scheduler.stop()
+        return stats
+    stats = asyncio.run(run())
+    assert stats["completed"]["interaction"] == 1
+    assert stats["depth"] == 0
+
+def test_worker_runs_queued_calls_in_priority_order():
+    async def run():
+        scheduler = OutboundScheduler(concurrency=1)
+        release = asyncio.Event()
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        async def block():
+            await release.wait()
+
+        blocker = scheduler.submit(INTERACTION, "channel:0", block)
+        await asyncio.sleep(0)
+        calls = [
+            scheduler.submit(BACKGROUND, "channel:1", record, "background"),
+            scheduler.submit(TICKET, "channel:2", record, "ticket"),
+            scheduler.submit(INTERACTION, "channel:3", record, "interaction"),
+        ]
+        release.set()
+        await asyncio.gather(blocker, *calls)
+        scheduler.stop()
+        return order
+    assert asyncio.run(run()) == ["interaction", "ticket", "background"]
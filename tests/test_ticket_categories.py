@@ -0,0 +1,159 @@
+import asyncio
+
+import discord
+import pytest
+
+from ticket_categories import CategoryAllocator
+
+class Category(discord.CategoryChannel):
+    """A CategoryChannel with just the attributes the allocator reads"""
+
+    def __init__(self, category_id, name, channels=()):
+        self.id = category_id
+        self.name = name
+        self._test_channels = list(channels)
+
+    @property
+    def channels(self):
+        return self._test_channels
+
+class Channel:
+    def __init__(self, channel_id, category_id):
+        self.id = channel_id
+        self.category_id = category_id
+
+class Guild:
+    def __init__(self, *categories):
+        self.id = 1
+        self.categories = list(categories)
+
+def filled(category_id, name, count):
+    return Category(category_id, name, [Channel(category_id * 100 + n, category_id) for n in range(count)])
+
+def make_allocator(guild, fail=False, **kwargs):
+    created = []
+
+    async def create_category(guild, name, overwrites):
+        if fail:
+            raise discord.Forbidden(type("Response", (), {"status": 403, "reason": "Forbidden"})(), "no permission")
+        category = Category(1000 + len(created), name)
+        guild.categories.append(category)
+        created.append(name)
+        return category
+
+    return CategoryAllocator(create_category=create_category, **kwargs), created
+
+def no_overwrites():
+    return {}
+
+def test_shard_numbers():
+    assert CategoryAllocator.shard_number("TICKETS", "TICKETS") == 1
+    assert CategoryAllocator.shard_number("TICKETS", "TICKETS-3") == 3
+    assert CategoryAllocator.shard_number("TICKETS", "TICKETS-1") is None
+    assert CategoryAllocator.shard_number("TICKETS", "TICKETS-old") is None
+    assert CategoryAllocator.shard_number("TICKETS", "OTHER") is None
+
+def test_acquire_reserves_a_slot_until_released():
+    async def run():
+        base = filled(1, "TICKETS", 1)
+        guild = Guild(base)
+        allocator, created = make_allocator(guild, limit=3, headroom=0)
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        assert category is base
+        assert allocator.count(base.id) == 2
+
+        allocator.release(category, Channel(55, base.id))
+        assert allocator.count(base.id) == 2
+        assert allocator._pending == {}
+        assert created == []
+    asyncio.run(run())
+
+def test_released_slot_without_a_channel_is_freed():
+    async def run():
+        base = filled(1, "TICKETS", 0)
+        guild = Guild(base)
+        allocator, _ = make_allocator(guild, limit=3, headroom=0)
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        allocator.release(category)
+        assert allocator.count(base.id) == 0
+    asyncio.run(run())
+
+def test_full_categories_overflow_into_a_new_shard():
+    async def run():
+        guild = Guild(filled(1, "TICKETS", 2), filled(2, "TICKETS-2", 2))
+        allocator, created = make_allocator(guild, limit=2, headroom=0)
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        assert created == ["TICKETS-3"]
+        assert category.name == "TICKETS-3"
+        assert allocator.count(category.id) == 1
+    asyncio.run(run())
+
+def test_pending_slots_count_towards_the_limit():
+    async def run():
+        guild = Guild(filled(1, "TICKETS", 0))
+        allocator, created = make_allocator(guild, limit=2, headroom=0)
+        first = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        second = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        third = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        assert first is second
+        assert third is not first
+        assert created == ["TICKETS-2"]
+    asyncio.run(run())
+
+def test_next_shard_is_created_ahead_when_running_low():
+    async def run():
+        guild = Guild(filled(1, "TICKETS", 2))
+        allocator, created = make_allocator(guild, limit=4, headroom=1)
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        # Only one slot left after this one, so the overflow is made in the background
+        assert category.name == "TICKETS"
+        await asyncio.gather(*allocator._tasks)
+        assert created == ["TICKETS-2"]
+
+        # Once there is room again nothing more is created
+        await allocator.acquire(guild, "TICKETS", no_overwrites)
+        await asyncio.gather(*allocator._tasks)
+        assert created == ["TICKETS-2"]
+    asyncio.run(run())
+
+def test_deleted_channels_free_their_slots():
+    async def run():
+        base = filled(1, "TICKETS", 2)
+        guild = Guild(base)
+        allocator, created = make_allocator(guild, limit=2, headroom=0)
+        allocator._load(guild, "TICKETS")
+        allocator.channel_deleted(base.channels[0])
+        assert await allocator.acquire(guild, "TICKETS", no_overwrites) is base
+        assert created == []
+    asyncio.run(run())
+
+def test_deleted_category_is_replaced():
+    async def run():
+        base, second = filled(1, "TICKETS", 2), filled(2, "TICKETS-2", 0)
+        guild = Guild(base, second)
+        allocator, created = make_allocator(guild, limit=2, headroom=0)
+        allocator._load(guild, "TICKETS")
+        allocator.channel_deleted(second)
+        guild.categories.remove(second)
+
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        assert created == ["TICKETS-2"]
+        assert category is not second
+    asyncio.run(run())
+
+def test_failure_to_create_a_needed_category_is_raised():
+    async def run():
+        guild = Guild(filled(1, "TICKETS", 2))
+        allocator, _ = make_allocator(guild, fail=True, limit=2, headroom=0)
+        with pytest.raises(discord.Forbidden):
+            await allocator.acquire(guild, "TICKETS", no_overwrites)
+    asyncio.run(run())
+
+def test_failure_to_create_ahead_is_only_logged():
+    async def run():
+        guild = Guild(filled(1, "TICKETS", 2))
+        allocator, _ = make_allocator(guild, fail=True, limit=4, headroom=1)
+        category = await allocator.acquire(guild, "TICKETS", no_overwrites)
+        await asyncio.gather(*allocator._tasks)
+        assert category.name == "TICKETS"
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from ticket_index import TicketIndex
+
+def test_index_tracks_one_ticket_per_user():
+    index = TicketIndex()
+    index.load([(10, 1), (11, 2), (12, 1)])
+    # The newer row wins for a user with two open tickets
+    assert index.channel_for(1) == 12
+    assert len(index) == 2
+
+    assert index.forget_channel(12) == 1
+    assert index.channel_for(1) is None
+    assert index.forget_channel(12) is None
+
+def test_forgetting_an_old_channel_keeps_the_current_one():
+    index = TicketIndex()
+    index.add(1, 10)
+    index.add(1, 11)
+    assert index.forget_channel(10) is None
+    assert index.channel_for(1) == 11
+
+def test_checkout_is_exclusive_per_user_and_cleans_up():
+    async def run():
+        index = TicketIndex()
+        order = []
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def first():
+            async with index.checkout(1):
+                order.append("first in")
+                entered.set()
+                await release.wait()
+                order.append("first out")
+
+        async def second():
+            await entered.wait()
+            async with index.checkout(1):
+                order.append("second in")
+
+        async def other_user():
+            await entered.wait()
+            async with index.checkout(2):
+                order.append("other user")
+
+        tasks = [asyncio.create_task(coro()) for coro in (first, second, other_user)]
+        await entered.wait()
+        await asyncio.sleep(0)
+        assert index.checkout_busy(1)
+        assert index._locks[1][1] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order.index("first out") < order.index("second in")
+        assert "other user" in order
+        assert index._locks == {}
+        assert not index.checkout_busy(1)
+    asyncio.run(run())
+
+def test_lock_is_dropped_after_an_error():
+    async def run():
+        index = TicketIndex()
+        with pytest.raises(RuntimeError):
+            async with index.checkout(1):
+                raise RuntimeError("checkout failed")
+        assert index._locks == {}
+    asyncio.run(run())
+
+def test_cancelled_waiter_releases_its_reference():
+    async def run():
+        index = TicketIndex()
+        holding = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with index.checkout(1):
+                holding.set()
+                await release.wait()
+
+        async def waiter():
+            async with index.checkout(1):
+                pass
+
+        held = asyncio.create_task(holder())
+        await holding.wait()
+        waiting = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert index._locks[1][1] == 1
+
+        release.set()
+        await held
+        assert index._locks == {}
+    asyncio.run(run())
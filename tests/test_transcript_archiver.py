@@ -0,0 +1,77 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+
+import pytest
+
+from transcript_archiver import TranscriptArchiver
+
+class Author:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.bot = False
+
+    def __str__(self):
+        return f"user{self.id}"
+
+class Message:
+    def __init__(self, message_id, content):
+        self.id = message_id
+        self.created_at = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=message_id)
+        self.edited_at = None
+        self.author = Author(7)
+        self.content = content
+        self.attachments = []
+        self.embeds = []
+
+class Channel:
+    def __init__(self, messages, fail_after=None):
+        self.id = 42
+        self.name = "ticket-buyer"
+        self.guild = type("Guild", (), {"id": 1})()
+        self.messages = messages
+        self.fail_after = fail_after
+
+    async def history(self, limit=None, oldest_first=False):
+        for count, message in enumerate(self.messages):
+            if count == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield message
+
+def read(path):
+    with gzip.open(path, "rt", encoding="utf-8") as transcript:
+        return [json.loads(line) for line in transcript]
+
+def test_archive_writes_every_message_in_order(tmp_path):
+    archiver = TranscriptArchiver(str(tmp_path), page_size=2)
+    channel = Channel([Message(n, f"message {n}") for n in range(5)])
+    path = asyncio.run(archiver.archive(channel))
+
+    assert path == archiver.path_for(channel)
+    assert [record["content"] for record in read(path)] == [f"message {n}" for n in range(5)]
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+def test_empty_channel_gives_an_empty_transcript(tmp_path):
+    archiver = TranscriptArchiver(str(tmp_path))
+    path = asyncio.run(archiver.archive(Channel([])))
+    assert read(path) == []
+
+def test_failed_export_leaves_nothing_behind(tmp_path):
+    archiver = TranscriptArchiver(str(tmp_path), page_size=2)
+    channel = Channel([Message(n, "hi") for n in range(5)], fail_after=3)
+    with pytest.raises(RuntimeError):
+        asyncio.run(archiver.archive(channel))
+
+    path = archiver.path_for(channel)
+    assert not os.path.exists(path)
+    assert not os.path.exists(f"{path}.partial")
+
+def test_record_keeps_author_and_attachments():
+    message = Message(1, "paid")
+    message.attachments = [type("Attachment", (), {"filename": "proof.png", "url": "https://cdn/proof.png", "size": 10})()]
+    record = TranscriptArchiver.record(message)
+    assert record["author"] == "user7"
+    assert record["attachments"] == [{"filename": "proof.png", "url": "https://cdn/proof.png", "size": 10}]
+    assert record["created_at"] == "2026-01-01T00:01:00+00:00"
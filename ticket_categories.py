@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class CategoryAllocator:
+    """Spreads ticket channels over numbered categories ("TICKETS", "TICKETS-2", ...).
+
+    Discord caps a category at 50 channels. Channel counts per category are
+    kept in memory, seeded from the guild cache the first time a guild is
+    used and then updated by acquire()/release() and the channel events,
+    so picking a category with room doesn't rescan the guild. Once every
+    category is within ``headroom`` of the cap, the next overflow category
+    is created in the background so tickets don't have to wait for it.
+
+    create_category(guild, name, overwrites) makes the API call for a new
+    category; by default it calls guild.create_category directly.
+    """
+
+    def __init__(self, limit: int = 50, headroom: int = 5,
+                 create_category: Optional[Callable[[discord.Guild, str, dict], Awaitable[discord.CategoryChannel]]] = None):
+        self.limit = limit
+        self.headroom = headroom
+        self.create_category = create_category or (lambda guild, name, overwrites: guild.create_category(name, overwrites=overwrites))
+        # (guild id, base name) -> categories in shard order
+        self._shards: Dict[Tuple[int, str], List[discord.CategoryChannel]] = {}
+        # (guild id, base name) -> index of the shard tried first
+        self._current: Dict[Tuple[int, str], int] = {}
+        # category id -> ids of the channels in it, and slots reserved but not yet created
+        self._channels: Dict[int, Set[int]] = {}
+        self._pending: Dict[int, int] = {}
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def shard_number(base: str, name: str) -> Optional[int]:
+        """1 for the base category, n for "<base>-n", None for anything else"""
+        if name == base:
+            return 1
+        suffix = name[len(base) + 1:] if name.startswith(f"{base}-") else ""
+        return int(suffix) if suffix.isdigit() and int(suffix) >= 2 else None
+
+    def count(self, category_id: int) -> int:
+        return len(self._channels.get(category_id, ())) + self._pending.get(category_id, 0)
+
+    def _load(self, guild: discord.Guild, base: str) -> Tuple[int, str]:
+        key = (guild.id, base)
+        if key not in self._shards:
+            numbered = {}
+            for category in guild.categories:
+                number = self.shard_number(base, category.name)
+                if number is not None and number not in numbered:
+                    numbered[number] = category
+            shards = [numbered[number] for number in sorted(numbered)]
+            for category in shards:
+                self._channels[category.id] = {channel.id for channel in category.channels}
+            self._shards[key] = shards
+            self._current[key] = 0
+        return key
+
+    def _find_open(self, key: Tuple[int, str]) -> Optional[discord.CategoryChannel]:
+        """A shard with room, trying the current one first"""
+        shards = self._shards[key]
+        index = self._current[key]
+        if index < len(shards) and self.count(shards[index].id) < self.limit:
+            return shards[index]
+
+        for index, category in enumerate(shards):
+            if self.count(category.id) < self.limit:
+                self._current[key] = index
+                return category
+        return None
+
+    def _running_low(self, key: Tuple[int, str]) -> bool:
+        """True once no shard has more than headroom slots left"""
+        below = self.limit - self.headroom
+        return all(self.count(category.id) >= below for category in self._shards[key])
+
+    async def acquire(self, guild: discord.Guild, base: str, overwrites: Callable[[], dict]) -> discord.CategoryChannel:
+        """Reserve a slot in a category with room, creating an overflow category if all are full.
+
+        overwrites builds the permission overwrites for a new category. Every
+        acquire() must be paired with a release(). Raises discord.Forbidden if
+        a category is needed and the bot may not create one.
+        """
+        key = self._load(guild, base)
+        category = self._find_open(key)
+        if category is None:
+            category = await self._grow(guild, base, overwrites, ahead=False)
+        self._pending[category.id] = self._pending.get(category.id, 0) + 1
+
+        # Running low everywhere: create the next category before anyone has to wait on it
+        if self._running_low(key) and not self._locks.setdefault(key, asyncio.Lock()).locked():
+            task = asyncio.create_task(self._grow(guild, base, overwrites, ahead=True))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return category
+
+    def release(self, category: discord.CategoryChannel, channel: Optional[discord.abc.GuildChannel] = None):
+        """Give back a slot from acquire(), recording the channel created in it if any"""
+        pending = self._pending.get(category.id, 0) - 1
+        if pending > 0:
+            self._pending[category.id] = pending
+        else:
+            self._pending.pop(category.id, None)
+        if channel is not None and category.id in self._channels:
+            self._channels[category.id].add(channel.id)
+
+    async def _grow(self, guild: discord.Guild, base: str, overwrites: Callable[[], dict], ahead: bool) -> Optional[discord.CategoryChannel]:
+        key = (guild.id, base)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            # Someone else may have made room while we waited for the lock
+            if ahead and not self._running_low(key):
+                return None
+            existing = self._find_open(key)
+            if not ahead and existing is not None:
+                return existing
+
+            shards = self._shards[key]
+            number = max((self.shard_number(base, category.name) or 1 for category in shards), default=0) + 1
+            name = base if number == 1 else f"{base}-{number}"
+            try:
+                category = await self.create_category(guild, name, overwrites())
+            except Exception as e:
+                if not ahead:
+                    raise
+                logger.error(f"Error creating overflow category {name}: {e}")
+                return None
+
+            self._channels[category.id] = set()
+            shards.append(category)
+            logger.info(f"Created ticket category {name} in guild {guild.id} ({len(shards)} in use)")
+            return category
+
+    def channel_created(self, channel: discord.abc.GuildChannel):
+        if channel.category_id in self._channels:
+            self._channels[channel.category_id].add(channel.id)
+
+    def channel_deleted(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, discord.CategoryChannel):
+            if self._channels.pop(channel.id, None) is not None:
+                for key, shards in self._shards.items():
+                    if channel in shards:
+                        shards.remove(channel)
+                        self._current[key] = 0
+            return
+
+        if channel.category_id in self._channels:
+            self._channels[channel.category_id].discard(channel.id)
+
+    def channel_updated(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.category_id != after.category_id:
+            self.channel_deleted(before)
+            self.channel_created(after)
+
+    def forget_guild(self, guild_id: int):
+        for key in [key for key in self._shards if key[0] == guild_id]:
+            for category in self._shards.pop(key):
+                self._channels.pop(category.id, None)
+                self._pending.pop(category.id, None)
+            self._current.pop(key, None)
+            self._locks.pop(key, None)
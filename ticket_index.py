@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TicketIndex:
+    """In-memory index of users' open purchase tickets, plus per-user checkout locks.
+
+    Mirrors the open rows of the tickets table, so checkout can find a
+    user's existing ticket with a dict lookup instead of a database query
+    or a channel scan. A user's checkout runs under their lock; a click
+    that arrives while it is held is turned away without waiting.
+    """
+
+    def __init__(self):
+        self._by_user: Dict[int, int] = {}
+        self._by_channel: Dict[int, int] = {}
+        # user id -> (checkout lock, number of checkouts holding or waiting on it)
+        self._locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    def load(self, rows: Iterable[Tuple[int, int]]):
+        """Replace the index with (channel_id, user_id) rows, oldest first"""
+        self._by_user.clear()
+        self._by_channel.clear()
+        for channel_id, user_id in rows:
+            self.add(user_id, channel_id)
+        logger.info(f"Indexed {len(self._by_channel)} open ticket(s)")
+
+    def add(self, user_id: int, channel_id: int):
+        previous = self._by_user.get(user_id)
+        if previous is not None:
+            self._by_channel.pop(previous, None)
+        self._by_user[user_id] = channel_id
+        self._by_channel[channel_id] = user_id
+
+    def channel_for(self, user_id: int) -> Optional[int]:
+        return self._by_user.get(user_id)
+
+    def forget_channel(self, channel_id: int) -> Optional[int]:
+        """Drop a ticket channel from the index, returning its user id if it was indexed"""
+        user_id = self._by_channel.pop(channel_id, None)
+        if user_id is not None and self._by_user.get(user_id) == channel_id:
+            del self._by_user[user_id]
+        return user_id
+
+    def checkout_busy(self, user_id: int) -> bool:
+        return user_id in self._locks
+
+    @asynccontextmanager
+    async def checkout(self, user_id: int) -> AsyncIterator[None]:
+        """Hold the user's checkout lock; the lock is dropped once nobody holds or waits on it"""
+        lock, users = self._locks.get(user_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[user_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[user_id]
+            if users > 1:
+                self._locks[user_id] = (lock, users - 1)
+            else:
+                del self._locks[user_id]
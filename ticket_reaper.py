@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class TicketReaper:
+    """Periodically closes ticket and tryout channels nobody has written in for a while.
+
+    Candidates come from the unclosed rows of the tickets table (an indexed
+    query), never from a scan of the guild's channels. A channel's last
+    activity is read from the client cache (its last message id, or its
+    creation time if it has no messages), so finding stale tickets costs
+    no API calls. Stale channels are closed a few at a time with a pause
+    between batches, keeping the deletes well inside Discord's rate limits.
+    """
+
+    def __init__(self, db, get_channel: Callable[[int], Optional[discord.abc.GuildChannel]],
+                 close: Callable[[discord.TextChannel, str], Awaitable[bool]],
+                 max_idle: float = 48 * 3600, interval: float = 1800, batch_size: int = 5, batch_pause: float = 5.0):
+        self.db = db
+        self.get_channel = get_channel
+        self.close_channel = close
+        self.max_idle = max_idle
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.runs = 0
+        self.reaped_count = 0
+        self.last_run: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "reaped": self.reaped_count,
+            "last_run": self.last_run,
+        }
+
+    @staticmethod
+    def last_activity(channel: discord.abc.GuildChannel) -> datetime.datetime:
+        last_message_id = getattr(channel, "last_message_id", None)
+        if last_message_id:
+            return max(discord.utils.snowflake_time(last_message_id), channel.created_at)
+        return channel.created_at
+
+    async def run_once(self) -> dict:
+        """Close every stale ticket once, returning the counts for this run"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stale: List[Tuple[discord.TextChannel, str]] = []
+        missing = 0
+        rows = await self.db.get_unclosed_tickets()
+        for channel_id, kind in rows:
+            channel = self.get_channel(channel_id)
+            if channel is None:
+                # Deleted while the bot was offline; nothing left to archive
+                await self.db.set_ticket_status(channel_id, "closed")
+                missing += 1
+            elif (now - self.last_activity(channel)).total_seconds() >= self.max_idle:
+                stale.append((channel, kind))
+
+        reaped = failed = 0
+        for start in range(0, len(stale), self.batch_size):
+            if start:
+                await asyncio.sleep(self.batch_pause)
+            batch = stale[start:start + self.batch_size]
+            results = await asyncio.gather(*(self.close_channel(channel, kind) for channel, kind in batch), return_exceptions=True)
+            for (channel, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error reaping #{channel.name}: {result}")
+            reaped += sum(1 for result in results if result is True)
+            failed += sum(1 for result in results if result is not True)
+
+        self.runs += 1
+        self.reaped_count += reaped
+        self.last_run = {"at": now, "checked": len(rows), "reaped": reaped, "failed": failed, "missing": missing}
+        if reaped or failed or missing:
+            logger.info(f"Ticket reaper: closed {reaped} stale of {len(rows)} open ticket(s), {failed} failed, {missing} already gone")
+        return self.last_run
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error reaping stale tickets: {e}")
+            await asyncio.sleep(self.interval)
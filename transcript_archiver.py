@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from typing import List
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class TranscriptArchiver:
+    """Saves a channel's message history as a gzip-compressed JSONL transcript.
+
+    History is streamed oldest first and written a page at a time from a
+    worker thread, so memory stays bounded by one page however long the
+    channel is. Transcripts are written to a temporary file and renamed
+    into place once complete, so a failed export leaves nothing behind.
+    """
+
+    def __init__(self, directory: str, page_size: int = 100):
+        self.directory = directory
+        self.page_size = page_size
+
+    def path_for(self, channel: discord.abc.GuildChannel) -> str:
+        return os.path.join(self.directory, str(channel.guild.id), f"{channel.name}-{channel.id}.jsonl.gz")
+
+    async def archive(self, channel: discord.TextChannel) -> str:
+        """Write the channel's transcript and return its path"""
+        path = self.path_for(channel)
+        partial = f"{path}.partial"
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+
+        count = 0
+        transcript = await asyncio.to_thread(gzip.open, partial, "wt", encoding="utf-8")
+        try:
+            page: List[str] = []
+            async for message in channel.history(limit=None, oldest_first=True):
+                page.append(json.dumps(self.record(message), ensure_ascii=False))
+                if len(page) >= self.page_size:
+                    await asyncio.to_thread(self._write, transcript, page)
+                    count += len(page)
+                    page = []
+            if page:
+                await asyncio.to_thread(self._write, transcript, page)
+                count += len(page)
+        except BaseException:
+            await asyncio.to_thread(transcript.close)
+            await asyncio.to_thread(os.remove, partial)
+            raise
+
+        await asyncio.to_thread(transcript.close)
+        await asyncio.to_thread(os.replace, partial, path)
+        logger.info(f"Archived {count} message(s) from #{channel.name} to {path}")
+        return path
+
+    @staticmethod
+    def _write(transcript, lines: List[str]):
+        transcript.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def record(message: discord.Message) -> dict:
+        """One transcript line: who said what and when, with attachments (payment proof) and embeds"""
+        return {
+            "id": message.id,
+            "created_at": message.created_at.isoformat(),
+            "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+            "author_id": message.author.id,
+            "author": str(message.author),
+            "bot": message.author.bot,
+            "content": message.content,
+            "attachments": [
+                {"filename": attachment.filename, "url": attachment.url, "size": attachment.size}
+                for attachment in message.attachments
+            ],
+            "embeds": [embed.to_dict() for embed in message.embeds],
+        }